@@ -0,0 +1,70 @@
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+
+
+def profile_imports(module: str) -> list[tuple[str, int, int, int]]:
+  """
+  Imports a module in a fresh interpreter with -X importtime.
+
+  Args:
+    module: Dotted name of the module to import.
+
+  Returns:
+    List of (module, depth, self, cumulative) tuples, one per imported
+    module in import order, where depth is the module's nesting in the
+    import tree and times are in microseconds.
+
+  Raises:
+    subprocess.CalledProcessError: If the import fails.
+  """
+  process = subprocess.run(
+    [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+    capture_output=True,
+    text=True,
+    check=True,
+  )
+
+  imports = []
+  for line in process.stderr.splitlines():
+    if not line.startswith("import time:") or "[us]" in line:
+      continue
+    self_time, cumulative, name = line.removeprefix("import time:").split("|")
+    depth = (len(name) - len(name.lstrip())) // 2
+    imports.append((name.strip(), depth, int(self_time), int(cumulative)))
+  return imports
+
+
+def main(argv: list[str] | None = None) -> None:
+  parser = argparse.ArgumentParser(
+    description="Report where the time to import the app goes.",
+  )
+  parser.add_argument("--module", default="src.main")
+  parser.add_argument("--top", type=int, default=15)
+  args = parser.parse_args(argv)
+
+  imports = profile_imports(args.module)
+  total = sum(self_time for _, _, self_time, _ in imports)
+
+  packages: dict[str, int] = defaultdict(int)
+  for name, _, self_time, _ in imports:
+    packages[name.split(".")[0]] += self_time
+
+  print(f"import {args.module}: {total / 1e3:.0f}ms, {len(imports)} modules")
+  print()
+  print(f"{'package':<32}{'self':>10}{'share':>8}")
+  for name, self_time in sorted(
+    packages.items(), key=lambda item: item[1], reverse=True
+  )[: args.top]:
+    print(f"{name:<32}{self_time / 1e3:>8.0f}ms{self_time / total:>8.0%}")
+
+  print()
+  print(f"{'app module':<32}{'cumulative':>12}")
+  for name, _, _, cumulative in imports:
+    if name.split(".")[0] == args.module.split(".")[0]:
+      print(f"{name:<32}{cumulative / 1e3:>10.0f}ms")
+
+
+if __name__ == "__main__":
+  main()
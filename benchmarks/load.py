@@ -0,0 +1,434 @@
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+from urllib.parse import urlsplit
+
+import numpy as np
+
+REGIONS = ["Şile", "Çatalca", "Silivri", "Arnavutköy", "Beykoz"]
+
+
+@dataclass
+class Request:
+  """
+  HTTP request sent by the load generator.
+
+  Args:
+    endpoint: Name the request is reported under.
+    method: HTTP method.
+    path: Path and query string.
+    body: JSON body, or None for none.
+  """
+
+  endpoint: str
+  method: str
+  path: str
+  body: bytes | None = None
+
+
+@dataclass
+class Sample:
+  """
+  Outcome of one request.
+
+  Args:
+    endpoint: Name of the request's endpoint.
+    status: Response status code, or 0 if the request failed.
+    seconds: Time from sending the request to reading the whole body.
+  """
+
+  endpoint: str
+  status: int
+  seconds: float
+
+
+@dataclass
+class Connection:
+  """
+  Keep-alive HTTP/1.1 connection, reopened after every failure.
+
+  Args:
+    host: Server host.
+    port: Server port.
+  """
+
+  host: str
+  port: int
+  reader: asyncio.StreamReader | None = field(default=None, repr=False)
+  writer: asyncio.StreamWriter | None = field(default=None, repr=False)
+
+  async def send(self, request: Request) -> tuple[int, bytes]:
+    """
+    Sends a request and reads the whole response.
+
+    Args:
+      request: Request to send.
+
+    Returns:
+      Tuple of (status, body).
+    """
+    if self.writer is None:
+      self.reader, self.writer = await asyncio.open_connection(
+        self.host, self.port
+      )
+
+    body = request.body or b""
+    head = (
+      f"{request.method} {request.path} HTTP/1.1\r\n"
+      f"Host: {self.host}:{self.port}\r\n"
+      "Content-Type: application/json\r\n"
+      f"Content-Length: {len(body)}\r\n\r\n"
+    )
+    self.writer.write(head.encode() + body)
+    await self.writer.drain()
+
+    status = int((await self.reader.readline()).split()[1])
+    headers = {}
+    while (line := await self.reader.readline()) not in (b"\r\n", b""):
+      name, _, value = line.decode("latin-1").partition(":")
+      headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding") == "chunked":
+      chunks = []
+      while size := int((await self.reader.readline()).strip(), 16):
+        chunks.append(await self.reader.readexactly(size + 2))
+      await self.reader.readline()
+      content = b"".join(chunk[:-2] for chunk in chunks)
+    else:
+      content = await self.reader.readexactly(
+        int(headers.get("content-length", 0))
+      )
+
+    if headers.get("connection") == "close":
+      await self.close()
+    return status, content
+
+  async def close(self):
+    """
+    Closes the connection, if open.
+    """
+    if self.writer is not None:
+      self.writer.close()
+      self.reader = self.writer = None
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+  """
+  Parses a request mix such as "orders=1,baskets=2,regions=1".
+
+  Args:
+    mix: Comma-separated endpoint=weight pairs.
+
+  Returns:
+    Weight of every endpoint.
+
+  Raises:
+    ValueError: If an endpoint is unknown or a weight is not positive.
+  """
+  weights = {}
+  for pair in mix.split(","):
+    endpoint, _, weight = pair.partition("=")
+    if endpoint not in ("orders", "baskets", "regions"):
+      raise ValueError(f"Unknown endpoint in mix: {endpoint}")
+    weights[endpoint] = float(weight or 1)
+    if weights[endpoint] <= 0:
+      raise ValueError(f"Weight of {endpoint} must be positive")
+  return weights
+
+
+def build_requests(
+  orders: list[dict],
+  args: argparse.Namespace,
+) -> Callable[[random.Random], Request]:
+  """
+  Builds the function drawing requests from the mix.
+
+  Basket requests sample their orders from a pool, so every request is
+  allocated rather than served from the result cache.
+
+  Args:
+    orders: Pool of orders to sample basket requests from.
+    args: Parsed command line arguments.
+
+  Returns:
+    Function drawing one request with a random number generator.
+  """
+  weights = parse_mix(args.mix)
+  endpoints = list(weights)
+
+  def draw(rng: random.Random) -> Request:
+    endpoint = rng.choices(endpoints, [weights[name] for name in endpoints])[0]
+    if endpoint == "orders":
+      body = {
+        "regions": REGIONS,
+        "count": args.orders,
+        "seed": rng.randrange(2**31),
+      }
+      return Request(
+        "orders", "POST", "/api/orders/batch", json.dumps(body).encode()
+      )
+    if endpoint == "baskets":
+      body = {"orders": rng.sample(orders, min(args.baskets, len(orders)))}
+      return Request(
+        "baskets", "POST", "/api/baskets/batch", json.dumps(body).encode()
+      )
+    return Request("regions", "GET", f"/api/regions?zoom={args.zoom}")
+
+  return draw
+
+
+async def run_load(
+  host: str,
+  port: int,
+  draw: Callable[[random.Random], Request],
+  args: argparse.Namespace,
+) -> tuple[list[Sample], float]:
+  """
+  Sends requests from concurrent clients until the time or count is up.
+
+  Args:
+    host: Server host.
+    port: Server port.
+    draw: Function drawing the next request.
+    args: Parsed command line arguments.
+
+  Returns:
+    Tuple of (samples, seconds), where seconds is the wall time taken.
+  """
+  samples: list[Sample] = []
+  deadline = time.perf_counter() + args.duration
+  remaining = args.requests
+
+  async def client(seed: int):
+    nonlocal remaining
+    rng = random.Random(seed)
+    connection = Connection(host, port)
+    while time.perf_counter() < deadline:
+      if remaining is not None:
+        if remaining <= 0:
+          break
+        remaining -= 1
+      request = draw(rng)
+      start = time.perf_counter()
+      try:
+        status, _ = await asyncio.wait_for(
+          connection.send(request), args.timeout
+        )
+      except (OSError, EOFError, ValueError, IndexError, asyncio.TimeoutError):
+        await connection.close()
+        status = 0
+      samples.append(
+        Sample(request.endpoint, status, time.perf_counter() - start)
+      )
+    await connection.close()
+
+  start = time.perf_counter()
+  await asyncio.gather(
+    *(client(args.seed + index) for index in range(args.concurrency))
+  )
+  return samples, time.perf_counter() - start
+
+
+def summarize(samples: list[Sample], seconds: float) -> dict:
+  """
+  Summarizes samples into throughput, error rate and latency.
+
+  Responses with a status of 400 or more, and failed requests, count as
+  errors. Latency percentiles cover every sample, errors included.
+
+  Args:
+    samples: Samples to summarize.
+    seconds: Wall time the samples were collected in.
+
+  Returns:
+    Dict holding the request count, throughput in requests per second,
+    error count and rate, count per status, and latency percentiles,
+    mean and maximum in milliseconds.
+  """
+  latencies = np.array([sample.seconds for sample in samples]) * 1e3
+  errors = sum(sample.status == 0 or sample.status >= 400 for sample in samples)
+  statuses: dict[str, int] = {}
+  for sample in samples:
+    statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+
+  summary = {
+    "requests": len(samples),
+    "throughput": len(samples) / seconds if seconds else 0.0,
+    "errors": errors,
+    "error_rate": errors / len(samples) if samples else 0.0,
+    "statuses": dict(sorted(statuses.items())),
+    "latency_ms": None,
+  }
+  if len(samples):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+    summary["latency_ms"] = {
+      "p50": p50,
+      "p95": p95,
+      "p99": p99,
+      "mean": float(latencies.mean()),
+      "max": float(latencies.max()),
+    }
+  return summary
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+  """
+  Starts the app on a local port.
+
+  Args:
+    port: Port to serve on.
+    workers: Number of Sanic workers.
+
+  Returns:
+    The server process.
+  """
+  return subprocess.Popen(
+    [
+      sys.executable,
+      "-m",
+      "sanic",
+      "src.main:create_app",
+      "--factory",
+      f"--port={port}",
+      f"--workers={workers}",
+    ],
+    stdout=subprocess.DEVNULL,
+    stderr=subprocess.DEVNULL,
+  )
+
+
+async def wait_ready(host: str, port: int, timeout: float):
+  """
+  Waits until the server reports it is ready.
+
+  Args:
+    host: Server host.
+    port: Server port.
+    timeout: Seconds to wait at most.
+
+  Raises:
+    TimeoutError: If the server is not ready in time.
+  """
+  deadline = time.perf_counter() + timeout
+  request = Request("ready", "GET", "/api/health/ready")
+  while time.perf_counter() < deadline:
+    connection = Connection(host, port)
+    try:
+      status, _ = await connection.send(request)
+      if status == 200:
+        return
+    except (OSError, EOFError, ValueError, IndexError):
+      pass
+    finally:
+      await connection.close()
+    await asyncio.sleep(0.5)
+  raise TimeoutError(f"Server at {host}:{port} not ready in {timeout}s")
+
+
+async def load(args: argparse.Namespace) -> dict:
+  """
+  Runs a load test as configured on the command line.
+
+  Args:
+    args: Parsed command line arguments.
+
+  Returns:
+    Report holding the configuration, the overall summary and the
+    summary of every endpoint.
+  """
+  url = urlsplit(args.url)
+  host, port = url.hostname, url.port or 80
+
+  await wait_ready(host, port, args.ready_timeout)
+
+  connection = Connection(host, port)
+  body = {"regions": REGIONS, "count": args.pool, "seed": args.seed}
+  status, content = await connection.send(
+    Request("orders", "POST", "/api/orders/batch", json.dumps(body).encode())
+  )
+  await connection.close()
+  if status != 201:
+    raise RuntimeError(f"Could not generate orders: {status} {content[:200]}")
+
+  draw = build_requests(json.loads(content), args)
+  samples, seconds = await run_load(host, port, draw, args)
+
+  endpoints = sorted({sample.endpoint for sample in samples})
+  return {
+    "config": {
+      "url": args.url,
+      "mix": parse_mix(args.mix),
+      "concurrency": args.concurrency,
+      "duration": args.duration,
+      "requests": args.requests,
+      "orders": args.orders,
+      "baskets": args.baskets,
+      "zoom": args.zoom,
+      "workers": args.workers if args.start else None,
+    },
+    "seconds": seconds,
+    "overall": summarize(samples, seconds),
+    "endpoints": {
+      endpoint: summarize(
+        [sample for sample in samples if sample.endpoint == endpoint],
+        seconds,
+      )
+      for endpoint in endpoints
+    },
+  }
+
+
+def main(argv: list[str] | None = None) -> None:
+  parser = argparse.ArgumentParser(
+    description="Drive the API with concurrent clients and report "
+    "latency percentiles, throughput and error rates as JSON.",
+  )
+  parser.add_argument("--url", default="http://127.0.0.1:8000")
+  parser.add_argument(
+    "--start",
+    action="store_true",
+    help="Start the app on the port of --url and stop it afterwards",
+  )
+  parser.add_argument("--workers", type=int, default=1)
+  parser.add_argument("--concurrency", type=int, default=8)
+  parser.add_argument("--duration", type=float, default=10.0)
+  parser.add_argument(
+    "--requests", type=int, help="Stop after this many requests"
+  )
+  parser.add_argument("--mix", default="orders=1,baskets=1,regions=1")
+  parser.add_argument("--orders", type=int, default=1_000)
+  parser.add_argument("--baskets", type=int, default=500)
+  parser.add_argument("--pool", type=int, default=5_000)
+  parser.add_argument("--zoom", type=int, default=10)
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--timeout", type=float, default=60.0)
+  parser.add_argument("--ready-timeout", type=float, default=120.0)
+  parser.add_argument("--output", help="Write the report to this file")
+  args = parser.parse_args(argv)
+  parse_mix(args.mix)
+
+  server = None
+  if args.start:
+    server = start_server(urlsplit(args.url).port or 80, args.workers)
+  try:
+    report = asyncio.run(load(args))
+  finally:
+    if server is not None:
+      server.terminate()
+      server.wait()
+
+  output = json.dumps(report, indent=2)
+  if args.output:
+    with open(args.output, "w") as file:
+      file.write(output + "\n")
+  print(output)
+
+
+if __name__ == "__main__":
+  main()
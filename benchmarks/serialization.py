@@ -0,0 +1,92 @@
+import argparse
+import json
+import time
+from typing import Callable
+
+import numpy as np
+
+from src.basket.service import parse_request
+from src.basket.type import Basket, BasketsCreate
+from src.order.type import Order
+from src.serialization import loads, type_adapter
+
+
+def measure(function: Callable[[], object], repeat: int) -> float:
+  """
+  Times a function, best of several runs.
+
+  Args:
+    function: Function to time.
+    repeat: Number of timed runs, after one warm-up run.
+
+  Returns:
+    Fastest run, in milliseconds.
+  """
+  function()
+  timings = []
+  for _ in range(repeat):
+    start = time.perf_counter()
+    function()
+    timings.append(time.perf_counter() - start)
+  return min(timings) * 1e3
+
+
+def main(argv: list[str] | None = None) -> None:
+  parser = argparse.ArgumentParser(
+    description="Compare JSON serialization and request validation with "
+    "the model-based paths they replaced.",
+  )
+  parser.add_argument("--orders", type=int, default=10_000)
+  parser.add_argument("--repeat", type=int, default=20)
+  args = parser.parse_args(argv)
+
+  rng = np.random.default_rng(0)
+  latitudes = rng.uniform(40.9, 41.1, args.orders)
+  longitudes = rng.uniform(28.9, 29.2, args.orders)
+  orders = [
+    Order(latitude=latitude, longitude=longitude)
+    for latitude, longitude in zip(latitudes.tolist(), longitudes.tolist())
+  ]
+  baskets = [
+    Basket(
+      latitude=orders[start].latitude,
+      longitude=orders[start].longitude,
+      radius=0.5,
+      orders=orders[start : start + 5],
+    )
+    for start in range(0, len(orders), 5)
+  ]
+  request = json.dumps({"orders": [order.model_dump() for order in orders]})
+
+  cases = {
+    "encode orders": (
+      lambda: json.dumps([order.model_dump() for order in orders]),
+      lambda: type_adapter(list[Order]).dump_json(orders),
+    ),
+    "encode baskets": (
+      lambda: json.dumps([basket.model_dump() for basket in baskets]),
+      lambda: type_adapter(list[Basket]).dump_json(baskets),
+    ),
+    "decode baskets request": (
+      lambda: BasketsCreate.model_validate(json.loads(request)),
+      lambda: BasketsCreate.model_validate(loads(request)),
+    ),
+    "validate baskets request": (
+      lambda: BasketsCreate.model_validate(loads(request)),
+      lambda: parse_request(loads(request)),
+    ),
+  }
+
+  print(f"{args.orders:,} orders, best of {args.repeat} runs")
+  print(f"{'case':<26}{'before':>10}{'after':>10}{'speedup':>9}")
+  for name, (before, after) in cases.items():
+    baseline = measure(before, args.repeat)
+    current = measure(after, args.repeat)
+    print(
+      f"{name:<26}{baseline:>8.1f}ms{current:>8.1f}ms"
+      f"{baseline / current:>8.1f}x"
+    )
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,176 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sanic import exceptions
+
+from .type import AdmissionState
+
+
+class AdmissionQueue:
+  """
+  Admits solver work up to a cost budget, queueing the rest in order.
+
+  Requests run while the cost of the running work stays within capacity.
+  Requests that do not fit wait in arrival order, as long as the cost of
+  the waiting work stays within budget. Requests that would exceed it are
+  rejected with 503 and a Retry-After estimated from the work ahead of
+  them and the throughput measured so far. A request costing more than
+  capacity on its own runs once nothing else does.
+
+  Args:
+    capacity: Cost of the work allowed to run at once.
+    budget: Cost of the work allowed to wait on top of it.
+    throughput: Initial estimate of the cost completed per second, used
+      for Retry-After until requests have been timed.
+  """
+
+  # Weight of the last request in the measured throughput.
+  SMOOTHING = 0.2
+
+  def __init__(self, capacity: int, budget: int, throughput: float = 5_000):
+    self.capacity = capacity
+    self.budget = budget
+    self.throughput = throughput
+
+    self.running = 0
+    self.running_cost = 0
+    self.waiting: deque[tuple[int, asyncio.Future]] = deque()
+    self.waiting_cost = 0
+    self.admitted = 0
+    self.rejected = 0
+
+  def check(self, cost: int):
+    """
+    Rejects a request that could not even wait.
+
+    Args:
+      cost: Lower bound of the request's cost.
+
+    Raises:
+      ServiceUnavailable: If the request would exceed the budget.
+    """
+    if not self.fits(cost) and self.waiting_cost + cost > self.budget:
+      self.rejected += 1
+      raise exceptions.ServiceUnavailable(
+        "Too much basket allocation work queued, retry later",
+        headers={"Retry-After": str(self.retry_after(cost))},
+      )
+
+  @asynccontextmanager
+  async def admit(self, cost: int) -> AsyncIterator[None]:
+    """
+    Holds a share of capacity while the request runs.
+
+    Waits for the work ahead of the request to free enough capacity. If
+    the request is cancelled while waiting, it leaves the queue.
+
+    Args:
+      cost: Estimated cost of the request.
+
+    Raises:
+      ServiceUnavailable: If the request would exceed the budget.
+    """
+    if self.fits(cost) and not self.waiting:
+      self.start(cost)
+    else:
+      self.check(cost)
+      entry = (cost, asyncio.get_running_loop().create_future())
+      self.waiting.append(entry)
+      self.waiting_cost += cost
+      try:
+        await entry[1]
+      except asyncio.CancelledError:
+        if entry in self.waiting:
+          self.waiting.remove(entry)
+          self.waiting_cost -= cost
+        elif not entry[1].cancelled():
+          self.finish(cost)
+        raise
+
+    start = time.perf_counter()
+    try:
+      yield
+    finally:
+      seconds = time.perf_counter() - start
+      if seconds > 0:
+        self.throughput += self.SMOOTHING * (cost / seconds - self.throughput)
+      self.finish(cost)
+
+  def fits(self, cost: int) -> bool:
+    """
+    Tells whether a request can run alongside the running work.
+
+    Args:
+      cost: Estimated cost of the request.
+
+    Returns:
+      True if nothing runs or the request fits in the remaining capacity.
+    """
+    return self.running == 0 or self.running_cost + cost <= self.capacity
+
+  def start(self, cost: int):
+    """
+    Counts a request as running.
+
+    Args:
+      cost: Estimated cost of the request.
+    """
+    self.running += 1
+    self.running_cost += cost
+    self.admitted += 1
+
+  def finish(self, cost: int):
+    """
+    Releases the capacity of a request, starting the waiting requests
+    that fit.
+
+    Args:
+      cost: Estimated cost of the request.
+    """
+    self.running -= 1
+    self.running_cost -= cost
+
+    while self.waiting and self.fits(self.waiting[0][0]):
+      cost, future = self.waiting.popleft()
+      self.waiting_cost -= cost
+      if not future.cancelled():
+        self.start(cost)
+        future.set_result(None)
+
+  def retry_after(self, cost: int) -> int:
+    """
+    Estimates when a request would be admitted.
+
+    Args:
+      cost: Estimated cost of the request.
+
+    Returns:
+      Seconds, at least 1, to complete the running and waiting work and
+      the request itself at the measured throughput.
+    """
+    work = self.running_cost + self.waiting_cost + cost
+    return max(1, math.ceil(work / self.throughput))
+
+  def state(self) -> AdmissionState:
+    """
+    Reports the state of the queue.
+
+    Returns:
+      AdmissionState holding the running and waiting requests and their
+      cost, the limits, the request counters and the throughput.
+    """
+    return AdmissionState(
+      running=self.running,
+      running_cost=self.running_cost,
+      waiting=len(self.waiting),
+      waiting_cost=self.waiting_cost,
+      capacity=self.capacity,
+      budget=self.budget,
+      admitted=self.admitted,
+      rejected=self.rejected,
+      throughput=self.throughput,
+    )
@@ -1,18 +1,130 @@
-from sanic import Blueprint, Request, json
-from sanic.response import JSONResponse
+from sanic import Blueprint, HTTPResponse, Request, exceptions, raw
 from sanic_ext import openapi
 
+from ..order.type import Order
+from ..serialization import dumps, typed_json
 from . import service
-from .type import Baskets, BasketsCreate
+from .type import (
+  AdmissionState,
+  Basket,
+  Baskets,
+  BasketsCreate,
+  PartitionedBaskets,
+)
 
 route = Blueprint("basket", url_prefix="/baskets")
 
+NDJSON = "application/x-ndjson"
+BINARY = "application/octet-stream"
 
-@route.post("/batch")
-@openapi.body({"application/json": BasketsCreate.json()})
-@openapi.response(200, {"application/json": Baskets.json()})
-async def create_baskets(request: Request) -> JSONResponse:
-  """Create baskets for orders"""
-  body = BasketsCreate.model_validate(request.json)
-  baskets = await service.create_baskets(body)
-  return json([basket.model_dump() for basket in baskets], status=201)
+
+@route.post("/batch", stream=True)
+@openapi.body(
+  {
+    "application/json": BasketsCreate.json(),
+    NDJSON: Order.json(),
+    BINARY: {"type": "string", "format": "binary"},
+  }
+)
+@openapi.parameter(
+  "districts",
+  bool,
+  "query",
+  description="Tag every basket and order with the region it falls in. "
+  "Read for application/x-ndjson and application/octet-stream uploads "
+  "only; JSON bodies set it in the body.",
+)
+@openapi.parameter(
+  "partition",
+  str,
+  "query",
+  description="Set to `district` to allocate every district separately. "
+  "Read for application/x-ndjson and application/octet-stream uploads "
+  "only; JSON bodies set it in the body.",
+)
+@openapi.response(
+  201,
+  {
+    "application/json": {
+      "oneOf": [Baskets.json(), PartitionedBaskets.json()],
+    },
+    NDJSON: Basket.json(),
+  },
+)
+@openapi.response(503, description="Too much allocation work queued")
+async def create_baskets(request: Request) -> HTTPResponse | None:
+  """
+  Create baskets for orders
+
+  Send `Accept: application/x-ndjson` to receive one basket per line as
+  soon as the component it belongs to is solved.
+
+  Set `partition` to `district` to allocate every district on its own,
+  so that no basket crosses a district border. JSON responses then also
+  report the orders, baskets and allocation time of every district.
+
+  Requests are admitted by the cost of their allocation. When too much
+  work is queued, they are rejected with 503 and a `Retry-After` header.
+
+  To upload many orders, send them with `Content-Type:
+  application/x-ndjson`, one order per line, or `Content-Type:
+  application/octet-stream`, as little-endian float64 (latitude,
+  longitude) pairs. Orders are then decoded as they arrive, and
+  `districts` and `partition` are read from the query string.
+  """
+  # Sanic defaults a missing Content-Type to application/octet-stream,
+  # so only the header itself selects a streamed upload.
+  content_type = request.headers.get("content-type", "")
+  media_type = content_type.split(";")[0].strip().lower()
+  if media_type in (NDJSON, BINARY):
+    body, latitudes, longitudes = await service.parse_stream(
+      {name: request.args.get(name) for name in request.args},
+      request.stream,
+      binary=media_type == BINARY,
+    )
+  else:
+    await request.receive_body()
+    body, latitudes, longitudes = service.parse_request(request.json)
+
+  if request.accept.match(NDJSON, accept_wildcards=False):
+
+    def encode(baskets):
+      return b"".join(dumps(basket) + b"\n" for basket in baskets)
+
+    # The first component is awaited before responding, so that rejected
+    # requests are still answered with 503.
+    results = service.stream_admitted(body, latitudes, longitudes)
+    try:
+      _, first = await results.__anext__()
+    except StopAsyncIteration:
+      first = []
+
+    response = await request.respond(status=201, content_type=NDJSON)
+    if first:
+      await response.send(encode(first))
+    async for _, baskets in results:
+      await response.send(encode(baskets))
+    await response.eof()
+    return None
+
+  return raw(
+    await service.create_response(body, latitudes, longitudes),
+    status=201,
+    content_type="application/json",
+  )
+
+
+@route.get("/admission")
+@openapi.response(200, {"application/json": AdmissionState.json()})
+@openapi.response(404, description="Admission control is off")
+async def get_admission(request: Request) -> HTTPResponse:
+  """
+  Get the admission queue
+
+  Reports the requests this worker is allocating and queueing, their
+  cost in candidate pairs, and how many were admitted and rejected.
+  """
+  state = service.get_admission_state()
+  if state is None:
+    raise exceptions.NotFound("Admission control is off")
+  return typed_json(state)
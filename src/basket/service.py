@@ -1,115 +1,652 @@
-from ortools.linear_solver import pywraplp
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterable, AsyncIterator, Iterator, Mapping
 
-from .type import Basket, BasketsCreate
-from .util import build_spatial_tree, query_radius_tree
+import numpy as np
+from pydantic import ValidationError
+from sanic import exceptions
+from scipy.spatial import cKDTree
 
+from ..executor import create_executor, pool_size
+from ..order.type import Order
+from ..order.util import (
+  BinaryOrderDecoder,
+  NdjsonOrderDecoder,
+  validate_coordinates,
+)
+from ..profiling import profiled
+from ..region import service as region_service
+from ..serialization import dumps, type_adapter
+from ..shared import SharedCache
+from .admission import AdmissionQueue
+from .type import AdmissionState, Basket, BasketsCreate, Partition
+from .util import (
+  assign_baskets,
+  basket_payloads,
+  count_candidate_pairs,
+  query_radius_points,
+  solve_set_cover,
+  split_components,
+  split_partitions,
+)
 
-async def create_baskets(body: BasketsCreate) -> list[Basket]:
+RADIUS = 0.5
+PARALLEL_THRESHOLD = 2_000
+BULK_THRESHOLD = 1_000
+# Time allocation runs on a thread before handing solved components back
+# to the event loop.
+STREAM_INTERVAL = 0.05
+
+# Orders 0.4 km apart on a line: no candidate basket covers all of them,
+# so allocating them goes through the set cover solver.
+WARM_UP_ORDERS = [
+  {"latitude": 41.0 + index * 0.4 / 111.2, "longitude": 29.0}
+  for index in range(4)
+]
+
+executor: ProcessPoolExecutor | None = None
+cache: SharedCache | None = None
+admission: AdmissionQueue | None = None
+
+
+def parse_request(
+  data: Any,
+) -> tuple[BasketsCreate, np.ndarray, np.ndarray]:
   """
-  Allocates orders into baskets using OR-Tools set cover optimization.
+  Validates a baskets request body.
 
-  Uses scipy.cKDTree for fast spatial queries and OR-Tools for optimal set
-  cover solution. The algorithm minimizes the number of baskets while
-  ensuring each basket has a strict radius of 0.5 km and every order is
-  assigned to exactly one basket.
+  Small requests are validated into a BasketsCreate with one Order per
+  order. From BULK_THRESHOLD orders on, coordinates are validated in
+  bulk on arrays by validate_coordinates instead, and only the other
+  fields go through the model.
 
-  The algorithm works as follows:
-  1. Build spatial tree from all orders for efficient radius queries
-  2. For each order as potential center, find all orders within 0.5 km
-  3. Use OR-Tools set cover solver to find minimum baskets covering all orders
-  4. Create baskets from the optimal solution, handling unassigned orders
+  Args:
+    data: Decoded JSON request body.
+
+  Returns:
+    Tuple of (body, latitudes, longitudes). For bulk requests body holds
+    no orders, so the arrays are the only copy of their coordinates.
+
+  Raises:
+    ValidationError: If the body is invalid.
+  """
+  orders = data.get("orders") if isinstance(data, dict) else None
+
+  if isinstance(orders, list) and len(orders) >= BULK_THRESHOLD:
+    coordinates = validate_coordinates(
+      orders, BasketsCreate.__name__, ("orders",)
+    )
+    if coordinates is not None:
+      body = BasketsCreate.model_validate({**data, "orders": []})
+      return body, *coordinates
+
+  body = BasketsCreate.model_validate(data)
+  return body, *order_coordinates(body.orders)
+
+
+async def parse_stream(
+  options: Mapping[str, Any],
+  chunks: AsyncIterable[bytes],
+  binary: bool = False,
+) -> tuple[BasketsCreate, np.ndarray, np.ndarray]:
+  """
+  Validates a streamed baskets request body.
+
+  The body holds only orders, as NDJSON or binary coordinates, and is
+  decoded chunk by chunk as it arrives, so at no point is it held whole.
+  The other fields come from options, validated before the body is read.
+
+  Args:
+    options: Fields of the request other than orders, such as its query
+      arguments.
+    chunks: Chunks of the request body.
+    binary: Whether orders are little-endian float64 (latitude,
+      longitude) pairs rather than NDJSON.
+
+  Returns:
+    Tuple of (body, latitudes, longitudes), where body holds no orders.
+
+  Raises:
+    ValidationError: If the options or any order are invalid.
+    BadRequest: If the body ends within a binary order.
+  """
+  body = BasketsCreate.model_validate({**options, "orders": []})
+
+  decoder = (BinaryOrderDecoder if binary else NdjsonOrderDecoder)(
+    BasketsCreate.__name__, ("orders",)
+  )
+  try:
+    async for chunk in chunks:
+      decoder.feed(chunk)
+    latitudes, longitudes = decoder.close()
+  except ValidationError:
+    raise
+  except ValueError as error:
+    raise exceptions.BadRequest(str(error)) from None
+
+  return body, latitudes, longitudes
+
+
+def order_coordinates(orders: list[Order]) -> tuple[np.ndarray, np.ndarray]:
+  """
+  Collects the coordinates of orders into arrays.
 
   Args:
-    body: Request body containing list of orders to allocate.
+    orders: Orders to collect.
 
   Returns:
-    List of Basket objects, each containing orders within 0.5 km radius.
-    Each order is assigned to exactly one basket. If solver fails, falls
-    back to greedy assignment to ensure all orders are covered.
+    Tuple of (latitudes, longitudes) float64 arrays.
+  """
+  latitudes = np.array([order.latitude for order in orders], dtype=np.float64)
+  longitudes = np.array([order.longitude for order in orders], dtype=np.float64)
+  return latitudes, longitudes
+
 
-  Note:
-    Uses CBC solver if available, otherwise falls back to SAT solver.
-    The solution is optimal when solver succeeds, otherwise uses greedy
-    approach to ensure complete coverage.
+async def create_payloads(
+  body: BasketsCreate,
+  latitudes: np.ndarray,
+  longitudes: np.ndarray,
+) -> tuple[list[dict], list[Partition]]:
   """
-  radius = 0.5
-  orders = body.orders
+  Allocates orders into baskets laid out as JSON.
 
-  if not orders:
-    return []
+  Collects every basket produced by stream_payloads. With
+  partition="district", districts are listed in the order of the
+  regions file, whatever order they finished in.
 
-  tree = build_spatial_tree(orders)
+  Args:
+    body: Request options. Its orders are ignored.
+    latitudes: Array of order latitudes.
+    longitudes: Array of order longitudes, same length as latitudes.
 
-  potential_baskets: list[list[int]] = []
-  for center_order in orders:
-    within_radius = query_radius_tree(tree, center_order, radius, orders)
-    potential_baskets.append(within_radius)
+  Returns:
+    Tuple of (baskets, partitions), where baskets are dicts as laid out
+    by basket_payloads and partitions holds the statistics of every
+    district, empty unless partitioned.
+  """
+  results = [
+    result async for result in stream_payloads(body, latitudes, longitudes)
+  ]
 
-  num_orders = len(orders)
-  num_baskets = len(potential_baskets)
+  if body.partition == "district":
+    names = (*region_service.get_registry().names, None)
+    positions = {name: position for position, name in enumerate(names)}
+    results.sort(key=lambda result: positions[result[0].district])
 
-  solver = pywraplp.Solver.CreateSolver("CBC")
-  if not solver:
-    solver = pywraplp.Solver.CreateSolver("SAT")
+  return (
+    [basket for _, baskets in results for basket in baskets],
+    [partition for partition, _ in results if partition is not None],
+  )
 
-  x = [solver.IntVar(0, 1, f"basket_{i}") for i in range(num_baskets)]
 
-  for order_idx in range(num_orders):
-    covering_baskets = [
-      i for i in range(num_baskets) if order_idx in potential_baskets[i]
-    ]
-    if covering_baskets:
-      solver.Add(sum(x[i] for i in covering_baskets) >= 1)
+async def create_response(
+  body: BasketsCreate,
+  latitudes: np.ndarray,
+  longitudes: np.ndarray,
+) -> bytes:
+  """
+  Allocates orders into baskets, serialized as a JSON response body.
 
-  solver.Minimize(sum(x))
+  Serializes the result of create_payloads: the list of baskets or, with
+  partition="district", an object holding the baskets and partitions.
+  If a result cache is set, bodies are cached under the request's
+  options and coordinates, so repeated requests, served by any worker,
+  skip allocation. Cached partitioned bodies report the time their
+  first allocation took.
 
-  status = solver.Solve()
+  Args:
+    body: Request options. Its orders are ignored.
+    latitudes: Array of order latitudes.
+    longitudes: Array of order longitudes, same length as latitudes.
+
+  Returns:
+    UTF-8 encoded JSON response body.
+
+  Raises:
+    ServiceUnavailable: If admission control rejects the request.
+  """
+  key = None
+  if cache is not None:
+    key = request_key(body, latitudes, longitudes)
+    cached = cache.get(key)
+    if cached is not None:
+      return cached
 
-  selected_baskets = []
-  if status == pywraplp.Solver.OPTIMAL or status == pywraplp.Solver.FEASIBLE:
-    for i in range(num_baskets):
-      if x[i].solution_value() > 0.5:
-        selected_baskets.append(i)
+  async with admit(latitudes, longitudes):
+    baskets, partitions = await create_payloads(body, latitudes, longitudes)
+  if body.partition == "district":
+    response = dumps({"baskets": baskets, "partitions": partitions})
   else:
-    uncovered = set(range(num_orders))
-    for i in range(num_baskets):
-      if uncovered and any(idx in uncovered for idx in potential_baskets[i]):
-        selected_baskets.append(i)
-        uncovered -= set(potential_baskets[i])
+    response = dumps(baskets)
 
-  assigned_orders = set()
-  baskets = []
+  if cache is not None:
+    cache.put(key, response)
 
-  for basket_idx in sorted(selected_baskets):
-    center_order = orders[basket_idx]
-    basket_order_indices = potential_baskets[basket_idx]
+  return response
 
-    unassigned_indices = [
-      idx for idx in basket_order_indices if idx not in assigned_orders
-    ]
 
-    if unassigned_indices:
-      basket_orders = [orders[idx] for idx in unassigned_indices]
-      assigned_orders.update(unassigned_indices)
+def request_key(
+  body: BasketsCreate,
+  latitudes: np.ndarray,
+  longitudes: np.ndarray,
+) -> bytes:
+  """
+  Digests a baskets request into its result cache key.
+
+  Args:
+    body: Request options. Its orders are ignored.
+    latitudes: Array of order latitudes.
+    longitudes: Array of order longitudes, same length as latitudes.
+
+  Returns:
+    16-byte digest of the options, the radius and the coordinates.
+  """
+  digest = hashlib.blake2b(digest_size=16)
+  digest.update(body.model_dump_json(exclude={"orders"}).encode())
+  digest.update(np.float64(RADIUS).tobytes())
+  digest.update(np.ascontiguousarray(latitudes, dtype=np.float64).tobytes())
+  digest.update(np.ascontiguousarray(longitudes, dtype=np.float64).tobytes())
+  return digest.digest()
+
+
+@asynccontextmanager
+async def admit(
+  latitudes: np.ndarray,
+  longitudes: np.ndarray,
+) -> AsyncIterator[None]:
+  """
+  Holds admission for allocating orders, if admission control is set.
+
+  The cost of a request is its number of candidate pairs, which
+  allocation time grows with. Since every order is a candidate pair of
+  its own, the order count is a lower bound of the cost: requests that
+  could not fit even at that cost are rejected before pairs are counted.
+
+  Args:
+    latitudes: Array of order latitudes.
+    longitudes: Array of order longitudes, same length as latitudes.
+
+  Raises:
+    ServiceUnavailable: If the admission queue is over budget.
+  """
+  if admission is None:
+    yield
+    return
+
+  admission.check(len(latitudes))
+  cost = await asyncio.get_running_loop().run_in_executor(
+    None, count_candidate_pairs, latitudes, longitudes, RADIUS
+  )
+  async with admission.admit(cost):
+    yield
+
+
+def set_admission(queue: AdmissionQueue | None):
+  """
+  Sets the queue admitting basket allocation requests.
+
+  Args:
+    queue: Admission queue of the worker, or None to admit every
+      request.
+  """
+  global admission
+
+  admission = queue
+
+
+def get_admission_state() -> AdmissionState | None:
+  """
+  Reports the state of the admission queue.
+
+  Returns:
+    AdmissionState of the queue, or None if admission control is off.
+  """
+  return None if admission is None else admission.state()
+
+
+def set_cache(shared: SharedCache | None):
+  """
+  Sets the cache create_response keeps response bodies in.
+
+  Args:
+    shared: Cache shared by the server's workers, or None to disable
+      caching.
+  """
+  global cache
+
+  cache = shared
+
+
+async def stream_payloads(
+  body: BasketsCreate,
+  latitudes: np.ndarray,
+  longitudes: np.ndarray,
+) -> AsyncIterator[tuple[Partition | None, list[dict]]]:
+  """
+  Allocates orders into baskets laid out as JSON, as they are solved.
+
+  Runs stream_allocation over the coordinates. Since components are
+  independent, the baskets of a component are final as soon as it is
+  solved and can be sent before the rest is done. With
+  partition="district", the orders of every district are allocated
+  separately, so no basket crosses a district border, and baskets are
+  yielded district by district.
+
+  Args:
+    body: Request options: whether to tag districts and how to
+      partition. Its orders are ignored.
+    latitudes: Array of order latitudes.
+    longitudes: Array of order longitudes, same length as latitudes.
+
+  Yields:
+    Tuple of (partition, baskets) for one component or district, where
+    baskets are dicts as laid out by basket_payloads. Partition holds the
+    district's statistics, or is None unless partitioned. If requested,
+    baskets and orders carry the district of their center and of the
+    order respectively; partitioned baskets always carry their district.
+  """
+  partitioned = body.partition == "district"
 
-      basket = Basket(
-        latitude=center_order.latitude,
-        longitude=center_order.longitude,
-        radius=radius,
-        orders=basket_orders,
+  names = districts = region_ids = None
+  if body.districts or partitioned:
+    registry = region_service.get_registry()
+    # Region id -1 marks orders outside every region and picks the None.
+    names = (*registry.names, None)
+    region_ids = registry.index.lookup(longitudes, latitudes)
+    districts = [names[region_id] for region_id in region_ids.tolist()]
+
+  order_districts = districts if body.districts else None
+
+  async for region_id, allocation, seconds in stream_allocation(
+    latitudes, longitudes, region_ids if partitioned else None
+  ):
+    baskets = basket_payloads(
+      latitudes, longitudes, RADIUS, allocation, districts, order_districts
+    )
+    partition = None
+    if partitioned:
+      partition = Partition(
+        district=names[region_id],
+        orders=sum(len(order_indices) for _, order_indices in allocation),
+        baskets=len(baskets),
+        seconds=seconds,
       )
-      baskets.append(basket)
-
-  if len(assigned_orders) < num_orders:
-    unassigned = set(range(num_orders)) - assigned_orders
-    for order_idx in sorted(unassigned):
-      order = orders[order_idx]
-      basket = Basket(
-        latitude=order.latitude,
-        longitude=order.longitude,
-        radius=radius,
-        orders=[order],
+    yield partition, baskets
+
+
+async def stream_admitted(
+  body: BasketsCreate,
+  latitudes: np.ndarray,
+  longitudes: np.ndarray,
+) -> AsyncIterator[tuple[Partition | None, list[dict]]]:
+  """
+  Runs stream_payloads under admission, released once allocation ends.
+
+  Allocation runs ahead of the caller in a task of its own, which queues
+  what stream_payloads yields. Admission is thus released, and the
+  queue's throughput measured, as soon as the last component is solved,
+  however long the caller takes to send the baskets on. Nothing is
+  yielded before the request is admitted.
+
+  Args:
+    body: Request options, see stream_payloads.
+    latitudes: Array of order latitudes.
+    longitudes: Array of order longitudes, same length as latitudes.
+
+  Yields:
+    Tuple of (partition, baskets) for one component or district, as
+    stream_payloads.
+
+  Raises:
+    ServiceUnavailable: If admission control rejects the request.
+  """
+  results: asyncio.Queue = asyncio.Queue()
+
+  async def produce():
+    try:
+      async with admit(latitudes, longitudes):
+        async for result in stream_payloads(body, latitudes, longitudes):
+          results.put_nowait(result)
+    except Exception as error:
+      results.put_nowait(error)
+    results.put_nowait(None)
+
+  producer = asyncio.create_task(produce())
+  try:
+    while (result := await results.get()) is not None:
+      if isinstance(result, Exception):
+        raise result
+      yield result
+  finally:
+    producer.cancel()
+
+
+async def stream_allocation(
+  latitudes: np.ndarray,
+  longitudes: np.ndarray,
+  region_ids: np.ndarray | None = None,
+) -> AsyncIterator[
+  tuple[int | None, list[tuple[int, list[int]]], float | None]
+]:
+  """
+  Allocates points into baskets, optionally region by region.
+
+  Without region ids, yields the allocation of every component as
+  allocate solves it. With region ids, groups the points by region and
+  allocates every group with its own spatial tree and set cover models.
+  Points outside every region form one more group. Small requests are
+  allocated in-process, on threads so the event loop is never blocked.
+  From PARALLEL_THRESHOLD points on, regions are allocated concurrently
+  on the solver process pool, except in profiled requests. Either way,
+  regions are yielded as they finish.
+
+  Args:
+    latitudes: Array of point latitudes.
+    longitudes: Array of point longitudes, same length as latitudes.
+    region_ids: Region id of every point, -1 outside every region, as
+      returned by RegionIndex.lookup. None to allocate all points
+      together.
+
+  Yields:
+    Tuple of (region_id, allocation, seconds), where allocation lists
+    (center_idx, point_indices) tuples indexing the given arrays and
+    seconds is the time allocating the region took. Region id and
+    seconds are None when allocating all points together.
+  """
+  if len(latitudes) == 0:
+    return
+
+  loop = asyncio.get_running_loop()
+
+  if region_ids is None:
+    components = allocate(latitudes, longitudes)
+    while allocations := await loop.run_in_executor(
+      None, next_components, components, STREAM_INTERVAL
+    ):
+      for allocation in allocations:
+        yield None, allocation, None
+    return
+
+  partitions = split_partitions(region_ids)
+  # The profiler cannot see into the solver pool's processes.
+  parallel = (
+    len(latitudes) >= PARALLEL_THRESHOLD
+    and len(partitions) > 1
+    and not profiled.get()
+  )
+
+  async def solve(region_id: int, indices: np.ndarray):
+    args = (latitudes[indices], longitudes[indices])
+    result = await loop.run_in_executor(
+      get_executor() if parallel else None, allocate_partition, *args
+    )
+    return region_id, indices, result
+
+  for solved in asyncio.as_completed(
+    [solve(region_id, indices) for region_id, indices in partitions]
+  ):
+    region_id, indices, (allocation, seconds) = await solved
+    indices = indices.tolist()
+    allocation = [
+      (indices[center_idx], [indices[idx] for idx in point_indices])
+      for center_idx, point_indices in allocation
+    ]
+    yield region_id, allocation, seconds
+
+
+def next_components(
+  components: Iterator[list[tuple[int, list[int]]]],
+  seconds: float,
+) -> list[list[tuple[int, list[int]]]]:
+  """
+  Advances an allocation for a slice of time.
+
+  Runs on a thread, so the event loop keeps serving other requests, and
+  admission control keeps answering, while components are solved.
+
+  Args:
+    components: Iterator over the components of an allocation, as
+      returned by allocate.
+    seconds: Time after which to stop once a component is solved.
+
+  Returns:
+    Allocations of the components solved, at least one unless the
+    allocation is complete.
+  """
+  allocations = []
+  deadline = time.perf_counter() + seconds
+  for allocation in components:
+    allocations.append(allocation)
+    if time.perf_counter() >= deadline:
+      break
+  return allocations
+
+
+def allocate_partition(
+  latitudes: np.ndarray,
+  longitudes: np.ndarray,
+) -> tuple[list[tuple[int, list[int]]], float]:
+  """
+  Allocates the points of one partition, timing the allocation.
+
+  Runs on the solver process pool, so it only takes and returns plain
+  arrays and lists.
+
+  Args:
+    latitudes: Array of point latitudes.
+    longitudes: Array of point longitudes, same length as latitudes.
+
+  Returns:
+    Tuple of (allocation, seconds), where allocation lists the
+    (center_idx, point_indices) tuples of every component as yielded by
+    allocate and seconds is the time allocation took.
+  """
+  start = time.perf_counter()
+  allocation = [
+    basket
+    for component in allocate(latitudes, longitudes)
+    for basket in component
+  ]
+  return allocation, time.perf_counter() - start
+
+
+def allocate(
+  latitudes: np.ndarray,
+  longitudes: np.ndarray,
+) -> Iterator[list[tuple[int, list[int]]]]:
+  """
+  Allocates points into baskets using OR-Tools set cover optimization.
+
+  Uses scipy.cKDTree for fast spatial queries and OR-Tools for optimal set
+  cover solution. The algorithm minimizes the number of baskets while
+  ensuring each basket has a strict radius of 0.5 km and every point is
+  assigned to exactly one basket.
+
+  The algorithm works as follows:
+  1. Build spatial tree from all points for efficient radius queries
+  2. For each point as potential center, find all points within 0.5 km
+  3. Split the points into components that share no potential basket
+  4. Use OR-Tools set cover solver to find minimum baskets per component
+  5. Create baskets from the optimal solution, handling unassigned points
+
+  Works on coordinate arrays only, so callers holding generated points
+  never need to build Order objects to allocate them.
+
+  Args:
+    latitudes: Array of point latitudes.
+    longitudes: Array of point longitudes, same length as latitudes.
+
+  Yields:
+    List of (center_idx, point_indices) tuples for one component, where
+    center_idx is the index of the basket's center point and
+    point_indices the indices of the points assigned to it.
+  """
+  if len(latitudes) == 0:
+    return
+
+  coordinates = np.column_stack((latitudes, longitudes))
+  tree = cKDTree(coordinates)
+  potential_baskets = query_radius_points(tree, coordinates, RADIUS)
+
+  for component in split_components(potential_baskets):
+    selected_baskets = solve_set_cover(potential_baskets, component)
+    yield assign_baskets(potential_baskets, component, selected_baskets)
+
+
+async def warm_up():
+  """
+  Runs a tiny request through every stage of basket allocation.
+
+  Parses and allocates WARM_UP_ORDERS, building a spatial tree and a set
+  cover solver, and serializes the baskets through their compiled model.
+  Then starts every process of the solver pool with one allocation each,
+  so that the processes have imported the solver before the first large
+  partitioned request needs them. The pool has pool_size processes, the
+  worker's share of the CPUs.
+  """
+  body, latitudes, longitudes = parse_request({"orders": WARM_UP_ORDERS})
+  baskets, _ = await create_payloads(body, latitudes, longitudes)
+  type_adapter(list[Basket]).dump_json(
+    type_adapter(list[Basket]).validate_python(baskets)
+  )
+
+  loop = asyncio.get_running_loop()
+  await asyncio.gather(
+    *(
+      loop.run_in_executor(
+        get_executor(), allocate_partition, latitudes, longitudes
       )
-      baskets.append(basket)
+      for _ in range(pool_size())
+    )
+  )
+
+
+def get_executor() -> ProcessPoolExecutor:
+  """
+  Returns the solver process pool used for partitioned allocation.
+
+  The pool is created on first use, see create_executor.
+
+  Returns:
+    The shared ProcessPoolExecutor.
+  """
+  global executor
+
+  if executor is None:
+    executor = create_executor()
+
+  return executor
+
+
+def shutdown_executor():
+  """
+  Shuts down the solver process pool, if it was started.
+  """
+  global executor
 
-  return baskets
+  if executor is not None:
+    executor.shutdown(cancel_futures=True)
+    executor = None
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseModel, ConfigDict, Field, RootModel
 from sanic_ext import openapi
@@ -14,6 +14,11 @@ class Basket(BaseModel):
   longitude: float
   radius: float
   orders: list[Order]
+  district: str | None = Field(
+    default=None,
+    exclude_if=lambda district: district is None,
+    description="Name of the region the center falls in, if requested",
+  )
 
   @classmethod
   def json(cls) -> dict[str, Any]:
@@ -31,6 +36,64 @@ class BasketsCreate(BaseModel):
   model_config = ConfigDict(from_attributes=True)
 
   orders: list[Order] = Field(description="List of orders")
+  districts: bool = Field(
+    default=False,
+    description="Tag every basket and order with the region it falls in",
+  )
+  partition: Literal["district"] | None = Field(
+    default=None,
+    description="Allocate every district separately, so that no basket "
+    "crosses a district border",
+  )
+
+  @classmethod
+  def json(cls) -> dict[str, Any]:
+    return cls.model_json_schema(ref_template="#/components/schemas/{model}")
+
+
+@openapi.component(name="Partition")
+class Partition(BaseModel):
+  model_config = ConfigDict(from_attributes=True)
+
+  district: str | None = Field(
+    description="Name of the district, null for orders outside all districts",
+  )
+  orders: int = Field(description="Number of orders in the district")
+  baskets: int = Field(description="Number of baskets allocated")
+  seconds: float = Field(description="Time spent allocating the district")
+
+  @classmethod
+  def json(cls) -> dict[str, Any]:
+    return cls.model_json_schema(ref_template="#/components/schemas/{model}")
+
+
+@openapi.component(name="PartitionedBaskets")
+class PartitionedBaskets(BaseModel):
+  model_config = ConfigDict(from_attributes=True)
+
+  baskets: list[Basket]
+  partitions: list[Partition]
+
+  @classmethod
+  def json(cls) -> dict[str, Any]:
+    return cls.model_json_schema(ref_template="#/components/schemas/{model}")
+
+
+@openapi.component(name="AdmissionState")
+class AdmissionState(BaseModel):
+  model_config = ConfigDict(from_attributes=True)
+
+  running: int = Field(description="Number of requests being allocated")
+  running_cost: int = Field(description="Cost of the running requests")
+  waiting: int = Field(description="Number of requests waiting to run")
+  waiting_cost: int = Field(description="Cost of the waiting requests")
+  capacity: int = Field(description="Cost allowed to run at once")
+  budget: int = Field(description="Cost allowed to wait")
+  admitted: int = Field(description="Number of requests admitted")
+  rejected: int = Field(description="Number of requests rejected")
+  throughput: float = Field(
+    description="Measured cost allocated per second",
+  )
 
   @classmethod
   def json(cls) -> dict[str, Any]:
@@ -1,4 +1,8 @@
+import numpy as np
 from geopy.distance import geodesic
+from ortools.linear_solver import pywraplp
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
 from scipy.spatial import cKDTree
 
 from ..order.type import Order
@@ -95,3 +99,327 @@ def query_radius_tree(
       valid_indices.append(idx)
 
   return valid_indices
+
+
+def query_radius_points(
+  tree: cKDTree,
+  coordinates: np.ndarray,
+  radius: float,
+) -> list[list[int]]:
+  """
+  Finds, for every point, the points within radius, validated with Haversine.
+
+  Batched counterpart of query_radius_tree: candidates for all centers are
+  fetched from the tree in a single call, then each candidate is validated
+  with calculate_distance exactly as query_radius_tree does.
+
+  Args:
+    tree: cKDTree spatial index built from coordinates.
+    coordinates: Array of shape (n, 2) holding (latitude, longitude) rows,
+      the points used to build the tree.
+    radius: Search radius in kilometers.
+
+  Returns:
+    List where the i-th entry holds the indices of the points within the
+    radius of point i (inclusive of boundary), including i, in the order
+    the tree returns them, as query_radius_tree does.
+  """
+  radius_deg = radius / 111.0
+  candidates = tree.query_ball_point(
+    coordinates, radius_deg, return_sorted=False, workers=-1
+  )
+
+  points = [tuple(point) for point in coordinates.tolist()]
+  potential_baskets = []
+  for center_idx, candidate_indices in enumerate(candidates):
+    center = points[center_idx]
+    potential_baskets.append(
+      [
+        idx
+        for idx in candidate_indices
+        if calculate_distance(center, points[idx]) <= radius + 1e-9
+      ]
+    )
+
+  return potential_baskets
+
+
+def count_candidate_pairs(
+  latitudes: np.ndarray,
+  longitudes: np.ndarray,
+  radius: float,
+) -> int:
+  """
+  Counts the (center, order) pairs allocating the points would consider.
+
+  Runs the tree query of query_radius_points without computing exact
+  distances, so it is a fraction of the cost of allocating the points,
+  which grows with the number of candidate pairs rather than of points.
+
+  Args:
+    latitudes: Array of point latitudes.
+    longitudes: Array of point longitudes, same length as latitudes.
+    radius: Search radius in kilometers.
+
+  Returns:
+    Number of candidate pairs, at least the number of points since every
+    point is a candidate of its own basket.
+  """
+  if len(latitudes) == 0:
+    return 0
+
+  coordinates = np.column_stack((latitudes, longitudes))
+  tree = cKDTree(coordinates)
+  counts = tree.query_ball_point(
+    coordinates, radius / 111.0, return_length=True, workers=-1
+  )
+  return int(counts.sum())
+
+
+def split_components(potential_baskets: list[list[int]]) -> list[list[int]]:
+  """
+  Splits the candidate baskets into independent set cover subproblems.
+
+  Two orders belong to the same component when one lies within the radius
+  of the other. Orders in different components never share a candidate
+  basket, so each component can be solved on its own and the union of the
+  component optima is an optimum of the whole problem.
+
+  Args:
+    potential_baskets: Candidate baskets where potential_baskets[i] holds
+      the indices of the orders within radius of order i.
+
+  Returns:
+    List of components, each a sorted list of order indices. Components
+    are ordered by their smallest order index so the output is
+    deterministic.
+  """
+  num_orders = len(potential_baskets)
+  if num_orders == 0:
+    return []
+
+  rows = np.repeat(
+    np.arange(num_orders),
+    [len(members) for members in potential_baskets],
+  )
+  cols = np.fromiter(
+    (idx for members in potential_baskets for idx in members),
+    dtype=np.intp,
+    count=len(rows),
+  )
+  graph = coo_matrix(
+    (np.ones(len(rows), dtype=np.int8), (rows, cols)),
+    shape=(num_orders, num_orders),
+  )
+  _, labels = connected_components(graph, directed=False)
+
+  components: dict[int, list[int]] = {}
+  for order_idx, label in enumerate(labels.tolist()):
+    components.setdefault(label, []).append(order_idx)
+
+  return list(components.values())
+
+
+def solve_set_cover(
+  potential_baskets: list[list[int]],
+  component: list[int],
+) -> list[int]:
+  """
+  Selects the minimum number of candidate baskets covering a component.
+
+  Builds a set cover model over the candidate baskets centered on the
+  component's orders and solves it with OR-Tools. Trivial components are
+  answered without building a model: a single order is its own basket and
+  a candidate covering the whole component is optimal by definition.
+
+  Args:
+    potential_baskets: Candidate baskets where potential_baskets[i] holds
+      the indices of the orders within radius of order i.
+    component: Sorted order indices of one component, as returned by
+      split_components.
+
+  Returns:
+    Sorted list of order indices whose candidate baskets were selected.
+    Every order in the component is covered by at least one of them.
+
+  Note:
+    Uses CBC solver if available, otherwise falls back to SAT solver.
+    If the solver fails, candidates are picked greedily in index order
+    until every order is covered.
+  """
+  if len(component) == 1:
+    return component
+
+  for basket_idx in component:
+    if len(potential_baskets[basket_idx]) == len(component):
+      return [basket_idx]
+
+  solver = pywraplp.Solver.CreateSolver("CBC")
+  if not solver:
+    solver = pywraplp.Solver.CreateSolver("SAT")
+
+  x = {i: solver.IntVar(0, 1, f"basket_{i}") for i in component}
+
+  covering_baskets: dict[int, list[int]] = {i: [] for i in component}
+  for basket_idx in component:
+    for order_idx in potential_baskets[basket_idx]:
+      covering_baskets[order_idx].append(basket_idx)
+
+  for order_idx in component:
+    solver.Add(sum(x[i] for i in covering_baskets[order_idx]) >= 1)
+
+  solver.Minimize(sum(x.values()))
+
+  status = solver.Solve()
+
+  if status == pywraplp.Solver.OPTIMAL or status == pywraplp.Solver.FEASIBLE:
+    return [i for i in component if x[i].solution_value() > 0.5]
+
+  selected_baskets = []
+  uncovered = set(component)
+  for i in component:
+    if uncovered and any(idx in uncovered for idx in potential_baskets[i]):
+      selected_baskets.append(i)
+      uncovered -= set(potential_baskets[i])
+
+  return selected_baskets
+
+
+def assign_baskets(
+  potential_baskets: list[list[int]],
+  component: list[int],
+  selected_baskets: list[int],
+) -> list[tuple[int, list[int]]]:
+  """
+  Assigns every order of a component to exactly one selected basket.
+
+  Walks the selected baskets in index order and gives each one the orders
+  within its radius that no earlier basket took. Orders left uncovered,
+  which only happens if the solver failed, get a basket of their own.
+
+  Args:
+    potential_baskets: Candidate baskets where potential_baskets[i] holds
+      the indices of the orders within radius of order i.
+    component: Sorted order indices of one component.
+    selected_baskets: Sorted order indices whose candidate baskets were
+      selected, as returned by solve_set_cover.
+
+  Returns:
+    List of (center_idx, order_indices) tuples, one per non-empty basket.
+  """
+  assigned_orders = set()
+  baskets = []
+
+  for basket_idx in selected_baskets:
+    unassigned_indices = [
+      idx for idx in potential_baskets[basket_idx] if idx not in assigned_orders
+    ]
+    if unassigned_indices:
+      assigned_orders.update(unassigned_indices)
+      baskets.append((basket_idx, unassigned_indices))
+
+  for order_idx in component:
+    if order_idx not in assigned_orders:
+      baskets.append((order_idx, [order_idx]))
+
+  return baskets
+
+
+def split_partitions(region_ids: np.ndarray) -> list[tuple[int, np.ndarray]]:
+  """
+  Groups orders by the region they fall in.
+
+  Args:
+    region_ids: Region id of every order, -1 for orders outside every
+      region, as returned by RegionIndex.lookup.
+
+  Returns:
+    List of (region_id, order_indices) tuples, one per region holding
+    orders, in region id order with the orders outside every region
+    last. Order indices are sorted.
+  """
+  order = np.argsort(region_ids, kind="stable")
+  ids, starts = np.unique(region_ids[order], return_index=True)
+  partitions = list(zip(ids.tolist(), np.split(order, starts[1:])))
+  return sorted(partitions, key=lambda partition: partition[0] < 0)
+
+
+def order_payloads(
+  latitudes: np.ndarray,
+  longitudes: np.ndarray,
+  districts: list[str | None] | None = None,
+) -> list[dict]:
+  """
+  Lays out coordinate arrays as JSON orders.
+
+  Builds plain dicts in the layout Order serializes to.
+
+  Args:
+    latitudes: Array of order latitudes.
+    longitudes: Array of order longitudes.
+    districts: District of every order, to tag the orders with. Orders
+      are left untagged if None.
+
+  Returns:
+    One dict per order. District keys are omitted where the district is
+    None, as Order omits them.
+  """
+  lats = latitudes.tolist()
+  lons = longitudes.tolist()
+
+  if districts is None:
+    return [{"latitude": lat, "longitude": lon} for lat, lon in zip(lats, lons)]
+
+  return [
+    {"latitude": lat, "longitude": lon}
+    if district is None
+    else {"latitude": lat, "longitude": lon, "district": district}
+    for lat, lon, district in zip(lats, lons, districts)
+  ]
+
+
+def basket_payloads(
+  latitudes: np.ndarray,
+  longitudes: np.ndarray,
+  radius: float,
+  allocation: list[tuple[int, list[int]]],
+  districts: list[str | None] | None = None,
+  order_districts: list[str | None] | None = None,
+) -> list[dict]:
+  """
+  Lays out an allocation over coordinate arrays as JSON baskets.
+
+  Builds plain dicts in the layout Basket serializes to, so responses
+  can be encoded without building a model per order.
+
+  Args:
+    latitudes: Array of order latitudes.
+    longitudes: Array of order longitudes.
+    radius: Radius of every basket, in kilometers.
+    allocation: List of (center_idx, order_indices) tuples.
+    districts: District of every order, to tag baskets with the district
+      of their center. Baskets are left untagged if None.
+    order_districts: District of every order, to tag the orders with.
+      Orders are left untagged if None.
+
+  Returns:
+    One dict per allocation entry. District keys are omitted where the
+    district is None, as Basket and Order omit them.
+  """
+  lats = latitudes.tolist()
+  lons = longitudes.tolist()
+  orders = order_payloads(latitudes, longitudes, order_districts)
+
+  baskets = []
+  for center_idx, order_indices in allocation:
+    basket = {
+      "latitude": lats[center_idx],
+      "longitude": lons[center_idx],
+      "radius": radius,
+      "orders": [orders[idx] for idx in order_indices],
+    }
+    if districts is not None and districts[center_idx] is not None:
+      basket["district"] = districts[center_idx]
+    baskets.append(basket)
+
+  return baskets
@@ -1,3 +1,4 @@
+import os
 import sys
 
 from sanic import Sanic
@@ -16,6 +17,22 @@ class Config:
   FALLBACK_ERROR_FORMAT = "json"
   OAS_URL_PREFIX = "/api/docs"
 
+  # Size of the basket result cache shared by all workers, in bytes.
+  BASKET_CACHE_SIZE = 64 * 1024 * 1024
+  # Admission control of basket requests, in candidate pairs: the cost of
+  # the allocations a worker runs at once, and of those it queues.
+  BASKET_ADMISSION_CAPACITY = 50_000
+  BASKET_ADMISSION_BUDGET = 200_000
+  # Response compression: level of every content coding, in order of
+  # preference, the smallest body to compress and the smallest body to
+  # compress on a thread, in bytes.
+  COMPRESSION_LEVELS = {"zstd": 1, "br": 1, "gzip": 6}
+  COMPRESSION_THRESHOLD = 1_024
+  COMPRESSION_OFFLOAD_THRESHOLD = 64 * 1_024
+  # Directory to write request profiles to. Requests sending X-Profile
+  # are profiled only if set; otherwise profiling costs nothing.
+  PROFILE_DIR = os.environ.get("PROFILE_DIR")
+
   def __init__(self, app: Sanic):
     app.update_config(Config)
 
@@ -31,6 +48,7 @@ class Config:
           "allow_headers": [
             "Content-Type",
             "X-Instance-Id",
+            "X-Profile",
             "Authorization",
             "Accept",
             "Origin",
@@ -43,6 +61,7 @@ class Config:
           "expose_headers": [
             "Content-Type",
             "X-Instance-Id",
+            "X-Profile",
             "Content-Length",
             "Content-Range",
             "X-Total-Count",
@@ -0,0 +1,321 @@
+import asyncio
+import gzip
+import hashlib
+from dataclasses import dataclass
+from typing import Iterable
+
+from sanic import HTTPResponse, Request, raw
+
+from .config import Config
+
+try:
+  import brotli
+except ImportError:  # pragma: no cover
+  brotli = None
+
+try:
+  import zstandard
+except ImportError:  # pragma: no cover
+  zstandard = None
+
+IDENTITY = "identity"
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 9
+ZSTD_LEVEL = 12
+
+# Content codings to offer, in order of preference, which decides between
+# codings a request accepts equally. Set from the app's
+# COMPRESSION_LEVELS, see set_preference.
+preference: tuple[str, ...] = tuple(Config.COMPRESSION_LEVELS)
+
+
+def available_encodings() -> list[str]:
+  """
+  Returns the content codings this process offers.
+
+  Returns:
+    Coding names in the order of preference, identity last. Brotli and
+    zstd are only available if the optional brotli and zstandard
+    packages are installed.
+  """
+  producible = {"gzip"}
+  if zstandard is not None:
+    producible.add("zstd")
+  if brotli is not None:
+    producible.add("br")
+  return [encoding for encoding in preference if encoding in producible] + [
+    IDENTITY
+  ]
+
+
+def set_preference(encodings: Iterable[str]):
+  """
+  Sets the content codings to offer from now on.
+
+  Args:
+    encodings: Coding names in order of preference, such as the keys of
+      COMPRESSION_LEVELS.
+  """
+  global preference
+
+  preference = tuple(encodings)
+
+
+def compress(body: bytes, encoding: str, level: int | None = None) -> bytes:
+  """
+  Compresses a body with a content coding.
+
+  Args:
+    body: Bytes to compress.
+    encoding: One of available_encodings.
+    level: Compression level, or brotli quality, of the coding. Defaults
+      to GZIP_LEVEL, BROTLI_QUALITY or ZSTD_LEVEL.
+
+  Returns:
+    The encoded bytes. Gzip output carries no timestamp, so equal bodies
+    always encode to equal bytes.
+  """
+  if encoding == "br":
+    quality = BROTLI_QUALITY if level is None else level
+    return brotli.compress(body, quality=quality)
+  if encoding == "zstd":
+    return zstandard.compress(body, ZSTD_LEVEL if level is None else level)
+  if encoding == "gzip":
+    return gzip.compress(body, GZIP_LEVEL if level is None else level, mtime=0)
+  return body
+
+
+def negotiate_encoding(header: str | None, encodings: Iterable[str]) -> str:
+  """
+  Picks the content coding for a response from an Accept-Encoding header.
+
+  Args:
+    header: Value of the request's Accept-Encoding header, or None if
+      the request has none.
+    encodings: Codings the response is available in, in order of
+      preference. Ties between equal quality values go to the earlier
+      coding.
+
+  Returns:
+    The acceptable coding with the highest quality value, or identity if
+    no other coding is acceptable.
+  """
+  if not header:
+    return IDENTITY
+
+  qualities = {}
+  for item in header.split(","):
+    coding, *params = (part.strip() for part in item.split(";"))
+    quality = 1.0
+    for param in params:
+      name, _, value = param.partition("=")
+      if name.strip().lower() == "q":
+        try:
+          quality = float(value)
+        except ValueError:
+          quality = 0.0
+    if coding:
+      qualities[coding.lower()] = quality
+
+  # Identity stays acceptable unless refused by name or through *;q=0.
+  default = qualities.get("*", 0.0)
+  if IDENTITY not in qualities:
+    qualities[IDENTITY] = 0.0 if qualities.get("*") == 0 else 1.0
+
+  best, best_quality = IDENTITY, 0.0
+  for encoding in encodings:
+    quality = qualities.get(encoding, default)
+    if quality > best_quality:
+      best, best_quality = encoding, quality
+
+  return best
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+  """
+  Tests an If-None-Match header against an entity tag.
+
+  Uses the weak comparison RFC 9110 prescribes for If-None-Match.
+
+  Args:
+    header: Value of the request's If-None-Match header, or None.
+    etag: Quoted entity tag of the current representation.
+
+  Returns:
+    True if the header is * or lists the entity tag.
+  """
+  if not header:
+    return False
+  if header.strip() == "*":
+    return True
+
+  tags = (tag.strip().removeprefix("W/") for tag in header.split(","))
+  return etag.removeprefix("W/") in tags
+
+
+@dataclass(frozen=True)
+class StaticBody:
+  """
+  Response body serialized once, stored with its compressed variants.
+
+  Attributes:
+    content_type: Media type of the body.
+    variants: Body bytes by content coding, identity included.
+    digest: Digest of the identity body, the base of every entity tag.
+  """
+
+  content_type: str
+  variants: dict[str, bytes]
+  digest: str
+
+  @classmethod
+  def build(cls, body: bytes, content_type: str) -> "StaticBody":
+    """
+    Compresses a body with every available content coding.
+
+    Args:
+      body: Serialized response body.
+      content_type: Media type of the body.
+
+    Returns:
+      StaticBody holding the body in every available coding.
+    """
+    return cls(
+      content_type=content_type,
+      variants={
+        encoding: compress(body, encoding) for encoding in available_encodings()
+      },
+      digest=hashlib.blake2b(body, digest_size=16).hexdigest(),
+    )
+
+  def etag(self, encoding: str) -> str:
+    """
+    Returns the strong entity tag of one variant.
+
+    Args:
+      encoding: Content coding of the variant.
+
+    Returns:
+      Quoted entity tag. Variants differ in bytes, so each coding gets
+      its own tag.
+    """
+    if encoding == IDENTITY:
+      return f'"{self.digest}"'
+    return f'"{self.digest}-{encoding}"'
+
+  def respond(self, request: Request, cache_control: str) -> HTTPResponse:
+    """
+    Serves the variant the request accepts best.
+
+    Args:
+      request: Request to respond to. Its Accept-Encoding header picks
+        the variant and its If-None-Match header may turn the response
+        into a 304.
+      cache_control: Value of the Cache-Control header.
+
+    Returns:
+      200 response with the chosen variant, or 304 without a body if the
+      client already holds it.
+    """
+    encoding = negotiate_encoding(
+      request.headers.get("accept-encoding"), self.variants
+    )
+    headers = {
+      "ETag": self.etag(encoding),
+      "Cache-Control": cache_control,
+      "Vary": "Accept-Encoding",
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+      return HTTPResponse(status=304, headers=headers)
+
+    if encoding != IDENTITY:
+      headers["Content-Encoding"] = encoding
+
+    return raw(
+      self.variants[encoding],
+      content_type=self.content_type,
+      headers=headers,
+    )
+
+
+class ResponseCompressor:
+  """
+  Compresses response bodies in the coding the request accepts best.
+
+  Registered as response middleware. Compresses bodies of compressible
+  media types from a size threshold on, and leaves alone responses that
+  already carry a Content-Encoding or an ETag, whose producer manages
+  their variants, and streamed responses, whose body is not known yet.
+  Bodies too large to compress without stalling other requests are
+  compressed on a thread.
+
+  Args:
+    levels: Compression level of every coding to offer, in order of
+      preference. Codings that are not available are left out.
+    threshold: Smallest body to compress, in bytes. Smaller bodies gain
+      too little to be worth it.
+    offload_threshold: Smallest body to compress on a thread.
+  """
+
+  MEDIA_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+  def __init__(
+    self,
+    levels: dict[str, int],
+    threshold: int = 1_024,
+    offload_threshold: int = 64 * 1_024,
+  ):
+    available = available_encodings()
+    self.levels = {
+      encoding: level
+      for encoding, level in levels.items()
+      if encoding in available and encoding != IDENTITY
+    }
+    self.threshold = threshold
+    self.offload_threshold = offload_threshold
+
+  async def __call__(self, request: Request, response: HTTPResponse):
+    """
+    Compresses the body of a response, if worth it.
+
+    Args:
+      request: Request responded to. Its Accept-Encoding header picks
+        the coding.
+      response: Response to compress in place.
+    """
+    body = response.body
+    headers = response.headers
+    if (
+      not body
+      or "content-encoding" in headers
+      or "etag" in headers
+      or not (response.content_type or "").startswith(self.MEDIA_TYPES)
+    ):
+      return
+
+    vary = headers.get("vary")
+    if vary is None:
+      headers["vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+      headers["vary"] = f"{vary}, Accept-Encoding"
+
+    if len(body) < self.threshold:
+      return
+
+    encoding = negotiate_encoding(
+      request.headers.get("accept-encoding"), self.levels
+    )
+    if encoding == IDENTITY:
+      return
+
+    level = self.levels[encoding]
+    if len(body) >= self.offload_threshold:
+      body = await asyncio.get_running_loop().run_in_executor(
+        None, compress, body, encoding, level
+      )
+    else:
+      body = compress(body, encoding, level)
+
+    response.body = body
+    headers["content-encoding"] = encoding
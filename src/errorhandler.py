@@ -2,6 +2,7 @@ from typing import Any, Dict, Tuple
 
 from pydantic import ValidationError
 from sanic import json
+from sanic.errorpages import JSONRenderer, exception_response
 from sanic.handlers import ErrorHandler
 
 
@@ -14,6 +15,19 @@ class ErrorHandler(ErrorHandler):
         response_data, status_code = handler(exception)
         return json(response_data, status=status_code)
 
+    # Sanic only honours a route's error format if the client accepts it,
+    # so streaming routes would otherwise report errors as text.
+    if request.route and request.route.extra.error_format == "json":
+      self.log(request, exception)
+      return exception_response(
+        request,
+        exception,
+        debug=self.debug,
+        base=self.base,
+        fallback=request.app.config.FALLBACK_ERROR_FORMAT,
+        renderer=JSONRenderer,
+      )
+
     return super().default(request, exception)
 
 
@@ -23,13 +37,15 @@ def handle_validation_error(
   errors = []
 
   for error in exception.errors():
-    errors.append(
-      {
-        "field": error["loc"][-1],
-        "message": error["msg"],
-        "type": error["type"],
-      }
-    )
+    item = {
+      "field": error["loc"][-1],
+      "message": error["msg"],
+      "type": error["type"],
+    }
+    indices = [part for part in error["loc"] if isinstance(part, int)]
+    if indices:
+      item["index"] = indices[-1]
+    errors.append(item)
 
   return {
     "status": "error",
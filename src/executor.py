@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Number of processes of every pool created in this process, one per CPU
+# if None. Set per Sanic worker, so that workers share the CPUs.
+processes: int | None = None
+
+
+def create_executor() -> ProcessPoolExecutor:
+  """
+  Creates a process pool usable from within a Sanic worker.
+
+  The pool has pool_size processes. Processes are spawned rather than
+  forked, so they do not inherit the server's event loop or threads.
+
+  Sanic runs its workers as daemonic processes, which multiprocessing
+  does not allow to start children. The current process is marked as
+  non-daemonic first; the flag only affects this check in the worker
+  itself, and pools are shut down by the server's after_server_stop
+  listeners rather than relying on daemonic cleanup.
+
+  Returns:
+    A new ProcessPoolExecutor.
+  """
+  process = multiprocessing.current_process()
+  if process.daemon:
+    process.daemon = False
+
+  return ProcessPoolExecutor(
+    max_workers=pool_size(),
+    mp_context=multiprocessing.get_context("spawn"),
+  )
+
+
+def pool_size() -> int:
+  """
+  Returns the number of processes of the pools created in this process.
+
+  Returns:
+    The number set by set_processes, or the CPU count if none was set.
+  """
+  return processes or os.cpu_count() or 1
+
+
+def set_processes(count: int | None):
+  """
+  Sets the number of processes of the pools created from now on.
+
+  Args:
+    count: Number of processes, at least 1, or None for one per CPU.
+  """
+  global processes
+
+  processes = None if count is None else max(1, count)
+
+
+def worker_processes(workers: int) -> int:
+  """
+  Splits the CPUs between the pools of every Sanic worker.
+
+  Args:
+    workers: Number of Sanic workers.
+
+  Returns:
+    Number of pool processes per worker, at least 1, so that all workers
+    together start about one process per CPU.
+  """
+  return max(1, (os.cpu_count() or 1) // max(1, workers))
@@ -0,0 +1,23 @@
+from sanic import Blueprint, HTTPResponse, Request
+from sanic_ext import openapi
+
+from ..serialization import typed_json
+from . import service
+from .type import Readiness
+
+route = Blueprint("health", url_prefix="/health")
+
+
+@route.get("/ready")
+@openapi.response(200, {"application/json": Readiness.json()})
+@openapi.response(503, {"application/json": Readiness.json()})
+async def get_readiness(request: Request) -> HTTPResponse:
+  """
+  Get readiness
+
+  Responds with 503 until the worker has warmed up and again once it
+  starts shutting down, so load balancers only route to warm workers.
+  Workers warm up in the background once they accept connections.
+  """
+  readiness = service.get_readiness()
+  return typed_json(readiness, status=200 if readiness.ready else 503)
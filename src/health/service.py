@@ -0,0 +1,49 @@
+import time
+
+from sanic.log import logger
+
+from ..basket import service as basket_service
+from .type import Readiness
+
+ready = False
+warm_up_seconds: float | None = None
+
+
+async def warm_up():
+  """
+  Warms up the worker, then marks it ready.
+
+  Runs a tiny request through basket allocation, see
+  basket_service.warm_up, so the first real request does not pay for
+  building the solver and starting the solver pool. Runs as a task once
+  the worker serves, so readiness can be polled meanwhile.
+  """
+  global warm_up_seconds
+
+  start = time.perf_counter()
+  await basket_service.warm_up()
+  warm_up_seconds = time.perf_counter() - start
+  logger.info(f"Warmed up in {warm_up_seconds:.2f}s")
+  set_ready(True)
+
+
+def set_ready(value: bool):
+  """
+  Sets whether the worker is ready to serve requests.
+
+  Args:
+    value: True once warmed up, False while shutting down.
+  """
+  global ready
+
+  ready = value
+
+
+def get_readiness() -> Readiness:
+  """
+  Reports whether the worker is ready to serve requests.
+
+  Returns:
+    Readiness holding the ready flag and the time warm-up took.
+  """
+  return Readiness(ready=ready, warm_up=warm_up_seconds)
@@ -0,0 +1,18 @@
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, Field
+from sanic_ext import openapi
+
+
+@openapi.component(name="Readiness")
+class Readiness(BaseModel):
+  model_config = ConfigDict(from_attributes=True)
+
+  ready: bool = Field(description="Whether the worker serves requests")
+  warm_up: float | None = Field(
+    description="Seconds warm-up took, None until it finished",
+  )
+
+  @classmethod
+  def json(cls) -> dict[str, Any]:
+    return cls.model_json_schema(ref_template="#/components/schemas/{model}")
@@ -1,20 +1,41 @@
-from sanic import Blueprint, Sanic
+import multiprocessing
+import os
 
+from sanic import Blueprint, HTTPResponse, Request, Sanic
+from sanic.signals import Event
+
+from .basket import service as basket_service
+from .basket.admission import AdmissionQueue
 from .basket.route import route as basket_route
 from .config import Config
+from .encoding import ResponseCompressor, set_preference
 from .errorhandler import ErrorHandler
+from .executor import set_processes, worker_processes
+from .health import service as health_service
+from .health.route import route as health_route
+from .order import service as order_service
 from .order.route import route as order_route
+from .pipeline.route import route as pipeline_route
+from .profiling import PROFILE_HEADER, RequestProfiler
+from .region import service as region_service
 from .region.route import route as region_route
+from .serialization import dumps, loads
+from .shared import SharedCache, attach_array, share_array
 
 
 def create_app():
   app = Sanic(
     "basket-optimizer",
     error_handler=ErrorHandler(),
+    dumps=dumps,
+    loads=loads,
   )
 
   with_config(app)
   with_routes(app)
+  with_listeners(app)
+  with_compression(app)
+  with_profiling(app)
 
   return app
 
@@ -27,8 +48,132 @@ def with_routes(app: Sanic):
   app.blueprint(
     Blueprint.group(
       basket_route,
+      health_route,
       order_route,
+      pipeline_route,
       region_route,
       url_prefix="/api",
     ),
   )
+
+
+def with_listeners(app: Sanic):
+  @app.main_process_start
+  async def share_state(app: Sanic):
+    # Compiles the region store once, before workers map it, and shares
+    # the index grid and basket cache instead of one copy per worker.
+    registry = region_service.load_registry(
+      region_service.REGIONS_PATH,
+      region_service.REGIONS_STORE_PATH,
+    )
+    app.shared_ctx.region_grid = share_array(registry.index.grid)
+
+    cache = SharedCache.create(
+      multiprocessing.Lock(), app.config.BASKET_CACHE_SIZE
+    )
+    app.shared_ctx.basket_cache = cache.memory
+    app.shared_ctx.basket_cache_lock = cache.lock
+
+    # Workers only see their own process, so the main process splits the
+    # CPUs between their pools.
+    app.shared_ctx.pool_processes = multiprocessing.Value(
+      "i", worker_processes(app.state.workers)
+    )
+
+  @app.main_process_stop
+  async def release_state(app: Sanic):
+    for name in ("region_grid", "basket_cache"):
+      memory = getattr(app.shared_ctx, name, None)
+      if memory is not None:
+        memory.close()
+        memory.unlink()
+
+  @app.before_server_start
+  async def load_registries(app: Sanic):
+    registry = region_service.load_registry(
+      region_service.REGIONS_PATH,
+      region_service.REGIONS_STORE_PATH,
+    )
+    grid = getattr(app.shared_ctx, "region_grid", None)
+    if grid is not None:
+      registry.attach_index(attach_array(grid))
+    else:
+      # No shared grid, so this worker rasterizes its own before serving.
+      registry.index
+    region_service.build_regions_bodies()
+
+    memory = getattr(app.shared_ctx, "basket_cache", None)
+    if memory is not None:
+      basket_service.set_cache(
+        SharedCache(memory, app.shared_ctx.basket_cache_lock)
+      )
+
+  @app.before_server_start
+  async def admit_baskets(app: Sanic):
+    basket_service.set_admission(
+      AdmissionQueue(
+        app.config.BASKET_ADMISSION_CAPACITY,
+        app.config.BASKET_ADMISSION_BUDGET,
+      )
+    )
+
+  @app.before_server_start
+  async def size_pools(app: Sanic):
+    processes = getattr(app.shared_ctx, "pool_processes", None)
+    if processes is not None:
+      set_processes(processes.value)
+
+  @app.after_server_start
+  async def warm_up(app: Sanic):
+    # Warms up while serving, so the readiness endpoint answers 503 until
+    # warm-up is done.
+    app.add_task(health_service.warm_up(), name="warm_up")
+
+  @app.before_server_stop
+  async def drain(*_):
+    health_service.set_ready(False)
+
+  @app.after_server_stop
+  async def shutdown_executors(*_):
+    basket_service.set_cache(None)
+    basket_service.shutdown_executor()
+    order_service.shutdown_executor()
+
+
+def with_compression(app: Sanic):
+  set_preference(app.config.COMPRESSION_LEVELS)
+  app.on_response(
+    ResponseCompressor(
+      app.config.COMPRESSION_LEVELS,
+      app.config.COMPRESSION_THRESHOLD,
+      app.config.COMPRESSION_OFFLOAD_THRESHOLD,
+    )
+  )
+
+
+def with_profiling(app: Sanic):
+  # Nothing is registered unless profiling is configured, so requests
+  # pay nothing for it when it is off.
+  if not app.config.PROFILE_DIR:
+    return
+
+  profiler = RequestProfiler(app.config.PROFILE_DIR)
+
+  @app.signal(Event.HTTP_HANDLER_BEFORE)
+  async def start_profile(request: Request):
+    profiler.start(request)
+
+  @app.signal(Event.HTTP_HANDLER_AFTER)
+  async def stop_profile(request: Request):
+    profiler.stop(request)
+
+  @app.signal(Event.HTTP_LIFECYCLE_EXCEPTION)
+  async def stop_failed_profile(request: Request, exception: Exception):
+    if request is not None:
+      profiler.stop(request)
+
+  @app.on_response
+  async def name_profile(request: Request, response: HTTPResponse):
+    path = getattr(request.ctx, "profile", None)
+    if path is not None:
+      response.headers[PROFILE_HEADER] = os.path.basename(path)
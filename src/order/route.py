@@ -1,18 +1,68 @@
-from sanic import Blueprint, Request, json
-from sanic.response import JSONResponse
+from sanic import Blueprint, HTTPResponse, Request, exceptions
 from sanic_ext import openapi
 
+from ..serialization import typed_json
 from . import service
-from .type import OrderCreate, Orders
+from .type import Order, OrderCreate, Orders, OrderStreamCreate
+from .util import encode_binary, encode_ndjson
 
 route = Blueprint("order", url_prefix="/orders")
 
+NDJSON = "application/x-ndjson"
+BINARY = "application/octet-stream"
+
+
+@route.post("/batch", error_format="json")
+@openapi.body(
+  {
+    "application/json": OrderCreate.json(),
+    NDJSON: OrderStreamCreate.json(),
+    BINARY: OrderStreamCreate.json(),
+  }
+)
+@openapi.response(
+  201,
+  {
+    "application/json": Orders.json(),
+    NDJSON: Order.json(),
+    BINARY: {"type": "string", "format": "binary"},
+  },
+)
+async def create_orders(request: Request) -> HTTPResponse | None:
+  """
+  Create orders
+
+  Send `Accept: application/x-ndjson` to stream one order per line, or
+  `Accept: application/octet-stream` to stream little-endian float64
+  (latitude, longitude) pairs. Streamed requests may ask for up to
+  100,000,000 orders; JSON responses are limited to 10,000. Districts
+  are only available as JSON and NDJSON.
+  """
+  stream = request.accept.match(NDJSON, BINARY, accept_wildcards=False)
+
+  if stream:
+    body = OrderStreamCreate.model_validate(request.json)
+
+    if body.districts and stream == BINARY:
+      raise exceptions.BadRequest("Districts are not available in binary")
+
+    def encode(longitudes, latitudes, districts):
+      if stream == BINARY:
+        return encode_binary(longitudes, latitudes)
+      return encode_ndjson(longitudes, latitudes, districts)
+
+    # The first batch is generated before responding, so that request
+    # errors are still reported with their own status code.
+    batches = service.stream_orders(body)
+    batch = await batches.__anext__()
+
+    response = await request.respond(status=201, content_type=str(stream))
+    await response.send(encode(*batch))
+    async for batch in batches:
+      await response.send(encode(*batch))
+    await response.eof()
+    return None
 
-@route.post("/batch")
-@openapi.body({"application/json": OrderCreate.json()})
-@openapi.response(201, {"application/json": Orders.json()})
-async def create_orders(request: Request) -> JSONResponse:
-  """Create orders"""
   body = OrderCreate.model_validate(request.json)
   orders = await service.create_orders(body)
-  return json([order.model_dump() for order in orders], status=201)
+  return typed_json(orders, list[Order], status=201)
@@ -1,11 +1,34 @@
-import random
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Literal
 
+import numpy as np
 from sanic import exceptions
-from shapely import MultiPolygon, Polygon, unary_union
 
+from ..executor import create_executor, pool_size
 from ..region import service as region_service
+from ..region.registry import RegionRegistry
 from .type import Order, OrderCreate
-from .util import point_in_polygon, region_polygon
+from .util import (
+  AliasTable,
+  GeometryMissing,
+  LRUCache,
+  RegionGeometry,
+  build_region_geometry,
+  points_in_chunks,
+  sample_chunks,
+  spawn_chunks,
+)
+
+CHUNK_SIZE = 4_096
+STREAM_CHUNKS = 16
+PARALLEL_THRESHOLD = 100_000
+
+region_geometries: LRUCache[tuple[str, ...], RegionGeometry] = LRUCache(64)
+executor: ProcessPoolExecutor | None = None
+# Digests of the geometries sent to the pool. Tasks for them carry the
+# digest alone, unless the process they run on has not received it yet.
+pool_digests: set[bytes] = set()
 
 
 async def create_orders(body: OrderCreate) -> list[Order]:
@@ -13,88 +36,385 @@ async def create_orders(body: OrderCreate) -> list[Order]:
   Creates random orders within the specified geographic regions.
 
   Generates the requested number of orders by randomly placing points
-  within the union of all specified regions. For MultiPolygon regions,
-  selection is weighted by area to ensure uniform distribution.
+  within the specified regions. All points are drawn in vectorized
+  blocks, uniformly over the combined area unless per-region densities
+  are given. The regions' geometry is cached, so repeated requests skip
+  the geometry work. Points
+  are placed by rejection sampling or, on request, drawn directly from a
+  triangulation of the regions. The same seed always yields the same
+  orders.
 
   Args:
-    body: OrderCreate request containing list of region names and
-      count of orders to generate.
+    body: OrderCreate request containing list of region names, count of
+      orders to generate, the sampling method, an optional seed and
+      optional region weights and whether to tag districts.
 
   Returns:
     List of Order objects, each with random latitude and longitude
-    coordinates within the specified regions.
+    coordinates within the specified regions and, if requested, the
+    district they fall in.
 
   Raises:
-    BadRequest: If no valid regions are found in the request or if
-      all specified region names are invalid.
+    BadRequest: If no valid regions are found in the request, if all
+      specified region names are invalid or if every selected region has
+      a zero weight.
   """
-  regions = await region_service.get_regions()
-  regions_by_names = {region.name: region for region in regions}
+  longitudes, latitudes = await generate_orders(body)
+
+  districts = [None] * len(longitudes)
+  if body.districts:
+    districts = await asyncio.get_running_loop().run_in_executor(
+      None, region_service.lookup_districts, longitudes, latitudes
+    )
+
+  orders = [
+    Order(longitude=longitude, latitude=latitude, district=district)
+    for longitude, latitude, district in zip(
+      longitudes.tolist(), latitudes.tolist(), districts
+    )
+  ]
+
+  return orders
+
 
-  target_regions = []
-  for region in body.regions:
-    if region in regions_by_names:
-      target_regions.append(regions_by_names[region])
+async def generate_orders(body: OrderCreate) -> tuple[np.ndarray, np.ndarray]:
+  """
+  Generates random order coordinates within the specified regions.
+
+  Draws the same points as create_orders without building Order objects,
+  for callers that keep working on the coordinates.
+
+  Args:
+    body: OrderCreate request containing list of region names, count of
+      orders to generate, the sampling method, an optional seed and
+      optional region weights.
+
+  Returns:
+    Tuple of (longitudes, latitudes) float64 arrays of length count.
 
-  if not target_regions:
+  Raises:
+    BadRequest: If no valid regions are found in the request, if all
+      specified region names are invalid or if every selected region has
+      a zero weight.
+  """
+  geometry = select_region_geometry(body.regions)
+  part_table = get_part_table(geometry, body.weights)
+  return await generate_points(
+    geometry, body.count, body.seed, body.sampling, part_table=part_table
+  )
+
+
+async def stream_orders(
+  body: OrderCreate,
+) -> AsyncIterator[tuple[np.ndarray, np.ndarray, list[str | None] | None]]:
+  """
+  Generates random orders within the specified regions, batch by batch.
+
+  Produces exactly the points create_orders would for the same seed, but
+  holds only one batch of STREAM_CHUNKS chunks per worker in memory at a
+  time, so memory use does not grow with the requested count.
+
+  Args:
+    body: OrderCreate request containing list of region names, count of
+      orders to generate, the sampling method, an optional seed and
+      optional region weights and whether to tag districts.
+
+  Yields:
+    Tuple of (longitudes, latitudes, districts) for one batch of orders,
+    in generation order. Coordinates are float64 arrays and districts the
+    district of every order, or None unless requested.
+
+  Raises:
+    BadRequest: If no valid regions are found in the request, if all
+      specified region names are invalid or if every selected region has
+      a zero weight.
+  """
+  geometry = select_region_geometry(body.regions)
+  part_table = get_part_table(geometry, body.weights)
+  chunks = spawn_chunks(body.count, body.seed, CHUNK_SIZE)
+  workers = default_workers(body.count)
+
+  loop = asyncio.get_running_loop()
+  batch_size = STREAM_CHUNKS * workers
+  for start in range(0, len(chunks), batch_size):
+    batch = chunks[start : start + batch_size]
+    longitudes, latitudes = await generate_chunks(
+      geometry, batch, body.sampling, workers, part_table
+    )
+
+    districts = None
+    if body.districts:
+      districts = await loop.run_in_executor(
+        None, region_service.lookup_districts, longitudes, latitudes
+      )
+
+    yield longitudes, latitudes, districts
+
+
+def select_region_geometry(names: list[str]) -> RegionGeometry:
+  """
+  Resolves region names into the geometry to generate orders within.
+
+  Args:
+    names: Region names from the request. Unknown names are ignored.
+
+  Returns:
+    RegionGeometry covering the union of the known regions.
+
+  Raises:
+    BadRequest: If none of the names match a known region.
+  """
+  registry = region_service.get_registry()
+  region_ids = registry.select(names)
+
+  if not region_ids:
     raise exceptions.BadRequest("No valid regions selected")
 
-  polygons = []
-  for region in target_regions:
-    polygon = region_polygon(region)
-    polygons.append(polygon)
+  return get_region_geometry(registry, region_ids)
 
-  orders = []
-  for _ in range(body.count):
-    polygon = select_polygon(polygons)
-    longitude, latitude = point_in_polygon(polygon)
-    order = Order(longitude=longitude, latitude=latitude)
-    orders.append(order)
 
-  return orders
+def get_region_geometry(
+  registry: RegionRegistry,
+  region_ids: list[int],
+) -> RegionGeometry:
+  """
+  Returns the sampling geometry for a set of regions, building it once.
+
+  Geometries are cached by the sorted set of region names, so the parts
+  and their areas are computed on the first request for a combination
+  and reused by every later one. The least recently
+  used combinations are evicted once the cache is full.
 
+  Args:
+    registry: RegionRegistry holding the regions.
+    region_ids: Ids of the regions to combine. Order and duplicates do
+      not affect the cache key.
 
-def select_polygon(polygons: list[Polygon | MultiPolygon]) -> Polygon:
+  Returns:
+    RegionGeometry covering the union of the regions.
   """
-  Selects a polygon from a list, handling both single and multi-polygon cases.
+  regions_by_names = {
+    registry.names[region_id]: region_id for region_id in region_ids
+  }
+  key = tuple(sorted(regions_by_names))
+
+  geometry = region_geometries.get(key)
+  if geometry is None:
+    polygons = [registry.polygons[regions_by_names[name]] for name in key]
+    geometry = build_region_geometry(list(key), polygons)
+    region_geometries.put(key, geometry)
+
+  return geometry
 
-  Computes the union of all input polygons. If the result is a MultiPolygon,
-  delegates to select_multi_polygon for area-weighted selection. Otherwise
-  returns the single Polygon directly.
+
+def get_part_table(
+  geometry: RegionGeometry,
+  weights: dict[str, float] | None,
+) -> AliasTable:
+  """
+  Returns the alias table drawing parts for the requested region weights.
 
   Args:
-    polygons: List of Polygon or MultiPolygon objects to select from.
+    geometry: RegionGeometry of the selected regions.
+    weights: Relative order density per region name. Regions missing from
+      the mapping have a density of 1.0. Parts are drawn by area alone if
+      None.
 
   Returns:
-    A single Polygon object. If input polygons form a MultiPolygon after
-    union, returns one of its constituent polygons selected by area weight.
-    Otherwise returns the union Polygon directly.
+    AliasTable over the geometry's parts.
+
+  Raises:
+    BadRequest: If every selected region has a zero weight.
+  """
+  if weights is None:
+    return geometry.part_table
+
+  densities = np.array([weights.get(name, 1.0) for name in geometry.names])
+  if not densities.any():
+    raise exceptions.BadRequest("Selected regions must not all weigh zero")
+
+  return geometry.weighted_part_table(densities)
+
+
+async def generate_points(
+  geometry: RegionGeometry,
+  count: int,
+  seed: int | None = None,
+  sampling: Literal["rejection", "triangulation"] = "rejection",
+  workers: int | None = None,
+  part_table: AliasTable | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+  """
+  Generates reproducible random points, in parallel for large counts.
+
+  Splits the count into fixed-size chunks seeded from one SeedSequence
+  with spawn_chunks. Small requests are generated in-process; large ones
+  are split into contiguous groups of chunks generated on the process
+  pool. Since chunk boundaries and seeds do not depend on the number of
+  workers, the output for a given seed is identical however the work is
+  distributed.
+
+  Args:
+    geometry: RegionGeometry to generate points within.
+    count: Number of points to generate.
+    seed: Root seed. A fresh random seed is used if None.
+    sampling: Sampling method, "rejection" or "triangulation".
+    workers: Number of groups to split the chunks into. Defaults to 1
+      below PARALLEL_THRESHOLD points and to the CPU count above it.
+    part_table: Alias table drawing the part of every point. Parts are
+      drawn by area if None.
+
+  Returns:
+    Tuple of (longitudes, latitudes) float64 arrays of length count.
+  """
+  chunks = spawn_chunks(count, seed, CHUNK_SIZE)
+  if workers is None:
+    workers = default_workers(count)
+
+  return await generate_chunks(geometry, chunks, sampling, workers, part_table)
+
+
+async def generate_chunks(
+  geometry: RegionGeometry,
+  chunks: list[tuple[int, np.random.SeedSequence]],
+  sampling: Literal["rejection", "triangulation"],
+  workers: int,
+  part_table: AliasTable | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+  """
+  Generates the points of consecutive chunks, in parallel if requested.
+
+  Args:
+    geometry: RegionGeometry to generate points within.
+    chunks: List of (size, seed_sequence) tuples from spawn_chunks.
+    sampling: Sampling method, "rejection" or "triangulation".
+    workers: Number of contiguous groups to split the chunks into. Groups
+      are generated on the process pool when there is more than one.
+    part_table: Alias table drawing the part of every point. Parts are
+      drawn by area if None.
+
+  Returns:
+    Tuple of (longitudes, latitudes) float64 arrays holding the points of
+    all chunks, in chunk order.
+  """
+  workers = min(workers, len(chunks))
+  if workers <= 1:
+    # Off the event loop, though too small to be worth the process pool.
+    return await asyncio.get_running_loop().run_in_executor(
+      None, points_in_chunks, geometry, chunks, sampling, part_table
+    )
+
+  if sampling == "triangulation":
+    # Triangulated here once, so that the pool receives them with the
+    # geometry instead of triangulating it in every process.
+    geometry.triangulations
+
+  bounds = np.linspace(0, len(chunks), workers + 1).astype(int).tolist()
+  results = await asyncio.gather(
+    *(
+      sample_on_pool(geometry, chunks[a:b], sampling, part_table)
+      for a, b in zip(bounds, bounds[1:])
+    )
+  )
+
+  longitudes = np.concatenate([x for x, _ in results])
+  latitudes = np.concatenate([y for _, y in results])
+  return longitudes, latitudes
+
+
+async def sample_on_pool(
+  geometry: RegionGeometry,
+  chunks: list[tuple[int, np.random.SeedSequence]],
+  sampling: Literal["rejection", "triangulation"],
+  part_table: AliasTable | None,
+) -> tuple[np.ndarray, np.ndarray]:
   """
-  polygon_union = unary_union(polygons)
-  if isinstance(polygon_union, MultiPolygon):
-    polygons = list(polygon_union.geoms)
-    return select_multi_polygon(polygons)
-  return polygon_union
+  Generates the points of consecutive chunks on the process pool.
 
+  The geometry is only sent along until the pool has received it; after
+  that the task carries its digest, and is sent again with the geometry
+  should it land on a process that has not received it yet.
 
-def select_multi_polygon(polygons: list[Polygon | MultiPolygon]) -> Polygon:
+  Args:
+    geometry: RegionGeometry to generate points within.
+    chunks: List of (size, seed_sequence) tuples from spawn_chunks.
+    sampling: Sampling method, "rejection" or "triangulation".
+    part_table: Alias table drawing the part of every point. Parts are
+      drawn by area if None.
+
+  Returns:
+    Tuple of (longitudes, latitudes) float64 arrays, see points_in_chunks.
   """
-  Selects a polygon from a list using area-weighted random selection.
+  loop = asyncio.get_running_loop()
+  digest = geometry.digest
 
-  Calculates the area of each polygon and uses these areas as weights
-  for random selection. Larger polygons have proportionally higher
-  probability of being selected, ensuring uniform point distribution
-  across the combined area.
+  if digest in pool_digests:
+    try:
+      return await loop.run_in_executor(
+        get_executor(),
+        sample_chunks,
+        digest,
+        None,
+        chunks,
+        sampling,
+        part_table,
+      )
+    except GeometryMissing:
+      pass
+
+  result = await loop.run_in_executor(
+    get_executor(),
+    sample_chunks,
+    digest,
+    geometry,
+    chunks,
+    sampling,
+    part_table,
+  )
+  pool_digests.add(digest)
+  return result
+
+
+def default_workers(count: int) -> int:
+  """
+  Returns the number of workers to generate count points with.
 
   Args:
-    polygons: List of Polygon or MultiPolygon objects to select from.
-      Each polygon's area is used as a selection weight.
+    count: Number of points to generate.
+
+  Returns:
+    1 below PARALLEL_THRESHOLD points, the size of the process pool
+    above it.
+  """
+  if count < PARALLEL_THRESHOLD:
+    return 1
+  return pool_size()
+
+
+def get_executor() -> ProcessPoolExecutor:
+  """
+  Returns the process pool used for parallel point generation.
+
+  The pool is created on first use, see create_executor.
 
   Returns:
-    A single Polygon object randomly selected from the input list,
-    with selection probability proportional to each polygon's area.
+    The shared ProcessPoolExecutor.
+  """
+  global executor
+
+  if executor is None:
+    executor = create_executor()
+
+  return executor
+
+
+def shutdown_executor():
+  """
+  Shuts down the process pool, if it was started.
   """
-  areas = [polygon.area for polygon in polygons]
-  total_area = sum(areas)
-  weights = [area / total_area for area in areas]
-  return random.choices(polygons, weights=weights)[0]
+  global executor
+
+  if executor is not None:
+    executor.shutdown(cancel_futures=True)
+    executor = None
+    pool_digests.clear()
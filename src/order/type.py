@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Annotated, Any, Literal
 
 from pydantic import BaseModel, ConfigDict, Field, RootModel
 from sanic_ext import openapi
@@ -8,8 +8,13 @@ from sanic_ext import openapi
 class Order(BaseModel):
   model_config = ConfigDict(from_attributes=True)
 
-  latitude: float
-  longitude: float
+  latitude: float = Field(ge=-90, le=90, allow_inf_nan=False)
+  longitude: float = Field(ge=-180, le=180, allow_inf_nan=False)
+  district: str | None = Field(
+    default=None,
+    exclude_if=lambda district: district is None,
+    description="Name of the region the order falls in, if requested",
+  )
 
   @classmethod
   def json(cls) -> dict[str, Any]:
@@ -28,7 +33,31 @@ class OrderCreate(BaseModel):
 
   regions: list[str] = Field(description="List of region names")
   count: int = Field(default=1_000, ge=1, le=10_000)
+  sampling: Literal["rejection", "triangulation"] = Field(
+    default="rejection",
+    description="Point sampling method within the regions",
+  )
+  seed: int | None = Field(
+    default=None,
+    ge=0,
+    description="Random seed for reproducible orders",
+  )
+  weights: (
+    dict[str, Annotated[float, Field(ge=0, allow_inf_nan=False)]] | None
+  ) = Field(
+    default=None,
+    description="Relative order density per region name, 1.0 if omitted",
+  )
+  districts: bool = Field(
+    default=False,
+    description="Tag every order with the region it falls in",
+  )
 
   @classmethod
   def json(cls) -> dict[str, Any]:
     return cls.model_json_schema(ref_template="#/components/schemas/{model}")
+
+
+@openapi.component(name="OrdersStreamCreate")
+class OrderStreamCreate(OrderCreate):
+  count: int = Field(default=1_000, ge=1, le=100_000_000)
@@ -1,42 +1,471 @@
-import random
+import hashlib
+import json
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Generic, Hashable, Literal, TypeVar
 
-from shapely import MultiPolygon, Point, Polygon
+import numpy as np
+import orjson
+import shapely
+from pydantic import ValidationError
+from shapely import MultiPolygon, Polygon
 
-from ..region.type import Region
+from ..serialization import type_adapter
+from .type import Order
 
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
 
-def region_polygon(region: Region) -> Polygon | MultiPolygon:
+# Bounds of every Order coordinate, as the Order model declares them.
+COORDINATE_BOUNDS = {"latitude": (-90.0, 90.0), "longitude": (-180.0, 180.0)}
+
+
+@dataclass(frozen=True)
+class AliasTable:
+  """
+  Walker alias table for drawing indices from a discrete distribution.
+
+  Every draw costs one uniform index and one uniform number, whatever the
+  number of outcomes, so large batches are sampled with a few array
+  operations.
+
+  Attributes:
+    probability: Probability of keeping the drawn index rather than
+      taking its alias.
+    alias: Index taken instead of the drawn one otherwise.
+  """
+
+  probability: np.ndarray
+  alias: np.ndarray
+
+  @classmethod
+  def build(cls, weights: np.ndarray) -> "AliasTable":
+    """
+    Builds the table with Vose's method.
+
+    Args:
+      weights: Non-negative weights, not all zero. Indices are drawn with
+        probability proportional to their weight.
+
+    Returns:
+      AliasTable over range(len(weights)).
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    count = len(weights)
+    probability = weights * (count / weights.sum())
+    alias = np.arange(count)
+
+    small = np.flatnonzero(probability < 1.0).tolist()
+    large = np.flatnonzero(probability >= 1.0).tolist()
+    while small and large:
+      less, more = small.pop(), large.pop()
+      alias[less] = more
+      probability[more] -= 1.0 - probability[less]
+      if probability[more] < 1.0:
+        small.append(more)
+      else:
+        large.append(more)
+
+    probability[small + large] = 1.0
+    return cls(probability=probability, alias=alias)
+
+  def sample(self, count: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Draws count indices from the table's distribution.
+
+    Args:
+      count: Number of indices to draw.
+      rng: NumPy random generator to draw from.
+
+    Returns:
+      Integer array of length count.
+    """
+    indices = rng.integers(0, len(self.alias), count)
+    keep = rng.random(count) < self.probability[indices]
+    return np.where(keep, indices, self.alias[indices])
+
+
+@dataclass(frozen=True)
+class RegionGeometry:
+  """
+  Precomputed geometry of a set of regions, ready for point sampling.
+
+  Regions are expected not to overlap, as districts do not.
+
+  Attributes:
+    names: Names of the regions, in region position order.
+    parts: Polygons making up the regions, each prepared.
+    part_regions: Position in names of the region owning each part.
+    part_areas: Area of each part.
+  """
+
+  names: tuple[str, ...]
+  parts: tuple[Polygon, ...]
+  part_regions: np.ndarray
+  part_areas: np.ndarray
+
+  @cached_property
+  def part_table(self) -> AliasTable:
+    """
+    Alias table drawing parts in proportion to their area.
+    """
+    return AliasTable.build(self.part_areas)
+
+  @cached_property
+  def digest(self) -> bytes:
+    """
+    Digest of the names and parts, identifying the geometry across
+    processes.
+    """
+    digest = hashlib.blake2b(orjson.dumps(self.names), digest_size=16)
+    for wkb in shapely.to_wkb(self.parts):
+      digest.update(wkb)
+    return digest.digest()
+
+  @cached_property
+  def triangulations(self) -> tuple[tuple[np.ndarray, AliasTable], ...]:
+    """
+    Triangles of every part, with an alias table over their areas.
+
+    Computed on first use by triangulate_polygon and kept for the lifetime
+    of the geometry.
+    """
+    triangulations = []
+    for part in self.parts:
+      triangles, areas = triangulate_polygon(part)
+      triangulations.append((triangles, AliasTable.build(areas)))
+    return tuple(triangulations)
+
+  def weighted_part_table(self, weights: np.ndarray | None) -> AliasTable:
+    """
+    Alias table drawing parts by area times their region's density.
+
+    Args:
+      weights: Relative density of every region, in names order. Parts
+        are drawn by area alone if None.
+
+    Returns:
+      AliasTable over the parts.
+    """
+    if weights is None:
+      return self.part_table
+    return AliasTable.build(self.part_areas * weights[self.part_regions])
+
+
+class LRUCache(Generic[K, V]):
+  """
+  Bounded mapping that evicts the least recently used entry when full.
+
+  Args:
+    maxsize: Maximum number of entries kept in the cache.
+  """
+
+  def __init__(self, maxsize: int):
+    self.maxsize = maxsize
+    self.entries: OrderedDict[K, V] = OrderedDict()
+
+  def get(self, key: K) -> V | None:
+    if key not in self.entries:
+      return None
+    self.entries.move_to_end(key)
+    return self.entries[key]
+
+  def put(self, key: K, value: V):
+    self.entries[key] = value
+    self.entries.move_to_end(key)
+    while len(self.entries) > self.maxsize:
+      self.entries.popitem(last=False)
+
+  def clear(self):
+    self.entries.clear()
+
+  def __len__(self) -> int:
+    return len(self.entries)
+
+
+def build_region_geometry(
+  names: list[str],
+  polygons: list[Polygon | MultiPolygon],
+) -> RegionGeometry:
+  """
+  Computes the sampling geometry for the given region polygons.
+
+  Splits every region into its polygons and records the region and area
+  of each one. Every part is prepared so that repeated containment tests
+  against it are fast.
+
+  Args:
+    names: Region names, in the same order as polygons.
+    polygons: List of Polygon or MultiPolygon objects, one per region.
+
+  Returns:
+    RegionGeometry holding the prepared parts, the region owning each
+    part and their areas.
+  """
+  parts = shapely.get_parts(polygons)
+  part_regions = np.repeat(
+    np.arange(len(polygons)),
+    shapely.get_num_geometries(polygons),
+  )
+
+  shapely.prepare(parts)
+
+  return RegionGeometry(
+    names=tuple(names),
+    parts=tuple(parts),
+    part_regions=part_regions,
+    part_areas=shapely.area(parts),
+  )
+
+
+def spawn_chunks(
+  count: int,
+  seed: int | None,
+  chunk_size: int,
+) -> list[tuple[int, np.random.SeedSequence]]:
+  """
+  Splits a point count into fixed-size chunks with independent seeds.
+
+  Every chunk gets its own child of a single SeedSequence, so chunks can
+  be generated in any order or on any process and still reproduce the
+  same points for the same seed. Chunk boundaries depend only on count
+  and chunk_size, never on how the chunks are later distributed.
+
+  Args:
+    count: Total number of points to generate.
+    seed: Root seed. A fresh random seed is used if None.
+    chunk_size: Number of points per chunk. The last chunk holds the
+      remainder.
+
+  Returns:
+    List of (size, seed_sequence) tuples, one per chunk, in output order.
+  """
+  sizes = [chunk_size] * (count // chunk_size)
+  if count % chunk_size:
+    sizes.append(count % chunk_size)
+
+  seed_sequences = np.random.SeedSequence(seed).spawn(len(sizes))
+  return list(zip(sizes, seed_sequences))
+
+
+def points_in_chunks(
+  geometry: RegionGeometry,
+  chunks: list[tuple[int, np.random.SeedSequence]],
+  sampling: Literal["rejection", "triangulation"] = "rejection",
+  part_table: AliasTable | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
   """
-  Converts a Region object to a Shapely Polygon or MultiPolygon.
+  Generates the points of consecutive chunks within a region geometry.
 
-  Transforms the region's coordinate data into a Shapely geometry object
-  based on the region type. Handles both single Polygon and MultiPolygon
-  geometries.
+  Each chunk is drawn by points_in_region_geometry from a generator seeded
+  with the chunk's own seed sequence. Runs in worker processes, so the
+  geometry and chunks must be picklable.
 
   Args:
-    region: Region object containing type and coordinates data.
+    geometry: RegionGeometry built by build_region_geometry.
+    chunks: List of (size, seed_sequence) tuples from spawn_chunks.
+    sampling: Sampling method, "rejection" or "triangulation".
+    part_table: Alias table drawing the part of every point. Parts are
+      drawn by area if None.
 
   Returns:
-    Polygon if region type is "Polygon", MultiPolygon if region type is
-    "MultiPolygon". The returned geometry can be used for spatial
-    operations like point-in-polygon tests.
+    Tuple of (longitudes, latitudes) float64 arrays holding the points of
+    all chunks, in chunk order.
+  """
+  longitudes = []
+  latitudes = []
+  for size, seed_sequence in chunks:
+    rng = np.random.default_rng(seed_sequence)
+    x, y = points_in_region_geometry(geometry, size, rng, sampling, part_table)
+    longitudes.append(x)
+    latitudes.append(y)
+
+  return np.concatenate(longitudes), np.concatenate(latitudes)
+
+
+class GeometryMissing(LookupError):
+  """
+  Raised by sample_chunks when a pool process lacks the geometry it was
+  sent the digest of.
+  """
+
+
+# Geometries received by this pool process, by RegionGeometry.digest.
+pool_geometries: LRUCache[bytes, RegionGeometry] = LRUCache(16)
+
+
+def sample_chunks(
+  digest: bytes,
+  geometry: RegionGeometry | None,
+  chunks: list[tuple[int, np.random.SeedSequence]],
+  sampling: Literal["rejection", "triangulation"] = "rejection",
+  part_table: AliasTable | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
   """
-  coordinates = region.coordinates
+  Generates the points of consecutive chunks on a pool process.
+
+  Geometries are kept by the process once received, so that later tasks
+  only need to send their digest, and their triangulations are computed
+  at most once per process.
+
+  Args:
+    digest: RegionGeometry.digest of the geometry.
+    geometry: The geometry itself, or None to use the one this process
+      received before.
+    chunks: List of (size, seed_sequence) tuples from spawn_chunks.
+    sampling: Sampling method, "rejection" or "triangulation".
+    part_table: Alias table drawing the part of every point. Parts are
+      drawn by area if None.
 
-  if region.type == "Polygon":
-    return Polygon(coordinates[0])
+  Returns:
+    Tuple of (longitudes, latitudes) float64 arrays, see points_in_chunks.
+
+  Raises:
+    GeometryMissing: If geometry is None and this process has not received
+      the geometry yet.
+  """
+  if geometry is None:
+    geometry = pool_geometries.get(digest)
+    if geometry is None:
+      raise GeometryMissing(digest)
   else:
-    polygons = [Polygon(coordinate[0]) for coordinate in coordinates]
-    return MultiPolygon(polygons)
+    pool_geometries.put(digest, geometry)
+
+  return points_in_chunks(geometry, chunks, sampling, part_table)
+
+
+def points_in_region_geometry(
+  geometry: RegionGeometry,
+  count: int,
+  rng: np.random.Generator | None = None,
+  sampling: Literal["rejection", "triangulation"] = "rejection",
+  part_table: AliasTable | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+  """
+  Generates random points distributed over a region geometry.
+
+  Draws the part of every point at once from an alias table, then fills
+  each part's points in one call. With "rejection" sampling, points come
+  from points_in_polygon, sampling each part from its own bounding box
+  to keep the acceptance rate high. With "triangulation" sampling, points
+  are drawn directly from the part's triangulation with
+  points_in_triangles, without any rejected candidates.
+
+  Args:
+    geometry: RegionGeometry built by build_region_geometry.
+    count: Number of points to generate.
+    rng: NumPy random generator to draw from. A fresh unseeded generator
+      is used if not given.
+    sampling: Sampling method, "rejection" or "triangulation".
+    part_table: Alias table drawing the part of every point, such as one
+      returned by RegionGeometry.weighted_part_table. Parts are drawn by
+      area, giving a uniform distribution, if None.
+
+  Returns:
+    Tuple of (longitudes, latitudes) float64 arrays of length count, in
+    random order across the parts.
+  """
+  if rng is None:
+    rng = np.random.default_rng()
+  if part_table is None:
+    part_table = geometry.part_table
+
+  part_indices = part_table.sample(count, rng)
+  order = np.argsort(part_indices, kind="stable")
+  part_counts = np.bincount(part_indices, minlength=len(geometry.parts))
+
+  longitudes = np.empty(count)
+  latitudes = np.empty(count)
+  start = 0
+  for part_idx, part_count in enumerate(part_counts.tolist()):
+    if part_count == 0:
+      continue
+    if sampling == "triangulation":
+      triangles, triangle_table = geometry.triangulations[part_idx]
+      x, y = points_in_triangles(triangles, triangle_table, part_count, rng)
+    else:
+      x, y = points_in_polygon(geometry.parts[part_idx], part_count, rng)
+    positions = order[start : start + part_count]
+    longitudes[positions] = x
+    latitudes[positions] = y
+    start += part_count
+
+  return longitudes, latitudes
+
+
+def triangulate_polygon(
+  polygon: Polygon | MultiPolygon,
+) -> tuple[np.ndarray, np.ndarray]:
+  """
+  Splits a polygon into triangles for rejection-free point sampling.
+
+  Uses a constrained Delaunay triangulation, which follows the polygon's
+  edges and holes exactly, so the triangles cover the polygon without
+  overlapping or leaving it.
+
+  Args:
+    polygon: Shapely Polygon or MultiPolygon object to triangulate.
+
+  Returns:
+    Tuple of (triangles, areas). triangles is a float64 array of shape
+    (n, 3, 2) holding the (longitude, latitude) vertices of each triangle.
+    areas holds the area of each triangle.
+  """
+  triangles = shapely.get_parts(shapely.constrained_delaunay_triangles(polygon))
+  vertices = shapely.get_coordinates(triangles).reshape(-1, 4, 2)[:, :3]
+
+  return vertices, shapely.area(triangles)
+
+
+def points_in_triangles(
+  triangles: np.ndarray,
+  table: AliasTable,
+  count: int,
+  rng: np.random.Generator | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+  """
+  Generates random points uniformly distributed over a set of triangles.
+
+  Picks a triangle for every point from an alias table over the triangle
+  areas, then draws a uniform point inside it from two uniform numbers
+  folded back into the triangle. Every draw is accepted,
+  so the cost per point is constant regardless of the polygon's shape.
+
+  Args:
+    triangles: Array of shape (n, 3, 2) holding triangle vertices, as
+      returned by triangulate_polygon.
+    table: Alias table over the triangles, built from their areas.
+    count: Number of points to generate.
+    rng: NumPy random generator to draw from. A fresh unseeded generator
+      is used if not given.
+
+  Returns:
+    Tuple of (longitudes, latitudes) float64 arrays of length count.
+  """
+  if rng is None:
+    rng = np.random.default_rng()
+
+  indices = table.sample(count, rng)
+  a, b, c = triangles[indices, 0], triangles[indices, 1], triangles[indices, 2]
+
+  u = rng.random(count)
+  v = rng.random(count)
+  folded = u + v > 1
+  u[folded] = 1 - u[folded]
+  v[folded] = 1 - v[folded]
+
+  points = a + u[:, None] * (b - a) + v[:, None] * (c - a)
+  return points[:, 0], points[:, 1]
 
 
 def point_in_polygon(polygon: Polygon | MultiPolygon) -> tuple[float, float]:
   """
   Generates a random point inside the given polygon.
 
-  Uses rejection sampling: generates random points within the polygon's
-  bounding box until one is found that lies inside the polygon. This
-  ensures uniform distribution within the polygon boundaries.
+  Draws a single point with points_in_polygon. This ensures uniform
+  distribution within the polygon boundaries.
 
   Args:
     polygon: Shapely Polygon or MultiPolygon object to generate a point within.
@@ -46,12 +475,473 @@ def point_in_polygon(polygon: Polygon | MultiPolygon) -> tuple[float, float]:
     guaranteed to be inside the polygon (or one of its components for
     MultiPolygon).
   """
+  longitudes, latitudes = points_in_polygon(polygon, 1)
+  return float(longitudes[0]), float(latitudes[0])
+
+
+def points_in_polygon(
+  polygon: Polygon | MultiPolygon,
+  count: int,
+  rng: np.random.Generator | None = None,
+  block_size: int = 1 << 20,
+) -> tuple[np.ndarray, np.ndarray]:
+  """
+  Generates random points inside the given polygon in vectorized blocks.
+
+  Uses rejection sampling: draws blocks of candidate points within the
+  polygon's bounding box and keeps those inside the polygon, tested all
+  at once with shapely.contains_xy against the prepared geometry. Each
+  block is sized from the acceptance rate observed so far (starting from
+  the ratio of polygon area to bounding box area), so that a single block
+  usually yields every remaining point even for thin or sparse shapes.
+
+  Args:
+    polygon: Shapely Polygon or MultiPolygon object to generate points
+      within. The geometry is prepared in place.
+    count: Number of points to generate.
+    rng: NumPy random generator to draw from. A fresh unseeded generator
+      is used if not given.
+    block_size: Upper bound on the number of candidates drawn at once,
+      keeping memory bounded for very large counts.
+
+  Returns:
+    Tuple of (longitudes, latitudes) float64 arrays of length count. Every
+    point is guaranteed to be inside the polygon (or one of its components
+    for MultiPolygon).
+
+  Raises:
+    ValueError: If points are requested from a polygon with no area,
+      which no candidate would ever fall inside.
+  """
+  if count > 0 and polygon.area == 0:
+    raise ValueError("Cannot generate points inside a polygon with no area")
+
+  if rng is None:
+    rng = np.random.default_rng()
+
+  shapely.prepare(polygon)
   minx, miny, maxx, maxy = polygon.bounds
+  box_area = (maxx - minx) * (maxy - miny)
+  acceptance = polygon.area / box_area if box_area > 0 else 1.0
+
+  longitudes = np.empty(count)
+  latitudes = np.empty(count)
+  filled = drawn = accepted = 0
+
+  while filled < count:
+    remaining = count - filled
+    size = min(int(remaining / max(acceptance, 1e-6) * 1.1) + 16, block_size)
+
+    x = rng.uniform(minx, maxx, size)
+    y = rng.uniform(miny, maxy, size)
+    inside = shapely.contains_xy(polygon, x, y)
+
+    drawn += size
+    accepted += int(np.count_nonzero(inside))
+    if accepted:
+      acceptance = accepted / drawn
+
+    x, y = x[inside][:remaining], y[inside][:remaining]
+    longitudes[filled : filled + len(x)] = x
+    latitudes[filled : filled + len(y)] = y
+    filled += len(x)
+
+  return longitudes, latitudes
+
+
+def encode_ndjson(
+  longitudes: np.ndarray,
+  latitudes: np.ndarray,
+  districts: list[str | None] | None = None,
+) -> str:
+  """
+  Encodes points as newline-delimited JSON orders.
+
+  Args:
+    longitudes: Array of point longitudes.
+    latitudes: Array of point latitudes.
+    districts: District of every point. Omitted from the orders if None,
+      and for points whose district is None.
+
+  Returns:
+    One {"latitude": ..., "longitude": ...} object per line, each line
+    terminated by a newline. Floats use the shortest representation that
+    round-trips, as in JSON responses.
+  """
+  if districts is None:
+    return "".join(
+      f'{{"latitude":{latitude!r},"longitude":{longitude!r}}}\n'
+      for longitude, latitude in zip(longitudes.tolist(), latitudes.tolist())
+    )
+
+  suffixes = {
+    district: "}\n"
+    if district is None
+    else f',"district":{json.dumps(district, ensure_ascii=False)}}}\n'
+    for district in set(districts)
+  }
+  return "".join(
+    f'{{"latitude":{latitude!r},"longitude":{longitude!r}' + suffixes[district]
+    for longitude, latitude, district in zip(
+      longitudes.tolist(), latitudes.tolist(), districts
+    )
+  )
+
+
+def encode_binary(longitudes: np.ndarray, latitudes: np.ndarray) -> bytes:
+  """
+  Encodes points as a flat little-endian float64 buffer.
+
+  Args:
+    longitudes: Array of point longitudes.
+    latitudes: Array of point latitudes.
+
+  Returns:
+    16 bytes per point: latitude then longitude, each a little-endian
+    float64, points following each other without separators.
+  """
+  return np.column_stack((latitudes, longitudes)).astype("<f8").tobytes()
+
+
+def validate_coordinates(
+  orders: Any,
+  title: str,
+  loc: tuple[str | int, ...] = (),
+  start: int = 0,
+) -> tuple[np.ndarray, np.ndarray] | None:
+  """
+  Validates the coordinates of JSON orders in bulk.
+
+  Checks that every coordinate is finite and within COORDINATE_BOUNDS on
+  whole arrays, without building an Order per order. Only the common
+  layout is handled: a list of objects holding exactly a numeric
+  latitude and longitude. Anything else is left to model validation,
+  which reports the precise error.
+
+  Args:
+    orders: Decoded JSON value of an orders field.
+    title: Name of the model the orders belong to, used in error
+      messages.
+    loc: Location of the orders field within that model.
+    start: Index of the first order within the orders field, for orders
+      validated in chunks.
+
+  Returns:
+    Tuple of (latitudes, longitudes) float64 arrays, or None if the
+    orders are not in the common layout.
+
+  Raises:
+    ValidationError: If any coordinate is not finite or out of bounds,
+      with one error per coordinate, ordered and worded as model
+      validation reports them.
+  """
+  if not isinstance(orders, list) or any(
+    type(order) is not dict or len(order) != 2 for order in orders
+  ):
+    return None
+
+  try:
+    columns = {
+      field: np.array([order[field] for order in orders])
+      for field in COORDINATE_BOUNDS
+    }
+  except KeyError:
+    return None
+  if any(
+    column.ndim != 1 or column.dtype.kind not in "iuf"
+    for column in columns.values()
+  ):
+    return None
+
+  return check_coordinates(
+    columns["latitude"], columns["longitude"], title, loc, start
+  )
+
+
+def check_coordinates(
+  latitudes: np.ndarray,
+  longitudes: np.ndarray,
+  title: str,
+  loc: tuple[str | int, ...] = (),
+  start: int = 0,
+) -> tuple[np.ndarray, np.ndarray]:
+  """
+  Checks coordinate arrays against COORDINATE_BOUNDS.
+
+  Args:
+    latitudes: Numeric array of order latitudes.
+    longitudes: Numeric array of order longitudes, same length as
+      latitudes.
+    title: Name of the model the orders belong to, used in error
+      messages.
+    loc: Location of the orders field within that model.
+    start: Index of the first order within the orders field, for orders
+      checked in chunks.
+
+  Returns:
+    Tuple of (latitudes, longitudes) float64 arrays.
+
+  Raises:
+    ValidationError: If any coordinate is not finite or out of bounds,
+      with one error per coordinate, ordered and worded as model
+      validation reports them.
+  """
+  columns = {"latitude": latitudes, "longitude": longitudes}
+  checked = {}
+
+  errors = []
+  for position, (field, (lower, upper)) in enumerate(COORDINATE_BOUNDS.items()):
+    values = columns[field].astype(np.float64)
+    checked[field] = values
+    finite = np.isfinite(values)
+    checks = [
+      (~finite, "finite_number", None),
+      (finite & (values < lower), "greater_than_equal", {"ge": lower}),
+      (finite & (values > upper), "less_than_equal", {"le": upper}),
+    ]
+    for invalid, kind, ctx in checks:
+      for idx in np.flatnonzero(invalid).tolist():
+        error = {
+          "type": kind,
+          "loc": (*loc, start + idx, field),
+          "input": columns[field][idx].item(),
+        }
+        if ctx is not None:
+          error["ctx"] = ctx
+        errors.append((idx, position, error))
+
+  if errors:
+    errors.sort(key=lambda error: error[:2])
+    raise ValidationError.from_exception_data(
+      title, [error for *_, error in errors]
+    )
+
+  return checked["latitude"], checked["longitude"]
+
+
+class OrderDecoder(ABC):
+  """
+  Decodes streamed orders into coordinate arrays as chunks arrive.
+
+  Chunks may end anywhere, even within an order: the incomplete order is
+  kept until the chunks completing it arrive. Complete orders are checked
+  against COORDINATE_BOUNDS and appended to float64 buffers that double
+  in size whenever full, so a large upload is held once, as coordinates,
+  rather than as a whole body and a tree of Python objects.
+
+  Subclasses define the format by splitting off complete orders and
+  decoding them.
+
+  Args:
+    title: Name of the model the orders belong to, used in error
+      messages.
+    loc: Location of the orders field within that model.
+    capacity: Number of orders to allocate room for up front.
+  """
+
+  def __init__(
+    self,
+    title: str,
+    loc: tuple[str | int, ...] = (),
+    capacity: int = 1_024,
+  ):
+    self.title = title
+    self.loc = loc
+    self.latitudes = np.empty(capacity, dtype=np.float64)
+    self.longitudes = np.empty(capacity, dtype=np.float64)
+    self.size = 0
+    self.pending = bytearray()
+
+  def feed(self, chunk: bytes):
+    """
+    Decodes the orders a chunk completes.
+
+    Args:
+      chunk: Next bytes of the stream.
+
+    Raises:
+      ValidationError: If an order is invalid.
+    """
+    self.pending += chunk
+    end = self.split(self.pending)
+    if end:
+      self.append(*self.decode(bytes(self.pending[:end])))
+      del self.pending[:end]
+
+  def close(self) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Decodes the rest of the stream and releases the unused buffer.
+
+    The decoder must not be fed afterwards.
+
+    Returns:
+      Tuple of (latitudes, longitudes) float64 arrays of every order.
+
+    Raises:
+      ValidationError: If an order is invalid.
+      ValueError: If the stream ends within an order.
+    """
+    if self.pending:
+      self.append(*self.decode(bytes(self.pending)))
+      self.pending.clear()
+
+    self.latitudes.resize(self.size, refcheck=False)
+    self.longitudes.resize(self.size, refcheck=False)
+    return self.latitudes, self.longitudes
+
+  def append(self, latitudes: np.ndarray, longitudes: np.ndarray):
+    """
+    Appends checked coordinates, growing the buffers if needed.
+
+    Args:
+      latitudes: Array of order latitudes.
+      longitudes: Array of order longitudes, same length as latitudes.
+    """
+    size = self.size + len(latitudes)
+    if size > len(self.latitudes):
+      capacity = max(size, 2 * len(self.latitudes))
+      self.latitudes.resize(capacity, refcheck=False)
+      self.longitudes.resize(capacity, refcheck=False)
+
+    self.latitudes[self.size : size] = latitudes
+    self.longitudes[self.size : size] = longitudes
+    self.size = size
+
+  @abstractmethod
+  def split(self, data: bytearray) -> int:
+    """
+    Finds where the complete orders of the pending bytes end.
+
+    Args:
+      data: Bytes received and not decoded yet.
+
+    Returns:
+      Length of the prefix holding complete orders.
+    """
+
+  @abstractmethod
+  def decode(self, data: bytes) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Decodes and checks orders.
+
+    Args:
+      data: Complete orders, or the end of the stream.
+
+    Returns:
+      Tuple of (latitudes, longitudes) float64 arrays.
+
+    Raises:
+      ValidationError: If an order is invalid.
+      ValueError: If the data ends within an order.
+    """
+
+
+class NdjsonOrderDecoder(OrderDecoder):
+  """
+  Decodes orders streamed as newline-delimited JSON, as encode_ndjson
+  writes them. Blank lines are skipped, and the last line needs no
+  newline.
+
+  The lines of a chunk are parsed by orjson in one call, and one by one
+  only to report a line that is not one JSON value. Orders holding
+  exactly a latitude and longitude are validated in bulk by
+  validate_coordinates; any other layout, such as orders holding a
+  district, falls back to model validation.
+  """
+
+  def split(self, data: bytearray) -> int:
+    return data.rfind(b"\n") + 1
+
+  def decode(self, data: bytes) -> tuple[np.ndarray, np.ndarray]:
+    lines = [line for line in data.splitlines() if line]
+    try:
+      orders = orjson.loads(b"[" + b",".join(lines) + b"]")
+    except orjson.JSONDecodeError:
+      orders = None
+    if orders is None or len(orders) != len(lines):
+      orders = self.parse(lines)
+
+    coordinates = validate_coordinates(orders, self.title, self.loc, self.size)
+    if coordinates is not None:
+      return coordinates
+
+    try:
+      orders = type_adapter(list[Order]).validate_python(orders)
+    except ValidationError as error:
+      raise ValidationError.from_exception_data(
+        self.title,
+        [
+          {
+            "type": detail["type"],
+            "loc": (
+              *self.loc,
+              self.size + detail["loc"][0],
+              *detail["loc"][1:],
+            ),
+            "input": detail["input"],
+            **({"ctx": detail["ctx"]} if "ctx" in detail else {}),
+          }
+          for detail in error.errors()
+        ],
+      ) from None
+
+    latitudes = np.array([order.latitude for order in orders], dtype=np.float64)
+    longitudes = np.array(
+      [order.longitude for order in orders], dtype=np.float64
+    )
+    return latitudes, longitudes
+
+  def parse(self, lines: list[bytes]) -> list[Any]:
+    """
+    Parses lines one by one, to find the first that is not one JSON
+    value.
+
+    Args:
+      lines: Lines of the orders, blank ones included.
+
+    Returns:
+      Decoded JSON value of every line that is not blank.
+
+    Raises:
+      ValidationError: If a line is not one JSON value.
+    """
+    orders = []
+    for line in lines:
+      if not line.strip():
+        continue
+      try:
+        orders.append(orjson.loads(line))
+      except orjson.JSONDecodeError as error:
+        raise ValidationError.from_exception_data(
+          self.title,
+          [
+            {
+              "type": "json_invalid",
+              "loc": (*self.loc, self.size + len(orders)),
+              "input": line.decode(errors="replace"),
+              "ctx": {"error": error.msg},
+            }
+          ],
+        ) from None
+    return orders
+
+
+class BinaryOrderDecoder(OrderDecoder):
+  """
+  Decodes orders streamed as little-endian float64 (latitude, longitude)
+  pairs, as encode_binary writes them.
+  """
+
+  def split(self, data: bytearray) -> int:
+    return len(data) - len(data) % 16
 
-  while True:
-    x = random.uniform(minx, maxx)
-    y = random.uniform(miny, maxy)
+  def decode(self, data: bytes) -> tuple[np.ndarray, np.ndarray]:
+    if len(data) % 16:
+      raise ValueError(
+        f"Binary orders take 16 bytes each, {len(data) % 16} bytes left over"
+      )
 
-    point = Point(x, y)
-    if polygon.contains(point):
-      return point.x, point.y
+    pairs = np.frombuffer(data, dtype="<f8").reshape(-1, 2)
+    return check_coordinates(
+      pairs[:, 0], pairs[:, 1], self.title, self.loc, self.size
+    )
@@ -0,0 +1,33 @@
+from sanic import Blueprint, HTTPResponse, Request, raw
+from sanic_ext import openapi
+
+from ..serialization import dumps, typed_json
+from . import service
+from .type import CompactPipeline, Pipeline, PipelineCreate
+
+route = Blueprint("pipeline", url_prefix="/pipeline")
+
+
+@route.post("/batch")
+@openapi.body({"application/json": PipelineCreate.json()})
+@openapi.response(
+  201,
+  {"application/json": {"oneOf": [Pipeline.json(), CompactPipeline.json()]}},
+)
+@openapi.response(503, description="Too much allocation work queued")
+async def create_pipeline(request: Request) -> HTTPResponse:
+  """
+  Create orders and allocate them into baskets
+
+  Set `format` to `compact` to receive orders as (latitude, longitude)
+  pairs and baskets as indices into them.
+
+  Allocation is admitted like that of `/api/baskets/batch`: when too much
+  work is queued, requests are rejected with 503 and a `Retry-After`
+  header.
+  """
+  body = PipelineCreate.model_validate(request.json)
+  pipeline = await service.create_pipeline(body)
+  if isinstance(pipeline, CompactPipeline):
+    return typed_json(pipeline, status=201)
+  return raw(dumps(pipeline), status=201, content_type="application/json")
@@ -0,0 +1,72 @@
+from ..basket import service as basket_service
+from ..basket.util import basket_payloads, order_payloads
+from ..order import service as order_service
+from ..region import service as region_service
+from .type import CompactBasket, CompactPipeline, PipelineCreate
+
+
+async def create_pipeline(body: PipelineCreate) -> dict | CompactPipeline:
+  """
+  Generates random orders and allocates them into baskets in one step.
+
+  The generated coordinate arrays are passed straight to the allocator,
+  so orders are never serialized, parsed or validated in between. The
+  result is the same as posting the orders create_orders returns for the
+  same seed to /api/baskets/batch. Allocation is admitted and runs off
+  the event loop like that of basket requests.
+
+  Args:
+    body: PipelineCreate request containing the OrderCreate parameters
+      and the response format.
+
+  Returns:
+    Dict laid out as Pipeline, holding the orders and their baskets as
+    laid out by order_payloads and basket_payloads, or, for the compact
+    format, CompactPipeline holding the orders as (latitude, longitude)
+    pairs and the baskets as indices into them. If requested, orders and
+    baskets are tagged with their district; compact pipelines list the
+    district of every order instead.
+
+  Raises:
+    BadRequest: If no valid regions are found in the request, if all
+      specified region names are invalid or if every selected region has
+      a zero weight.
+    ServiceUnavailable: If admission control rejects the allocation.
+  """
+  longitudes, latitudes = await order_service.generate_orders(body)
+
+  async with basket_service.admit(latitudes, longitudes):
+    allocation = [
+      basket
+      async for _, component, _ in basket_service.stream_allocation(
+        latitudes, longitudes
+      )
+      for basket in component
+    ]
+
+  districts = None
+  if body.districts:
+    districts = region_service.lookup_districts(longitudes, latitudes)
+
+  if body.format == "compact":
+    return CompactPipeline.model_construct(
+      radius=basket_service.RADIUS,
+      orders=list(zip(latitudes.tolist(), longitudes.tolist())),
+      baskets=[
+        CompactBasket.model_construct(center=center_idx, orders=order_indices)
+        for center_idx, order_indices in allocation
+      ],
+      districts=districts,
+    )
+
+  return {
+    "orders": order_payloads(latitudes, longitudes, districts),
+    "baskets": basket_payloads(
+      latitudes,
+      longitudes,
+      basket_service.RADIUS,
+      allocation,
+      districts,
+      districts,
+    ),
+  }
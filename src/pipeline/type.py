@@ -0,0 +1,59 @@
+from typing import Any, Literal
+
+from pydantic import BaseModel, ConfigDict, Field
+from sanic_ext import openapi
+
+from ..basket.type import Basket
+from ..order.type import Order, OrderCreate
+
+
+@openapi.component(name="PipelineCreate")
+class PipelineCreate(OrderCreate):
+  format: Literal["full", "compact"] = Field(
+    default="full",
+    description="Response format, compact refers to orders by index",
+  )
+
+
+@openapi.component(name="Pipeline")
+class Pipeline(BaseModel):
+  model_config = ConfigDict(from_attributes=True)
+
+  orders: list[Order]
+  baskets: list[Basket]
+
+  @classmethod
+  def json(cls) -> dict[str, Any]:
+    return cls.model_json_schema(ref_template="#/components/schemas/{model}")
+
+
+@openapi.component(name="CompactBasket")
+class CompactBasket(BaseModel):
+  model_config = ConfigDict(from_attributes=True)
+
+  center: int = Field(description="Index of the basket's center order")
+  orders: list[int] = Field(description="Indices of the basket's orders")
+
+  @classmethod
+  def json(cls) -> dict[str, Any]:
+    return cls.model_json_schema(ref_template="#/components/schemas/{model}")
+
+
+@openapi.component(name="CompactPipeline")
+class CompactPipeline(BaseModel):
+  model_config = ConfigDict(from_attributes=True)
+
+  radius: float
+  orders: list[tuple[float, float]] = Field(
+    description="Order (latitude, longitude) pairs",
+  )
+  baskets: list[CompactBasket]
+  districts: list[str | None] | None = Field(
+    default=None,
+    exclude_if=lambda districts: districts is None,
+    description="District of every order, if requested",
+  )
+
+  @classmethod
+  def json(cls) -> dict[str, Any]:
+    return cls.model_json_schema(ref_template="#/components/schemas/{model}")
@@ -0,0 +1,96 @@
+import cProfile
+import os
+import re
+from contextvars import ContextVar, Token
+
+from sanic import Request
+from sanic.log import logger
+
+PROFILE_HEADER = "X-Profile"
+
+# Set while the current request is profiled. Work the profiler cannot
+# see, such as solver pool processes, checks it to run in-process.
+profiled: ContextVar[bool] = ContextVar("profiled", default=False)
+
+
+class RequestProfiler:
+  """
+  Profiles the handlers of requests that ask for it.
+
+  A request sending the X-Profile header is profiled with cProfile from
+  the start of its handler until it returns or raises, and its profile
+  is written in pstats format to the directory, named after the request
+  id. The profiler sees every thread, so the profile covers the route,
+  service and utility code and the solver, whether they run on the event
+  loop or on executor threads. It also covers any other request served
+  meanwhile.
+
+  Only one profiler can be active in a process, so while a request is
+  profiled, other requests asking for it are served unprofiled.
+
+  Args:
+    directory: Directory to write profiles to, created if missing.
+  """
+
+  def __init__(self, directory: str):
+    self.directory = directory
+    self.profile: cProfile.Profile | None = None
+    self.request_id: str | None = None
+    self.token: Token[bool] | None = None
+
+    os.makedirs(directory, exist_ok=True)
+
+  def start(self, request: Request):
+    """
+    Starts profiling a request, if it asks for it and no other request
+    is being profiled.
+
+    Args:
+      request: Request whose handler is about to run.
+    """
+    if PROFILE_HEADER not in request.headers:
+      return
+    if self.profile is not None:
+      logger.warning(f"Not profiling {request.id}: profiler is busy")
+      return
+
+    self.request_id = str(request.id)
+    request.ctx.profile = self.path(self.request_id)
+    self.token = profiled.set(True)
+    self.profile = cProfile.Profile()
+    self.profile.enable()
+
+  def stop(self, request: Request):
+    """
+    Stops profiling a request and writes its profile.
+
+    Also resets profiled: the connection task that set it goes on to
+    serve the connection's next keep-alive requests.
+
+    Args:
+      request: Request whose handler returned or raised. Ignored unless
+        it is the request being profiled.
+    """
+    if self.profile is None or str(request.id) != self.request_id:
+      return
+
+    self.profile.disable()
+    profiled.reset(self.token)
+    self.profile.dump_stats(request.ctx.profile)
+    logger.info(f"Wrote profile {request.ctx.profile}")
+    self.profile = self.request_id = self.token = None
+
+  def path(self, request_id: str) -> str:
+    """
+    Returns the path of a request's profile.
+
+    Args:
+      request_id: Request id, which clients may choose with the
+        X-Request-ID header.
+
+    Returns:
+      Path in the directory, with characters other than letters,
+      digits, underscores and dashes in the id replaced.
+    """
+    name = re.sub(r"[^A-Za-z0-9_-]", "_", request_id)
+    return os.path.join(self.directory, f"{name}.prof")
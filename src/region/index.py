@@ -0,0 +1,151 @@
+import numpy as np
+import shapely
+from shapely import MultiPolygon, Polygon, STRtree
+
+
+class RegionIndex:
+  """
+  Raster index answering which region each point falls in.
+
+  Covers the bounding box of all regions with a grid of square cells and
+  stores, for every cell, the id of the region containing it entirely.
+  Cells outside every region hold OUTSIDE and cells crossed by a region
+  boundary hold boundary_id, the largest value of the grid's dtype.
+  Points in interior and outside cells are answered with a single array
+  lookup; only points in boundary cells are tested against the exact
+  region geometries.
+
+  Args:
+    names: Region names, in the same order as polygons.
+    polygons: Region geometries. Region ids are positions in this list.
+    resolution: Cell size in degrees. Smaller cells leave fewer points
+      for the exact fallback at the cost of a larger grid.
+    grid: Grid rasterized by another index over the same regions and
+      resolution, such as one shared between processes. Rasterized
+      from the polygons if None.
+  """
+
+  OUTSIDE = 0
+
+  def __init__(
+    self,
+    names: list[str],
+    polygons: list[Polygon | MultiPolygon],
+    resolution: float = 0.0025,
+    grid: np.ndarray | None = None,
+  ):
+    self.names = list(names)
+    self.polygons = list(polygons)
+    self.resolution = resolution
+    self.tree = STRtree(self.polygons)
+    shapely.prepare(self.polygons)
+
+    dtype = np.uint8 if len(self.polygons) < 0xFF else np.uint16
+    self.boundary_id = np.iinfo(dtype).max
+
+    minx, miny, maxx, maxy = shapely.total_bounds(self.polygons)
+    self.origin = (minx, miny)
+    self.shape = (
+      int((maxy - miny) // resolution) + 1,
+      int((maxx - minx) // resolution) + 1,
+    )
+    self.grid = self.rasterize(dtype) if grid is None else grid
+
+  def rasterize(self, dtype: type) -> np.ndarray:
+    """
+    Builds the grid of region ids.
+
+    Queries an STRtree over the cell boxes once per region: cells the
+    region contains get its id, then cells its boundary crosses are
+    marked with boundary_id.
+
+    Args:
+      dtype: Unsigned integer dtype of the grid.
+
+    Returns:
+      Array of shape (rows, columns) where the cell at [row, column]
+      covers latitudes from origin[1] + row * resolution and longitudes
+      from origin[0] + column * resolution. Values are region id + 1,
+      OUTSIDE or boundary_id.
+    """
+    rows, columns = self.shape
+    minx, miny = self.origin
+    x = minx + np.arange(columns) * self.resolution
+    y = miny + np.arange(rows) * self.resolution
+    x, y = (axis.ravel() for axis in np.meshgrid(x, y))
+    cells = STRtree(shapely.box(x, y, x + self.resolution, y + self.resolution))
+
+    grid = np.full(rows * columns, self.OUTSIDE, dtype=dtype)
+    for region_id, polygon in enumerate(self.polygons):
+      grid[cells.query(polygon, predicate="contains")] = region_id + 1
+    for polygon in self.polygons:
+      grid[cells.query(polygon.boundary, predicate="intersects")] = (
+        self.boundary_id
+      )
+
+    return grid.reshape(self.shape)
+
+  def lookup(
+    self,
+    longitudes: np.ndarray,
+    latitudes: np.ndarray,
+  ) -> np.ndarray:
+    """
+    Finds the region containing each point.
+
+    Args:
+      longitudes: Array of point longitudes.
+      latitudes: Array of point latitudes, same shape as longitudes.
+
+    Returns:
+      Integer array of region ids, positions in names, with -1 for
+      points outside every region. Points on a border shared by two
+      regions get the lower id.
+    """
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    rows, columns = self.shape
+    minx, miny = self.origin
+
+    row = np.floor((latitudes - miny) / self.resolution).astype(np.intp)
+    column = np.floor((longitudes - minx) / self.resolution).astype(np.intp)
+    in_grid = (row >= 0) & (row < rows) & (column >= 0) & (column < columns)
+
+    cells = np.full(longitudes.shape, self.OUTSIDE, dtype=self.grid.dtype)
+    cells[in_grid] = self.grid[row[in_grid], column[in_grid]]
+
+    region_ids = cells.astype(np.intp) - 1
+
+    boundary = np.flatnonzero(cells == self.boundary_id)
+    region_ids.flat[boundary] = -1
+    if len(boundary):
+      x = longitudes.flat[boundary]
+      y = latitudes.flat[boundary]
+      point_idx, polygon_idx = self.tree.query(shapely.points(x, y))
+      for region_id in np.unique(polygon_idx)[::-1].tolist():
+        candidates = point_idx[polygon_idx == region_id]
+        inside = shapely.intersects_xy(
+          self.polygons[region_id], x[candidates], y[candidates]
+        )
+        region_ids.flat[boundary[candidates[inside]]] = region_id
+
+    return region_ids
+
+  def contains(
+    self,
+    longitudes: np.ndarray,
+    latitudes: np.ndarray,
+    region_ids: list[int],
+  ) -> np.ndarray:
+    """
+    Tests which points fall inside any of the given regions.
+
+    Args:
+      longitudes: Array of point longitudes.
+      latitudes: Array of point latitudes, same shape as longitudes.
+      region_ids: Ids of the regions to test against.
+
+    Returns:
+      Boolean array, True where the point lies in one of the regions.
+    """
+    return np.isin(self.lookup(longitudes, latitudes), region_ids)
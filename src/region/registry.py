@@ -0,0 +1,254 @@
+import json
+from dataclasses import dataclass
+from functools import cached_property
+from types import MappingProxyType
+from typing import Mapping
+
+import numpy as np
+import shapely
+from shapely import MultiPolygon, Polygon
+
+from .index import RegionIndex
+from .type import Region
+from .util import (
+  decode_polygons,
+  decode_regions,
+  encode_regions,
+  projected_areas,
+  region_polygon,
+)
+
+# Statistics the registry holds for every region, as from_arrays takes
+# them.
+STATISTICS = ("bounds", "areas", "projected_areas", "centroids", "vertices")
+
+
+@dataclass(frozen=True)
+class RegionRegistry:
+  """
+  Immutable, in-memory collection of every known region.
+
+  Holds the coordinates of all regions in ragged arrays, indexed by
+  region id, the position of a region in names, along with statistics
+  computed once. The arrays are the source of truth: when they are
+  memory-mapped from a region store, processes share them through the
+  page cache. Region models and geometries are derived from them only
+  when needed, see regions and polygons.
+
+  Attributes:
+    names: Name of every region, in the order of the source file.
+    types: Geometry type of every region, Polygon or MultiPolygon.
+    arrays: Read-only ragged arrays of every region's coordinates, as
+      encode_regions lays them out.
+    bounds: Array of shape (n, 4) holding every region's
+      (minx, miny, maxx, maxy) bounds.
+    areas: Planar area of every region, in square degrees.
+    projected_areas: Surface area of every region, in square kilometers,
+      see projected_areas.
+    centroids: Array of shape (n, 2) holding every region's centroid as
+      (longitude, latitude).
+    vertices: Number of vertices of every region's geometry.
+    ids: Read-only mapping from region name to region id.
+  """
+
+  names: tuple[str, ...]
+  types: tuple[str, ...]
+  arrays: Mapping[str, np.ndarray]
+  bounds: np.ndarray
+  areas: np.ndarray
+  projected_areas: np.ndarray
+  centroids: np.ndarray
+  vertices: np.ndarray
+  ids: Mapping[str, int]
+
+  @classmethod
+  def from_regions(cls, regions: list[Region]) -> "RegionRegistry":
+    """
+    Builds a registry from Region models.
+
+    Args:
+      regions: Region models. If names repeat, the last region with a
+        name is the one found by it.
+
+    Returns:
+      RegionRegistry over the regions, in the given order.
+    """
+    polygons = [region_polygon(region) for region in regions]
+    registry = cls.from_arrays(
+      [region.name for region in regions],
+      [region.type for region in regions],
+      encode_regions(regions),
+      region_statistics(polygons),
+    )
+    # The geometries are built already, so polygons need not decode them.
+    shapely.prepare(polygons)
+    registry.__dict__["polygons"] = tuple(polygons)
+    return registry
+
+  @classmethod
+  def from_arrays(
+    cls,
+    names: list[str],
+    types: list[str],
+    arrays: Mapping[str, np.ndarray],
+    statistics: Mapping[str, np.ndarray] | None = None,
+  ) -> "RegionRegistry":
+    """
+    Builds a registry over ragged arrays, without copying them.
+
+    Args:
+      names: Region names, in array order.
+      types: Region geometry types, in array order.
+      arrays: Ragged arrays as returned by encode_regions.
+      statistics: Arrays named in STATISTICS, as region_statistics
+        returns them. Computed from the region geometries if None.
+
+    Returns:
+      RegionRegistry over the arrays.
+    """
+    if statistics is None:
+      statistics = region_statistics(decode_polygons(tuple(types), arrays))
+
+    arrays = dict(arrays)
+    for array in (*arrays.values(), *statistics.values()):
+      array.flags.writeable = False
+
+    return cls(
+      names=tuple(names),
+      types=tuple(types),
+      arrays=MappingProxyType(arrays),
+      **{name: statistics[name] for name in STATISTICS},
+      ids=MappingProxyType(
+        {name: region_id for region_id, name in enumerate(names)}
+      ),
+    )
+
+  @classmethod
+  def load(cls, path: str) -> "RegionRegistry":
+    """
+    Builds a registry from a GeoJSON FeatureCollection file.
+
+    Args:
+      path: Path of the GeoJSON file. Every feature needs a name property
+        and a Polygon or MultiPolygon geometry.
+
+    Returns:
+      RegionRegistry over the file's features, in file order.
+
+    Raises:
+      FileNotFoundError: If the file does not exist.
+      json.JSONDecodeError: If the file contains invalid JSON.
+      KeyError: If required GeoJSON structure is missing.
+    """
+    with open(path, "r") as file:
+      data = json.load(file)
+
+    regions = [
+      Region(
+        name=feature["properties"]["name"],
+        type=feature["geometry"]["type"],
+        coordinates=feature["geometry"]["coordinates"],
+      )
+      for feature in data["features"]
+    ]
+
+    return cls.from_regions(regions)
+
+  def __len__(self) -> int:
+    return len(self.names)
+
+  @property
+  def regions(self) -> tuple[Region, ...]:
+    """
+    Region models of every region, rebuilt from the arrays on every
+    access.
+
+    The models hold coordinates as nested Python lists, several times
+    the size of the arrays, so they are not kept: use them for one-off
+    work such as serializing the regions.
+
+    Returns:
+      Region of every region id.
+    """
+    return tuple(decode_regions(self.names, self.types, self.arrays))
+
+  @cached_property
+  def polygons(self) -> tuple[Polygon | MultiPolygon, ...]:
+    """
+    Prepared geometry of every region, built on first use.
+
+    Returns:
+      Polygon or MultiPolygon of every region id, as region_polygon
+      returns it.
+    """
+    polygons = decode_polygons(self.types, self.arrays)
+    shapely.prepare(polygons)
+    return tuple(polygons)
+
+  def select(self, names: list[str]) -> list[int]:
+    """
+    Resolves region names into region ids.
+
+    Args:
+      names: Region names. Unknown names are ignored.
+
+    Returns:
+      Ids of the known names without duplicates, in order of first
+      appearance.
+    """
+    region_ids = (self.ids.get(name) for name in names)
+    return list(
+      dict.fromkeys(
+        region_id for region_id in region_ids if region_id is not None
+      )
+    )
+
+  def attach_index(self, grid: np.ndarray) -> RegionIndex:
+    """
+    Sets the index from a grid rasterized by another process.
+
+    Lets worker processes share the grid the main process rasterized,
+    rather than each rasterizing and holding its own.
+
+    Args:
+      grid: Grid of an index over the same regions, as RegionIndex.grid.
+
+    Returns:
+      RegionIndex over the grid, returned by index from now on.
+    """
+    index = RegionIndex(list(self.names), list(self.polygons), grid=grid)
+    # index is a cached_property, whose value lives in the instance dict.
+    self.__dict__["index"] = index
+    return index
+
+  @cached_property
+  def index(self) -> RegionIndex:
+    """
+    Raster index over all regions, built on first use.
+
+    Returns:
+      RegionIndex whose region ids are the registry's region ids.
+    """
+    return RegionIndex(list(self.names), list(self.polygons))
+
+
+def region_statistics(
+  polygons: list[Polygon | MultiPolygon],
+) -> dict[str, np.ndarray]:
+  """
+  Computes the statistics a registry holds for every region.
+
+  Args:
+    polygons: Geometry of every region, as region_polygon returns it.
+
+  Returns:
+    Mapping from every name in STATISTICS to its array, see the
+    attributes of RegionRegistry.
+  """
+  return {
+    "bounds": shapely.bounds(polygons).reshape(-1, 4),
+    "areas": shapely.area(polygons),
+    "projected_areas": projected_areas(polygons),
+    "centroids": shapely.get_coordinates(shapely.centroid(polygons)),
+    "vertices": shapely.get_num_coordinates(polygons),
+  }
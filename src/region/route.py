@@ -1,16 +1,72 @@
-from sanic import Blueprint, Request, json
-from sanic.response import JSONResponse
+from sanic import Blueprint, HTTPResponse, Request
 from sanic_ext import openapi
 
+from ..serialization import typed_json
 from . import service
-from .type import Regions
+from .type import (
+  Districts,
+  DistrictsLookup,
+  Regions,
+  RegionsQuery,
+  RegionsSummary,
+)
+from .util import zoom_tolerance
 
 route = Blueprint("region", url_prefix="/regions")
 
+CACHE_CONTROL = "public, no-cache"
+
 
 @route.get("/")
 @openapi.response(200, {"application/json": Regions.json()})
-async def get_regions(_: Request) -> JSONResponse:
-  """Get regions"""
-  regions = await service.get_regions()
-  return json([region.model_dump() for region in regions])
+@openapi.response(304, description="Not Modified")
+@openapi.parameter("zoom", int, "query")
+@openapi.parameter("tolerance", float, "query")
+async def get_regions(request: Request) -> HTTPResponse:
+  """
+  Get regions
+
+  Pass `zoom` to receive regions simplified for display at that map zoom
+  level, or `tolerance` to choose the simplification tolerance in
+  degrees. Simplified regions are served from a fixed set of levels of
+  detail, the coarsest one within the requested tolerance.
+
+  Responses carry an `ETag`; send it back in `If-None-Match` to receive
+  `304 Not Modified` while the regions are unchanged. Bodies are served
+  gzip or brotli compressed as `Accept-Encoding` allows.
+  """
+  query = RegionsQuery.model_validate(dict(request.query_args))
+
+  tolerance = 0.0
+  if query.tolerance is not None:
+    tolerance = query.tolerance
+  elif query.zoom is not None:
+    tolerance = zoom_tolerance(query.zoom)
+
+  body = service.get_regions_body(tolerance)
+  return body.respond(request, CACHE_CONTROL)
+
+
+@route.get("/summary")
+@openapi.response(200, {"application/json": RegionsSummary.json()})
+@openapi.response(304, description="Not Modified")
+async def get_regions_summary(request: Request) -> HTTPResponse:
+  """
+  Get region statistics
+
+  Lists the area in square kilometers, bounding box, centroid and vertex
+  count of every region, without their coordinates. Cached and
+  compressed like `/regions`.
+  """
+  body = service.get_summary_body()
+  return body.respond(request, CACHE_CONTROL)
+
+
+@route.post("/lookup")
+@openapi.body({"application/json": DistrictsLookup.json()})
+@openapi.response(200, {"application/json": Districts.json()})
+async def lookup_districts(request: Request) -> HTTPResponse:
+  """Look up the region of points"""
+  body = DistrictsLookup.model_validate(request.json)
+  districts = await service.get_districts(body)
+  return typed_json(districts)
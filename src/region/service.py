@@ -1,39 +1,250 @@
-import json
+import numpy as np
+import shapely
+from sanic.log import logger
 
-from .type import Region
+from ..encoding import StaticBody
+from .registry import RegionRegistry
+from .store import compile_store, read_store, source_digest
+from .type import (
+  Districts,
+  DistrictsLookup,
+  Region,
+  Regions,
+  RegionsSummary,
+  RegionSummary,
+)
+from .util import geometry_region, zoom_tolerance
 
+REGIONS_PATH = "coordinates.json"
+REGIONS_STORE_PATH = "coordinates.bin"
+LOD_ZOOMS = (8, 10, 12, 14)
 
-async def get_regions() -> list[Region]:
+registry: RegionRegistry | None = None
+regions_bodies: dict[float, StaticBody] = {}
+summary_body: StaticBody | None = None
+
+
+def load_registry(
+  path: str = REGIONS_PATH,
+  store: str | None = None,
+) -> RegionRegistry:
   """
-  Loads geographic regions from coordinates.json file.
+  Loads the region registry, replacing any previously loaded one.
 
-  Reads a GeoJSON FeatureCollection file and converts each feature
-  into a Region object. Supports both Polygon and MultiPolygon
-  geometry types.
+  Called once at app startup, so requests never read the regions file.
+  With a store, the registry is memory-mapped from the binary store
+  compiled from the source file. A missing store, or one compiled from
+  a different version of the source, is rebuilt from the source first.
 
   Args:
-    None. Reads from "coordinates.json" file in the current directory.
+    path: Path of the GeoJSON FeatureCollection file to load.
+    store: Path of the binary store compiled from path, or None to parse
+      the GeoJSON file directly.
 
   Returns:
-    List of Region objects, each containing name, type, and coordinates
-    from the GeoJSON features. Returns empty list if file contains no
-    features.
+    The loaded RegionRegistry.
 
   Raises:
-    FileNotFoundError: If coordinates.json file does not exist.
+    FileNotFoundError: If the file does not exist.
     json.JSONDecodeError: If the file contains invalid JSON.
     KeyError: If required GeoJSON structure is missing.
   """
-  with open("coordinates.json", "r") as file:
-    data = json.load(file)
+  global registry, regions_bodies, summary_body
+
+  regions_bodies = {}
+  summary_body = None
+
+  if store is None:
+    registry = RegionRegistry.load(path)
+    return registry
+
+  digest = source_digest(path)
+  registry = read_store(store, digest)
+  if registry is None:
+    try:
+      registry = compile_store(path, store)
+    except OSError as error:
+      logger.warning(f"Could not write region store {store}: {error}")
+      registry = RegionRegistry.load(path)
+
+  return registry
+
+
+def get_registry() -> RegionRegistry:
+  """
+  Returns the region registry, loading it on first use.
+
+  Returns:
+    RegionRegistry loaded at startup or, outside a running app, on the
+    first call. The same registry is returned by every later call.
+  """
+  if registry is None:
+    return load_registry()
+
+  return registry
+
+
+async def get_regions() -> list[Region]:
+  """
+  Returns the geographic regions from the region registry.
+
+  Args:
+    None. Reads from the registry loaded from "coordinates.json".
+
+  Returns:
+    List of Region objects, each containing name, type, and coordinates
+    from the GeoJSON features. Returns empty list if the file contains
+    no features.
+  """
+  return list(get_registry().regions)
+
+
+def get_regions_body(tolerance: float = 0.0) -> StaticBody:
+  """
+  Returns the serialized regions at a level of detail, building it once.
+
+  Besides full resolution, regions are available simplified for every
+  zoom level in LOD_ZOOMS, with a tolerance of one pixel at that zoom.
+  The requested tolerance is rounded down to the coarsest level not
+  exceeding it. Simplification preserves the shared borders between
+  regions, so simplified regions still tile without gaps or overlaps.
+
+  The regions never change while the registry is loaded, so each level
+  is simplified, serialized and compressed on its first call and every
+  later call, until the registry is reloaded, returns the same bytes.
+
+  Args:
+    tolerance: Largest acceptable deviation from the full resolution
+      boundaries, in degrees. 0 for full resolution.
+
+  Returns:
+    StaticBody holding the JSON list of regions at the chosen level, in
+    every available content coding.
+  """
+  levels = [zoom_tolerance(zoom) for zoom in LOD_ZOOMS]
+  level = max((level for level in levels if level <= tolerance), default=0.0)
+
+  body = regions_bodies.get(level)
+  if body is None:
+    registry = get_registry()
+    regions = list(registry.regions)
+    if level > 0:
+      polygons = shapely.coverage_simplify(list(registry.polygons), level)
+      regions = [
+        geometry_region(region.name, polygon)
+        for region, polygon in zip(regions, polygons)
+      ]
+
+    body = StaticBody.build(
+      Regions(regions).model_dump_json().encode(), "application/json"
+    )
+    regions_bodies[level] = body
 
-    regions = []
-    for feature in data["features"]:
-      name = feature["properties"]["name"]
-      type = feature["geometry"]["type"]
-      coordinates = feature["geometry"]["coordinates"]
+  return body
 
-      region = Region(name=name, type=type, coordinates=coordinates)
-      regions.append(region)
 
-    return regions
+def get_regions_summary() -> RegionsSummary:
+  """
+  Summarizes every region without its coordinates.
+
+  Args:
+    None. Reads the statistics the region registry computed on loading.
+
+  Returns:
+    RegionsSummary holding the area, bounds, centroid and vertex count
+    of every region, in registry order.
+  """
+  registry = get_registry()
+  return RegionsSummary(
+    [
+      RegionSummary(
+        name=name,
+        type=type,
+        area=area,
+        bounds=bounds,
+        centroid=centroid,
+        vertices=vertices,
+      )
+      for name, type, area, bounds, centroid, vertices in zip(
+        registry.names,
+        registry.types,
+        registry.projected_areas.tolist(),
+        registry.bounds.tolist(),
+        registry.centroids.tolist(),
+        registry.vertices.tolist(),
+      )
+    ]
+  )
+
+
+def get_summary_body() -> StaticBody:
+  """
+  Returns the serialized regions summary, building it once.
+
+  Like the regions themselves, the summary only changes when the
+  registry is reloaded.
+
+  Returns:
+    StaticBody holding the JSON regions summary in every available
+    content coding.
+  """
+  global summary_body
+
+  if summary_body is None:
+    summary_body = StaticBody.build(
+      get_regions_summary().model_dump_json().encode(), "application/json"
+    )
+
+  return summary_body
+
+
+def build_regions_bodies() -> None:
+  """
+  Builds the regions summary and the serialized regions at every level
+  of detail.
+
+  Called at app startup, so no request pays for simplification.
+  """
+  get_summary_body()
+  get_regions_body()
+  for zoom in LOD_ZOOMS:
+    get_regions_body(zoom_tolerance(zoom))
+
+
+async def get_districts(body: DistrictsLookup) -> Districts:
+  """
+  Finds the region each requested point falls in.
+
+  Args:
+    body: DistrictsLookup request containing (latitude, longitude) pairs.
+
+  Returns:
+    Districts holding the region name of every point, in request order,
+    with None for points outside every region.
+  """
+  coordinates = np.array(body.coordinates, dtype=np.float64).reshape(-1, 2)
+  districts = lookup_districts(coordinates[:, 1], coordinates[:, 0])
+  return Districts(districts=districts)
+
+
+def lookup_districts(
+  longitudes: np.ndarray,
+  latitudes: np.ndarray,
+) -> list[str | None]:
+  """
+  Finds the region each point falls in, for a whole array at once.
+
+  Args:
+    longitudes: Array of point longitudes.
+    latitudes: Array of point latitudes, same shape as longitudes.
+
+  Returns:
+    Name of the region containing each point, or None for points outside
+    every region. Points on a border shared by two regions get the region
+    listed first in the regions file.
+  """
+  registry = get_registry()
+  # Region id -1 marks points outside every region and picks the None.
+  names = (*registry.names, None)
+  region_ids = registry.index.lookup(longitudes, latitudes)
+  return [names[region_id] for region_id in region_ids.ravel().tolist()]
@@ -0,0 +1,168 @@
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from .registry import STATISTICS, RegionRegistry
+
+MAGIC = b"REGIONS\x00"
+VERSION = 2
+ALIGNMENT = 8
+
+
+def source_digest(source: str) -> str:
+  """
+  Computes the digest identifying a version of a regions source file.
+
+  Args:
+    source: Path of the GeoJSON source file.
+
+  Returns:
+    Hex SHA-256 digest of the file's contents.
+  """
+  with open(source, "rb") as file:
+    return hashlib.sha256(file.read()).hexdigest()
+
+
+def write_store(registry: RegionRegistry, digest: str, path: str) -> None:
+  """
+  Writes a region registry to a binary store file.
+
+  The file starts with MAGIC, the byte length of a JSON header as a
+  little-endian uint64 and the header itself. The header records the
+  store version, the source digest, the region names and types and the
+  offset, dtype and shape of every array: the ragged coordinate arrays
+  and the region statistics. The arrays follow, each aligned to
+  ALIGNMENT bytes. The file is written next to its final path and moved
+  into place, so readers never see a partial store.
+
+  Args:
+    registry: Registry to store.
+    digest: Digest of the source file the regions were read from.
+    path: Path of the store file.
+  """
+  arrays = {
+    **registry.arrays,
+    **{name: getattr(registry, name) for name in STATISTICS},
+  }
+
+  specs = {}
+  offset = 0
+  for name, array in arrays.items():
+    specs[name] = {
+      "offset": offset,
+      "dtype": array.dtype.str,
+      "shape": list(array.shape),
+    }
+    offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+  header = json.dumps(
+    {
+      "version": VERSION,
+      "digest": digest,
+      "names": list(registry.names),
+      "types": list(registry.types),
+      "arrays": specs,
+    }
+  ).encode()
+  header += b" " * (-(len(MAGIC) + 8 + len(header)) % ALIGNMENT)
+
+  temporary = f"{path}.{os.getpid()}.tmp"
+  with open(temporary, "wb") as file:
+    file.write(MAGIC)
+    file.write(len(header).to_bytes(8, "little"))
+    file.write(header)
+    for array in arrays.values():
+      file.write(array.tobytes())
+      file.write(b"\0" * (-array.nbytes % ALIGNMENT))
+  os.replace(temporary, path)
+
+
+def read_store(path: str, digest: str) -> RegionRegistry | None:
+  """
+  Loads a region registry from a binary store file.
+
+  The arrays are memory-mapped rather than read, and the registry is
+  built over them without decoding any region, so processes loading the
+  same store share its pages through the page cache.
+
+  Args:
+    path: Path of the store file.
+    digest: Digest of the current source file.
+
+  Returns:
+    RegionRegistry over the stored regions, or None if the file does not
+    exist, is not a store of this version, was built from a different
+    version of the source or is corrupt or truncated.
+  """
+  try:
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+  except (FileNotFoundError, ValueError):
+    return None
+
+  start = len(MAGIC) + 8
+  if len(buffer) < start or bytes(buffer[: len(MAGIC)]) != MAGIC:
+    return None
+
+  try:
+    size = int.from_bytes(bytes(buffer[len(MAGIC) : start]), "little")
+    header = json.loads(bytes(buffer[start : start + size]))
+    if header["version"] != VERSION or header["digest"] != digest:
+      return None
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+      dtype = np.dtype(spec["dtype"])
+      offset = start + size + spec["offset"]
+      end = offset + int(np.prod(spec["shape"])) * dtype.itemsize
+      if end > len(buffer):
+        return None
+      arrays[name] = buffer[offset:end].view(dtype).reshape(spec["shape"])
+
+    statistics = {name: arrays.pop(name) for name in STATISTICS}
+    if (
+      len(arrays["region_offsets"]) != len(header["names"]) + 1
+      or arrays["polygon_offsets"][-1] != len(arrays["ring_offsets"]) - 1
+      or arrays["ring_offsets"][-1] != len(arrays["coordinates"])
+    ):
+      return None
+    return RegionRegistry.from_arrays(
+      header["names"], header["types"], arrays, statistics
+    )
+  except (ValueError, KeyError, TypeError, IndexError):
+    return None
+
+
+def compile_store(source: str, path: str) -> RegionRegistry:
+  """
+  Compiles a GeoJSON regions file into a binary store.
+
+  Args:
+    source: Path of the GeoJSON source file.
+    path: Path of the store file to write.
+
+  Returns:
+    RegionRegistry loaded from the source.
+  """
+  digest = source_digest(source)
+  registry = RegionRegistry.load(source)
+  write_store(registry, digest, path)
+  return registry
+
+
+def main(argv: list[str] | None = None) -> None:
+  parser = argparse.ArgumentParser(
+    description="Compile a GeoJSON regions file into a binary store.",
+  )
+  parser.add_argument("source", nargs="?", default="coordinates.json")
+  parser.add_argument("output", nargs="?", default="coordinates.bin")
+  args = parser.parse_args(argv)
+
+  registry = compile_store(args.source, args.output)
+  print(f"Compiled {len(registry)} regions into {args.output}")
+
+
+if __name__ == "__main__":
+  main()
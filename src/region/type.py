@@ -1,6 +1,6 @@
 from typing import Literal, Union
 
-from pydantic import BaseModel, ConfigDict, RootModel
+from pydantic import BaseModel, ConfigDict, Field, RootModel
 from sanic_ext import openapi
 
 
@@ -24,3 +24,72 @@ class Regions(RootModel[list[Region]]):
   @classmethod
   def json(cls) -> dict[str, any]:
     return cls.model_json_schema(ref_template="#/components/schemas/{model}")
+
+
+@openapi.component(name="RegionSummary")
+class RegionSummary(BaseModel):
+  model_config = ConfigDict(from_attributes=True)
+
+  name: str
+  type: Literal["Polygon", "MultiPolygon"]
+  area: float = Field(description="Surface area in square kilometers")
+  bounds: tuple[float, float, float, float] = Field(
+    description="Bounding box as (min longitude, min latitude, max "
+    "longitude, max latitude)",
+  )
+  centroid: tuple[float, float] = Field(
+    description="Centroid as (longitude, latitude)",
+  )
+  vertices: int = Field(description="Number of boundary vertices")
+
+  @classmethod
+  def json(cls) -> dict[str, any]:
+    return cls.model_json_schema(ref_template="#/components/schemas/{model}")
+
+
+class RegionsSummary(RootModel[list[RegionSummary]]):
+  @classmethod
+  def json(cls) -> dict[str, any]:
+    return cls.model_json_schema(ref_template="#/components/schemas/{model}")
+
+
+class RegionsQuery(BaseModel):
+  model_config = ConfigDict(from_attributes=True)
+
+  zoom: int | None = Field(
+    default=None,
+    ge=0,
+    le=24,
+    description="Map zoom level to simplify regions for",
+  )
+  tolerance: float | None = Field(
+    default=None,
+    ge=0,
+    description="Simplification tolerance in degrees, overrides zoom",
+  )
+
+
+@openapi.component(name="DistrictsLookup")
+class DistrictsLookup(BaseModel):
+  model_config = ConfigDict(from_attributes=True)
+
+  coordinates: list[tuple[float, float]] = Field(
+    description="Points to look up as (latitude, longitude) pairs",
+  )
+
+  @classmethod
+  def json(cls) -> dict[str, any]:
+    return cls.model_json_schema(ref_template="#/components/schemas/{model}")
+
+
+@openapi.component(name="Districts")
+class Districts(BaseModel):
+  model_config = ConfigDict(from_attributes=True)
+
+  districts: list[str | None] = Field(
+    description="Region of every point, null for points outside all regions",
+  )
+
+  @classmethod
+  def json(cls) -> dict[str, any]:
+    return cls.model_json_schema(ref_template="#/components/schemas/{model}")
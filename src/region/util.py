@@ -0,0 +1,231 @@
+from typing import Mapping
+
+import numpy as np
+import shapely
+from shapely import GeometryType, MultiPolygon, Polygon
+
+from .type import Region
+
+EARTH_RADIUS = 6371.0088
+
+
+def region_polygon(region: Region) -> Polygon | MultiPolygon:
+  """
+  Converts a Region object to a Shapely Polygon or MultiPolygon.
+
+  Transforms the region's coordinate data into a Shapely geometry object
+  based on the region type. Handles both single Polygon and MultiPolygon
+  geometries.
+
+  Args:
+    region: Region object containing type and coordinates data.
+
+  Returns:
+    Polygon if region type is "Polygon", MultiPolygon if region type is
+    "MultiPolygon". The returned geometry can be used for spatial
+    operations like point-in-polygon tests.
+  """
+  coordinates = region.coordinates
+
+  if region.type == "Polygon":
+    return Polygon(coordinates[0])
+  else:
+    polygons = [Polygon(coordinate[0]) for coordinate in coordinates]
+    return MultiPolygon(polygons)
+
+
+def geometry_region(name: str, geometry: Polygon | MultiPolygon) -> Region:
+  """
+  Converts a Shapely Polygon or MultiPolygon back to a Region object.
+
+  Inverse of region_polygon, keeping interior rings if the geometry has
+  any. The region is constructed without validation, since the
+  coordinates come from a valid geometry.
+
+  Args:
+    name: Name of the region.
+    geometry: Polygon or MultiPolygon of the region.
+
+  Returns:
+    Region whose type and coordinates follow the GeoJSON layout of the
+    geometry.
+  """
+  if isinstance(geometry, Polygon):
+    return Region.model_construct(
+      name=name,
+      type="Polygon",
+      coordinates=polygon_rings(geometry),
+    )
+
+  return Region.model_construct(
+    name=name,
+    type="MultiPolygon",
+    coordinates=[polygon_rings(polygon) for polygon in geometry.geoms],
+  )
+
+
+def polygon_rings(polygon: Polygon) -> list[list[list[float]]]:
+  """
+  Lists the rings of a polygon as GeoJSON coordinates.
+
+  Args:
+    polygon: Polygon to convert.
+
+  Returns:
+    List holding the exterior ring followed by the interior rings, each
+    a list of [longitude, latitude] pairs.
+  """
+  rings = [polygon.exterior, *polygon.interiors]
+  return [shapely.get_coordinates(ring).tolist() for ring in rings]
+
+
+def zoom_tolerance(zoom: int) -> float:
+  """
+  Returns the size of a map pixel at a zoom level, in degrees.
+
+  Uses the 256-pixel tiles of web maps, where the world is 360 degrees
+  wide at zoom 0 and each zoom level halves the size of a pixel.
+
+  Args:
+    zoom: Map zoom level.
+
+  Returns:
+    Degrees of longitude covered by one pixel at the equator.
+  """
+  return 360 / (256 * 2**zoom)
+
+
+def projected_areas(geometries: list[Polygon | MultiPolygon]) -> np.ndarray:
+  """
+  Measures geometries on the sinusoidal equal-area projection.
+
+  Longitude/latitude coordinates are projected onto a sphere with the
+  mean radius of the Earth, where planar areas are true surface areas,
+  so regions at different latitudes compare fairly.
+
+  Args:
+    geometries: Geometries with [longitude, latitude] coordinates.
+
+  Returns:
+    Float array with the area of every geometry, in square kilometers.
+  """
+
+  def project(coordinates: np.ndarray) -> np.ndarray:
+    radians = np.radians(coordinates)
+    return EARTH_RADIUS * np.column_stack(
+      (radians[:, 0] * np.cos(radians[:, 1]), radians[:, 1])
+    )
+
+  return shapely.area(shapely.transform(geometries, project))
+
+
+def encode_regions(regions: list[Region]) -> dict[str, np.ndarray]:
+  """
+  Flattens region coordinates into ragged arrays.
+
+  Every region is treated as a list of polygons, a Polygon region being a
+  list of one. Rings of polygon p are rings polygon_offsets[p] up to
+  polygon_offsets[p + 1], points of ring r are coordinates
+  ring_offsets[r] up to ring_offsets[r + 1] and likewise for the polygons
+  of each region in region_offsets.
+
+  Args:
+    regions: Region models to encode.
+
+  Returns:
+    Mapping with the float64 coordinates array of shape (n, 2) and the
+    int64 ring_offsets, polygon_offsets and region_offsets arrays.
+  """
+  coordinates = []
+  ring_offsets = [0]
+  polygon_offsets = [0]
+  region_offsets = [0]
+
+  for region in regions:
+    polygons = (
+      [region.coordinates] if region.type == "Polygon" else region.coordinates
+    )
+    for rings in polygons:
+      for ring in rings:
+        coordinates.extend(ring)
+        ring_offsets.append(len(coordinates))
+      polygon_offsets.append(len(ring_offsets) - 1)
+    region_offsets.append(len(polygon_offsets) - 1)
+
+  return {
+    "coordinates": np.array(coordinates, dtype=np.float64).reshape(-1, 2),
+    "ring_offsets": np.array(ring_offsets, dtype=np.int64),
+    "polygon_offsets": np.array(polygon_offsets, dtype=np.int64),
+    "region_offsets": np.array(region_offsets, dtype=np.int64),
+  }
+
+
+def decode_regions(
+  names: tuple[str, ...],
+  types: tuple[str, ...],
+  arrays: Mapping[str, np.ndarray],
+) -> list[Region]:
+  """
+  Rebuilds Region models from ragged arrays.
+
+  Regions are constructed without validation, since the arrays were
+  written from validated regions.
+
+  Args:
+    names: Region names, in array order.
+    types: Region geometry types, in array order.
+    arrays: Ragged arrays as returned by encode_regions.
+
+  Returns:
+    Region of every name, holding its coordinates as nested lists.
+  """
+  points = arrays["coordinates"].tolist()
+  bounds = arrays["ring_offsets"].tolist()
+  rings = [points[start:end] for start, end in zip(bounds, bounds[1:])]
+  bounds = arrays["polygon_offsets"].tolist()
+  polygons = [rings[start:end] for start, end in zip(bounds, bounds[1:])]
+  region_offsets = arrays["region_offsets"].tolist()
+
+  regions = []
+  for region_id, (name, type) in enumerate(zip(names, types)):
+    start, end = region_offsets[region_id], region_offsets[region_id + 1]
+    coordinates = polygons[start] if type == "Polygon" else polygons[start:end]
+    regions.append(
+      Region.model_construct(name=name, type=type, coordinates=coordinates)
+    )
+  return regions
+
+
+def decode_polygons(
+  types: tuple[str, ...],
+  arrays: Mapping[str, np.ndarray],
+) -> list[Polygon | MultiPolygon]:
+  """
+  Builds region geometries from ragged arrays in bulk.
+
+  Geometries match region_polygon: only the exterior ring of each
+  polygon is kept.
+
+  Args:
+    types: Region geometry types, in array order.
+    arrays: Ragged arrays as returned by encode_regions.
+
+  Returns:
+    Polygon or MultiPolygon of every region.
+  """
+  parts = shapely.from_ragged_array(
+    GeometryType.POLYGON,
+    arrays["coordinates"],
+    (arrays["ring_offsets"], arrays["polygon_offsets"]),
+  )
+  parts = shapely.polygons(shapely.get_exterior_ring(parts))
+  region_offsets = arrays["region_offsets"].tolist()
+
+  return [
+    parts[region_offsets[region_id]]
+    if type == "Polygon"
+    else MultiPolygon(
+      list(parts[region_offsets[region_id] : region_offsets[region_id + 1]])
+    )
+    for region_id, type in enumerate(types)
+  ]
@@ -0,0 +1,107 @@
+from functools import cache
+from typing import Any
+
+import numpy as np
+import orjson
+from pydantic import BaseModel, TypeAdapter
+from sanic import HTTPResponse, raw
+
+# Integer keys occur in generated documents, such as the OpenAPI spec's
+# response status codes.
+OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def default(value: Any) -> Any:
+  """
+  Converts values orjson cannot serialize natively.
+
+  Args:
+    value: Value orjson found no native encoding for.
+
+  Returns:
+    JSON-compatible representation of the value.
+
+  Raises:
+    TypeError: If the value has no JSON representation.
+  """
+  if isinstance(value, BaseModel):
+    return value.model_dump(mode="json")
+  if isinstance(value, np.generic):
+    return value.item()
+  raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value: Any, **_: Any) -> bytes:
+  """
+  Encodes a value as JSON with orjson.
+
+  Used by the app for every json response. NumPy arrays and scalars are
+  encoded natively, without converting them to lists first.
+
+  Args:
+    value: Value to encode.
+
+  Returns:
+    UTF-8 encoded JSON.
+  """
+  return orjson.dumps(value, default=default, option=OPTIONS)
+
+
+def loads(data: str | bytes) -> Any:
+  """
+  Decodes JSON with orjson.
+
+  Used by the app to parse request bodies into request.json.
+
+  Args:
+    data: JSON document.
+
+  Returns:
+    The decoded value.
+  """
+  return orjson.loads(data)
+
+
+@cache
+def type_adapter(type: Any) -> TypeAdapter:
+  """
+  Returns the TypeAdapter of a type, building it on first use.
+
+  Args:
+    type: Type to adapt, such as list[Order].
+
+  Returns:
+    TypeAdapter whose serializer is compiled once per type.
+  """
+  return TypeAdapter(type)
+
+
+def typed_json(
+  value: Any,
+  type: Any = None,
+  status: int = 200,
+  headers: dict[str, str] | None = None,
+) -> HTTPResponse:
+  """
+  Responds with a value serialized from its type.
+
+  Serializes models straight to JSON bytes with their compiled pydantic
+  serializer, so responses never go through an intermediate dict.
+
+  Args:
+    value: Model, or container of models, to serialize.
+    type: Type of the value, such as list[Basket]. Defaults to the class
+      of the value.
+    status: Response status code.
+    headers: Additional response headers.
+
+  Returns:
+    JSON response with the serialized value.
+  """
+  body = type_adapter(type or value.__class__).dump_json(value)
+  return raw(
+    body,
+    status=status,
+    headers=headers,
+    content_type="application/json",
+  )
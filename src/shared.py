@@ -0,0 +1,186 @@
+import json
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.synchronize import Lock
+
+import numpy as np
+
+HEADER_SIZE = 256
+
+
+def share_array(array: np.ndarray) -> SharedMemory:
+  """
+  Copies an array into a new shared memory block.
+
+  The block starts with a JSON header recording the array's dtype and
+  shape, padded to HEADER_SIZE bytes, so the block alone is enough to
+  attach to the array. Blocks can be put in Sanic's shared_ctx, which
+  hands them to every worker.
+
+  Args:
+    array: Array to share.
+
+  Returns:
+    The shared memory block. The caller owns it and unlinks it once no
+    process needs it anymore.
+  """
+  array = np.ascontiguousarray(array)
+  header = json.dumps(
+    {"dtype": array.dtype.str, "shape": list(array.shape)}
+  ).encode()
+
+  memory = SharedMemory(create=True, size=HEADER_SIZE + max(array.nbytes, 1))
+  memory.buf[: len(header)] = header
+  memory.buf[len(header) : HEADER_SIZE] = b" " * (HEADER_SIZE - len(header))
+  memory.buf[HEADER_SIZE : HEADER_SIZE + array.nbytes] = array.tobytes()
+  return memory
+
+
+def attach_array(memory: SharedMemory) -> np.ndarray:
+  """
+  Views the array held by a shared memory block.
+
+  Args:
+    memory: Block written by share_array. It must stay open while the
+      returned array is in use.
+
+  Returns:
+    Read-only array backed by the block, without copying it.
+  """
+  header = json.loads(bytes(memory.buf[:HEADER_SIZE]))
+  array = np.ndarray(
+    header["shape"],
+    dtype=np.dtype(header["dtype"]),
+    buffer=memory.buf,
+    offset=HEADER_SIZE,
+  )
+  array.flags.writeable = False
+  return array
+
+
+class SharedCache:
+  """
+  Byte cache in shared memory, shared by every process attached to it.
+
+  Values are stored back to back in a ring buffer: once the buffer is
+  full, new values overwrite the oldest ones, which are evicted. Keys
+  are 16-byte digests, looked up in a table of slots holding the offset
+  and length of every value. Every access holds the cache's lock, and
+  values are copied out, so readers never see a value being overwritten.
+
+  Args:
+    memory: Block created by create, holding the state, the slot table
+      and the ring buffer.
+    lock: Lock shared by every process attached to the cache.
+  """
+
+  STATE_SIZE = 3 * 8
+  SLOT_SIZE = 4 * 8
+
+  def __init__(self, memory: SharedMemory, lock: Lock):
+    self.memory = memory
+    self.lock = lock
+
+    # Layout: state (head offset, next slot, slot count), then the key,
+    # offset and length of every slot, then the ring buffer.
+    buffer = memory.buf
+    self.state = np.ndarray(3, dtype=np.int64, buffer=buffer)
+    slots = self.slots = int(self.state[2])
+    offset = self.STATE_SIZE
+    self.keys = np.ndarray(
+      (slots, 2), dtype=np.uint64, buffer=buffer, offset=offset
+    )
+    offset += self.keys.nbytes
+    self.offsets = np.ndarray(
+      slots, dtype=np.int64, buffer=buffer, offset=offset
+    )
+    offset += self.offsets.nbytes
+    self.lengths = np.ndarray(
+      slots, dtype=np.int64, buffer=buffer, offset=offset
+    )
+    offset += self.lengths.nbytes
+    self.data = buffer[offset:]
+
+  @classmethod
+  def create(
+    cls, lock: Lock, capacity: int, slots: int = 1_024
+  ) -> "SharedCache":
+    """
+    Creates an empty cache in a new shared memory block.
+
+    Args:
+      lock: Lock, such as multiprocessing.Lock(), guarding the cache.
+      capacity: Size of the ring buffer, in bytes. Values larger than a
+        quarter of it are not cached.
+      slots: Maximum number of values held at once.
+
+    Returns:
+      The cache. Its memory block is owned by the caller, who unlinks it
+      once no process needs it anymore.
+    """
+    table = cls.STATE_SIZE + slots * cls.SLOT_SIZE
+    memory = SharedMemory(create=True, size=table + capacity)
+    memory.buf[:table] = bytes(table)
+    np.ndarray(3, dtype=np.int64, buffer=memory.buf)[2] = slots
+    return cls(memory, lock)
+
+  def get(self, key: bytes) -> bytes | None:
+    """
+    Looks up a value.
+
+    Args:
+      key: 16-byte digest identifying the value.
+
+    Returns:
+      Copy of the cached value, or None if it is not cached.
+    """
+    digest = np.frombuffer(key, dtype=np.uint64)
+    with self.lock:
+      matches = np.flatnonzero(
+        (self.lengths > 0) & (self.keys == digest).all(axis=1)
+      )
+      if not len(matches):
+        return None
+      slot = matches[-1]
+      start = int(self.offsets[slot])
+      return bytes(self.data[start : start + int(self.lengths[slot])])
+
+  def put(self, key: bytes, value: bytes):
+    """
+    Stores a value, evicting the oldest values it overwrites.
+
+    Args:
+      key: 16-byte digest identifying the value.
+      value: Bytes to store. Empty values and values larger than a
+        quarter of the ring buffer are ignored.
+    """
+    size = len(value)
+    if size == 0 or size > len(self.data) // 4:
+      return
+
+    digest = np.frombuffer(key, dtype=np.uint64)
+    with self.lock:
+      head, slot, _ = self.state.tolist()
+      if head + size > len(self.data):
+        head = 0
+
+      overwritten = (self.offsets < head + size) & (
+        self.offsets + self.lengths > head
+      )
+      self.lengths[overwritten] = 0
+
+      self.data[head : head + size] = value
+      self.keys[slot] = digest
+      self.offsets[slot] = head
+      self.lengths[slot] = size
+      self.state[:2] = (head + size, (slot + 1) % self.slots)
+
+  def close(self):
+    """
+    Detaches this process from the cache.
+
+    The views into the block are released first, since a block cannot
+    be closed while arrays still point into it.
+    """
+    del self.state, self.keys, self.offsets, self.lengths
+    self.data.release()
+    self.memory.close()
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from sanic import exceptions
+
+from src.basket.admission import AdmissionQueue
+
+
+async def hold(queue: AdmissionQueue, cost: int, release: asyncio.Event):
+  """
+  Holds admission of a request until released.
+  """
+  async with queue.admit(cost):
+    await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_admission_queue():
+  """
+  Tests admitting requests by cost.
+
+  Verifies that requests run while they fit in capacity, that requests
+  that do not fit wait in order until capacity is freed, and that the
+  state reports running and waiting requests and their cost.
+  """
+  queue = AdmissionQueue(capacity=10, budget=20)
+  release = [asyncio.Event() for _ in range(3)]
+
+  first = asyncio.create_task(hold(queue, 6, release[0]))
+  second = asyncio.create_task(hold(queue, 6, release[1]))
+  third = asyncio.create_task(hold(queue, 4, release[2]))
+  await asyncio.sleep(0)
+
+  state = queue.state()
+  assert (state.running, state.running_cost) == (1, 6)
+  assert (state.waiting, state.waiting_cost) == (2, 10)
+
+  release[0].set()
+  await first
+  await asyncio.sleep(0)
+
+  state = queue.state()
+  assert (state.running, state.running_cost) == (2, 10)
+  assert state.waiting == 0
+
+  release[1].set()
+  release[2].set()
+  await asyncio.gather(second, third)
+  state = queue.state()
+  assert (state.running, state.running_cost, state.admitted) == (0, 0, 3)
+
+
+@pytest.mark.asyncio
+async def test_admission_queue_over_budget():
+  """
+  Tests rejecting requests once the queue is over budget.
+
+  Verifies that requests that could not even wait are rejected with 503
+  and a Retry-After covering the work ahead, that a request larger than
+  capacity runs alone, and that cancelled requests leave the queue.
+  """
+  queue = AdmissionQueue(capacity=10, budget=10, throughput=5)
+  release = asyncio.Event()
+
+  running = asyncio.create_task(hold(queue, 25, release))
+  waiting = asyncio.create_task(hold(queue, 10, release))
+  await asyncio.sleep(0)
+  assert queue.state().running_cost == 25
+
+  with pytest.raises(exceptions.ServiceUnavailable) as error:
+    async with queue.admit(5):
+      pass
+  assert error.value.status_code == 503
+  assert error.value.headers["Retry-After"] == "8"
+  assert queue.state().rejected == 1
+
+  waiting.cancel()
+  with pytest.raises(asyncio.CancelledError):
+    await waiting
+  assert (queue.state().waiting, queue.state().waiting_cost) == (0, 0)
+
+  release.set()
+  await running
+  assert queue.state().running == 0
@@ -0,0 +1,70 @@
+from typing import AsyncIterator
+
+import orjson
+import pytest
+from sanic import Sanic
+from sanic.compat import Header
+from sanic.request import Request
+
+from src.basket.route import create_baskets
+
+ORDERS = [
+  {"latitude": 40.7128, "longitude": -74.0060},
+  {"latitude": 40.7500, "longitude": -74.0500},
+]
+
+
+@pytest.fixture
+def app() -> Sanic:
+  """
+  Builds an app for requests to belong to.
+  """
+  Sanic.test_mode = True
+  return Sanic("basket-route-test")
+
+
+def make_request(app: Sanic, body: bytes, headers: dict[str, str]) -> Request:
+  """
+  Builds a request to /api/baskets/batch whose body arrives in chunks.
+  """
+  request = Request(
+    b"/api/baskets/batch", Header(headers), "1.1", "POST", None, app
+  )
+
+  async def stream() -> AsyncIterator[bytes]:
+    for start in range(0, len(body), 16):
+      yield body[start : start + 16]
+
+  request.stream = stream()
+  return request
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+  "body, headers",
+  [
+    (orjson.dumps({"orders": ORDERS}), {}),
+    (orjson.dumps({"orders": ORDERS}), {"content-type": "application/json"}),
+    (
+      b"".join(orjson.dumps(order) + b"\n" for order in ORDERS),
+      {"content-type": "application/x-ndjson; charset=utf-8"},
+    ),
+  ],
+)
+async def test_create_baskets_content_type(app, body, headers):
+  """
+  Tests choosing how to read a baskets request from its Content-Type.
+
+  Verifies that JSON bodies are read whole, also without a Content-Type
+  header, which Sanic reports as application/octet-stream, and that
+  NDJSON bodies are decoded as they stream in, all into the same
+  baskets.
+  """
+  response = await create_baskets(make_request(app, body, headers))
+
+  assert response.status == 201
+  assert sorted(
+    order["latitude"]
+    for basket in orjson.loads(response.body)
+    for order in basket["orders"]
+  ) == [40.7128, 40.75]
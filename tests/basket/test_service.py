@@ -1,9 +1,50 @@
-import pytest
+import asyncio
+import multiprocessing
+from unittest.mock import patch
 
-from src.basket.service import create_baskets
-from src.basket.type import BasketsCreate
+import numpy as np
+import pytest
+from pydantic import ValidationError
+from sanic import exceptions
+
+from src.basket import service
+from src.basket.admission import AdmissionQueue
+from src.basket.service import (
+  create_payloads,
+  create_response,
+  parse_request,
+  parse_stream,
+  set_admission,
+  set_cache,
+  shutdown_executor,
+  stream_admitted,
+  stream_payloads,
+)
+from src.basket.type import Basket, BasketsCreate
 from src.basket.util import calculate_distance
 from src.order.type import Order
+from src.region.registry import RegionRegistry
+from src.region.type import Region
+from src.serialization import dumps, loads, type_adapter
+from src.shared import SharedCache
+
+
+def order_coordinates(orders: list[Order]) -> tuple[np.ndarray, np.ndarray]:
+  """
+  Collects the (latitudes, longitudes) arrays of orders.
+  """
+  return (
+    np.array([order.latitude for order in orders], dtype=np.float64),
+    np.array([order.longitude for order in orders], dtype=np.float64),
+  )
+
+
+async def create_baskets(body: BasketsCreate) -> list[Basket]:
+  """
+  Allocates the orders of a body with create_payloads, as Basket models.
+  """
+  baskets, _ = await create_payloads(body, *order_coordinates(body.orders))
+  return type_adapter(list[Basket]).validate_python(baskets)
 
 
 @pytest.mark.asyncio
@@ -320,3 +361,336 @@ async def test_orders_just_outside_boundary():
 
   assert len(baskets) == 2
   assert all(len(b.orders) == 1 for b in baskets)
+
+
+@pytest.mark.asyncio
+async def test_stream_payloads_per_component():
+  """
+  Tests that baskets are streamed one component at a time.
+
+  Verifies that distant clusters are yielded as separate chunks, in order
+  of their first order, and that together they cover every order.
+  """
+  clusters = [(40.7128, -74.0060), (40.7528, -74.0060)]
+  orders = [
+    Order(latitude=base_lat + i * 0.0001, longitude=base_lon)
+    for base_lat, base_lon in clusters
+    for i in range(3)
+  ]
+  body = BasketsCreate(orders=orders)
+
+  chunks = [
+    baskets
+    async for _, baskets in stream_payloads(body, *order_coordinates(orders))
+  ]
+
+  assert len(chunks) == 2
+  assert chunks[0][0]["orders"][0] == orders[0].model_dump()
+  assert chunks[1][0]["orders"][0] == orders[3].model_dump()
+  assert sum(len(b["orders"]) for chunk in chunks for b in chunk) == 6
+
+
+@pytest.mark.asyncio
+async def test_create_payloads_districts():
+  """
+  Tests tagging baskets and orders with their districts.
+
+  Verifies that baskets carry the district of their center and orders
+  their own, with None outside every region, and that districts are
+  left out of untagged baskets.
+  """
+  registry = RegionRegistry.from_regions(
+    [
+      Region(
+        name="District",
+        type="Polygon",
+        coordinates=[
+          [
+            [-74.1, 40.7],
+            [-74.0, 40.7],
+            [-74.0, 40.8],
+            [-74.1, 40.8],
+            [-74.1, 40.7],
+          ]
+        ],
+      )
+    ]
+  )
+  orders = [
+    Order(latitude=40.75, longitude=-74.05),
+    Order(latitude=40.75, longitude=-73.5),
+  ]
+
+  with patch(
+    "src.basket.service.region_service.get_registry",
+    return_value=registry,
+  ):
+    tagged, _ = await create_payloads(
+      BasketsCreate(districts=True, orders=[]), *order_coordinates(orders)
+    )
+  untagged, _ = await create_payloads(
+    BasketsCreate(orders=[]), *order_coordinates(orders)
+  )
+
+  assert [basket.get("district") for basket in tagged] == ["District", None]
+  assert tagged[0]["orders"][0]["district"] == "District"
+  assert "district" not in tagged[1]["orders"][0]
+  assert "district" not in untagged[0]
+  assert "district" not in untagged[0]["orders"][0]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("threshold", [service.PARALLEL_THRESHOLD, 0])
+async def test_create_payloads_partitioned(monkeypatch, threshold):
+  """
+  Tests allocating every district separately.
+
+  Verifies that orders close to each other across a district border end
+  up in separate baskets, that orders outside every district are
+  allocated last and that statistics are reported per district, both
+  in-process and on the solver pool.
+  """
+  registry = RegionRegistry.from_regions(
+    [
+      Region(
+        name=name,
+        type="Polygon",
+        coordinates=[
+          [
+            [west, 40.7],
+            [west + 0.1, 40.7],
+            [west + 0.1, 40.8],
+            [west, 40.8],
+            [west, 40.7],
+          ]
+        ],
+      )
+      for name, west in [("West", -74.1), ("East", -74.0)]
+    ]
+  )
+  orders = [
+    Order(latitude=40.75, longitude=-73.9995),
+    Order(latitude=40.75, longitude=-74.0005),
+    Order(latitude=40.75, longitude=-73.5),
+  ]
+  body = BasketsCreate(orders=orders, partition="district")
+  monkeypatch.setattr(service, "PARALLEL_THRESHOLD", threshold)
+
+  try:
+    with patch(
+      "src.basket.service.region_service.get_registry",
+      return_value=registry,
+    ):
+      baskets, partitions = await create_payloads(
+        body, *order_coordinates(orders)
+      )
+  finally:
+    shutdown_executor()
+
+  assert len(await create_baskets(BasketsCreate(orders=orders[:2]))) == 1
+  assert [basket.get("district") for basket in baskets] == [
+    "West",
+    "East",
+    None,
+  ]
+  assert [basket["orders"] for basket in baskets] == [
+    [orders[1].model_dump()],
+    [orders[0].model_dump()],
+    [orders[2].model_dump()],
+  ]
+  assert [(p.district, p.orders, p.baskets) for p in partitions] == [
+    ("West", 1, 1),
+    ("East", 1, 1),
+    (None, 1, 1),
+  ]
+  assert all(p.seconds >= 0 for p in partitions)
+
+
+@pytest.mark.asyncio
+async def test_parse_request_bulk(monkeypatch):
+  """
+  Tests validating large requests in bulk.
+
+  Verifies that bulk requests keep no Order models, are allocated like
+  validated ones and report invalid coordinates as model validation
+  does.
+  """
+  data = {
+    "orders": [
+      {"latitude": 40.7128, "longitude": -74.0060},
+      {"latitude": 40.7130, "longitude": -74.0062},
+      {"latitude": 40.7500, "longitude": -74.0500},
+    ]
+  }
+  validated, *coordinates = parse_request(data)
+  monkeypatch.setattr(service, "BULK_THRESHOLD", 1)
+  bulk, *bulk_coordinates = parse_request(data)
+
+  assert len(validated.orders) == 3
+  assert bulk.orders == []
+  np.testing.assert_array_equal(bulk_coordinates, coordinates)
+  assert await create_payloads(bulk, *bulk_coordinates) == (
+    await create_payloads(validated, *coordinates)
+  )
+
+  data["orders"][1]["latitude"] = 95
+  with pytest.raises(ValidationError) as bulk_error:
+    parse_request(data)
+  monkeypatch.setattr(service, "BULK_THRESHOLD", 10)
+  with pytest.raises(ValidationError) as error:
+    parse_request(data)
+
+  assert bulk_error.value.errors() == error.value.errors()
+
+
+async def test_parse_stream():
+  """
+  Tests validating streamed requests.
+
+  Verifies that streamed orders are decoded into the same request as
+  JSON ones, with options taken apart from the body, and that malformed
+  streams are rejected.
+  """
+
+  async def stream(*chunks):
+    for chunk in chunks:
+      yield chunk
+
+  data = {
+    "orders": [
+      {"latitude": 40.7128, "longitude": -74.0060},
+      {"latitude": 40.7500, "longitude": -74.0500},
+    ],
+    "districts": True,
+  }
+  body, *coordinates = parse_request(data)
+  binary = np.array(coordinates).T.astype("<f8").tobytes()
+  ndjson = b"".join(dumps(order) + b"\n" for order in data["orders"])
+
+  for chunks, is_binary in [
+    ([ndjson[:10], ndjson[10:]], False),
+    ([binary[:20], binary[20:]], True),
+  ]:
+    streamed, *streamed_coordinates = await parse_stream(
+      {"districts": "true"}, stream(*chunks), binary=is_binary
+    )
+
+    assert streamed.orders == []
+    assert streamed.districts
+    np.testing.assert_array_equal(streamed_coordinates, coordinates)
+
+  with pytest.raises(ValidationError):
+    await parse_stream({"partition": "region"}, stream(ndjson))
+  with pytest.raises(exceptions.BadRequest):
+    await parse_stream({}, stream(binary[:-8]), binary=True)
+
+
+@pytest.mark.asyncio
+async def test_create_response_cache():
+  """
+  Tests caching response bodies in a shared cache.
+
+  Verifies that repeated requests are served from the cache without
+  allocating, and that requests with other options or coordinates are
+  allocated on their own.
+  """
+  body, *coordinates = parse_request(
+    {
+      "orders": [
+        {"latitude": 40.7128, "longitude": -74.0060},
+        {"latitude": 40.7500, "longitude": -74.0500},
+      ]
+    }
+  )
+  baskets, _ = await create_payloads(body, *coordinates)
+  cache = SharedCache.create(multiprocessing.Lock(), capacity=1 << 16)
+  set_cache(cache)
+  try:
+    response = await create_response(body, *coordinates)
+    assert loads(response) == loads(dumps(baskets))
+
+    with patch.object(service, "create_payloads") as create:
+      assert await create_response(body, *coordinates) == response
+      create.assert_not_called()
+
+    moved = coordinates[0] + 0.001, coordinates[1]
+    assert await create_response(body, *moved) != response
+    tagged = body.model_copy(update={"districts": True})
+    assert service.request_key(tagged, *coordinates) != (
+      service.request_key(body, *coordinates)
+    )
+  finally:
+    set_cache(None)
+    memory = cache.memory
+    cache.close()
+    memory.unlink()
+
+
+@pytest.mark.asyncio
+async def test_create_response_admission():
+  """
+  Tests admitting basket requests by their candidate pairs.
+
+  Verifies that admitted requests are charged their candidate pairs and
+  that requests over budget are rejected before allocating.
+  """
+  body, *coordinates = parse_request(
+    {
+      "orders": [
+        {"latitude": 40.7128, "longitude": -74.0060},
+        {"latitude": 40.7130, "longitude": -74.0062},
+        {"latitude": 40.7500, "longitude": -74.0500},
+      ]
+    }
+  )
+  queue = AdmissionQueue(capacity=10, budget=0)
+  set_admission(queue)
+  try:
+    await create_response(body, *coordinates)
+    assert queue.state().admitted == 1
+
+    queue.running, queue.running_cost = 1, 10
+    with patch.object(service, "create_payloads") as create:
+      with pytest.raises(exceptions.ServiceUnavailable):
+        await create_response(body, *coordinates)
+      create.assert_not_called()
+    assert service.get_admission_state().rejected == 1
+  finally:
+    set_admission(None)
+
+
+@pytest.mark.asyncio
+async def test_stream_admitted_releases_early():
+  """
+  Tests that streamed requests are admitted for their allocation only.
+
+  Verifies that admission is released once allocation ends, while the
+  caller has not taken every component yet, that the components are the
+  ones stream_payloads yields and that rejected requests yield nothing.
+  """
+  body, *coordinates = parse_request(
+    {
+      "orders": [
+        {"latitude": 40.7128, "longitude": -74.0060},
+        {"latitude": 40.7500, "longitude": -74.0500},
+      ]
+    }
+  )
+  expected = [result async for result in stream_payloads(body, *coordinates)]
+  queue = AdmissionQueue(capacity=10, budget=0)
+  set_admission(queue)
+  try:
+    results = stream_admitted(body, *coordinates)
+    streamed = [await results.__anext__()]
+    assert queue.state().admitted == 1
+    async with asyncio.timeout(5):
+      while queue.state().running:
+        await asyncio.sleep(0.01)
+    streamed.extend([result async for result in results])
+    assert streamed == expected
+
+    queue.running, queue.running_cost = 1, 10
+    with pytest.raises(exceptions.ServiceUnavailable):
+      await stream_admitted(body, *coordinates).__anext__()
+  finally:
+    set_admission(None)
@@ -1,10 +1,16 @@
+import numpy as np
 import pytest
 from scipy.spatial import cKDTree
 
 from src.basket.util import (
+  assign_baskets,
   build_spatial_tree,
   calculate_distance,
+  count_candidate_pairs,
+  query_radius_points,
   query_radius_tree,
+  solve_set_cover,
+  split_components,
 )
 from src.order.type import Order
 
@@ -217,3 +223,107 @@ def test_build_spatial_tree_coordinates():
   result = query_radius_tree(tree, center, 0.1, orders)
 
   assert len(result) >= 1
+
+
+def test_split_components_disjoint():
+  """
+  Tests splitting candidate baskets into independent components.
+
+  Verifies that orders sharing a candidate basket end up in the same
+  component and that components are ordered by their first order.
+  """
+  potential_baskets = [[0, 2], [1], [0, 2, 3], [2, 3]]
+
+  components = split_components(potential_baskets)
+
+  assert components == [[0, 2, 3], [1]]
+
+
+def test_split_components_empty():
+  """
+  Tests splitting an empty candidate list.
+
+  Verifies that no components are produced when there are no orders.
+  """
+  assert split_components([]) == []
+
+
+def test_solve_set_cover_single_order():
+  """
+  Tests set cover on a component with a single order.
+
+  Verifies that the order is selected as its own basket center.
+  """
+  assert solve_set_cover([[0]], [0]) == [0]
+
+
+def test_solve_set_cover_chain():
+  """
+  Tests set cover on a chain of overlapping candidates.
+
+  Verifies that the solver picks the minimum number of candidates and
+  that the selected candidates cover every order in the component.
+  """
+  potential_baskets = [[0, 1], [0, 1, 2], [1, 2, 3], [2, 3, 4], [3, 4]]
+  component = [0, 1, 2, 3, 4]
+
+  selected = solve_set_cover(potential_baskets, component)
+
+  covered = {idx for i in selected for idx in potential_baskets[i]}
+  assert len(selected) == 2
+  assert covered == set(component)
+
+
+def test_query_radius_points_matches_tree():
+  """
+  Tests the batched radius query against the per-order query.
+
+  Verifies that querying all points at once yields, for every point, the
+  same indices as query_radius_tree with that point as center.
+  """
+  rng = np.random.default_rng(0)
+  coordinates = np.column_stack(
+    (40.71 + rng.random(60) * 0.05, -74.01 + rng.random(60) * 0.05)
+  )
+  orders = [
+    Order(latitude=latitude, longitude=longitude)
+    for latitude, longitude in coordinates.tolist()
+  ]
+  tree = cKDTree(coordinates)
+
+  potential_baskets = query_radius_points(tree, coordinates, 0.5)
+
+  assert potential_baskets == [
+    query_radius_tree(tree, order, 0.5, orders) for order in orders
+  ]
+
+
+def test_assign_baskets_overlap():
+  """
+  Tests assigning orders to overlapping selected baskets.
+
+  Verifies that an order covered by two selected baskets goes to the
+  first one and that uncovered orders get a basket of their own.
+  """
+  potential_baskets = [[0, 1], [0, 1, 2], [1, 2], [3]]
+
+  baskets = assign_baskets(potential_baskets, [0, 1, 2, 3], [0, 2])
+
+  assert baskets == [(0, [0, 1]), (2, [2]), (3, [3])]
+
+
+def test_count_candidate_pairs():
+  """
+  Tests counting the candidate pairs of an allocation.
+
+  Verifies that the count matches the candidates query_radius_points
+  finds, where every point is a candidate of its own basket.
+  """
+  latitudes = np.array([40.7128, 40.7130, 40.7132, 40.7500])
+  longitudes = np.array([-74.0060, -74.0062, -74.0064, -74.0500])
+  coordinates = np.column_stack((latitudes, longitudes))
+  candidates = query_radius_points(cKDTree(coordinates), coordinates, 0.5)
+
+  assert count_candidate_pairs(latitudes, longitudes, 0.5) == 10
+  assert sum(len(indices) for indices in candidates) == 10
+  assert count_candidate_pairs(np.array([]), np.array([]), 0.5) == 0
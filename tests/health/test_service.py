@@ -0,0 +1,43 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.health import service
+
+
+@pytest.fixture(autouse=True)
+def reset_readiness():
+  """
+  Resets readiness before and after every test.
+  """
+  service.set_ready(False)
+  service.warm_up_seconds = None
+  yield
+  service.set_ready(False)
+  service.warm_up_seconds = None
+
+
+@pytest.mark.asyncio
+async def test_warm_up():
+  """
+  Tests warming up the worker.
+
+  Verifies that the worker is not ready before warm-up, becomes ready
+  once basket allocation is warmed up and reports the time it took, and
+  is not ready anymore once marked as shutting down.
+  """
+  assert service.get_readiness().model_dump() == {
+    "ready": False,
+    "warm_up": None,
+  }
+
+  with patch.object(service.basket_service, "warm_up", AsyncMock()) as warm_up:
+    await service.warm_up()
+
+  warm_up.assert_awaited_once()
+  readiness = service.get_readiness()
+  assert readiness.ready
+  assert readiness.warm_up >= 0
+
+  service.set_ready(False)
+  assert not service.get_readiness().ready
@@ -1,18 +1,39 @@
-from unittest.mock import AsyncMock, patch
+from unittest.mock import patch
 
+import numpy as np
 import pytest
+from pydantic import ValidationError
 from sanic import exceptions
 from shapely import Polygon
 
 from src.order.service import (
   create_orders,
-  select_multi_polygon,
-  select_polygon,
+  generate_points,
+  get_region_geometry,
+  pool_digests,
+  region_geometries,
+  shutdown_executor,
+  stream_orders,
 )
-from src.order.type import Order, OrderCreate
+from src.order.type import Order, OrderCreate, OrderStreamCreate
+from src.order.util import build_region_geometry
+from src.region.registry import RegionRegistry
 from src.region.type import Region
 
 
+@pytest.fixture(autouse=True)
+def clear_region_geometries():
+  """
+  Clears the region geometry cache between tests.
+
+  Tests reuse region names with different coordinates, so cached unions
+  from one test must not leak into another.
+  """
+  region_geometries.clear()
+  yield
+  region_geometries.clear()
+
+
 @pytest.mark.asyncio
 async def test_create_orders_single_region():
   """
@@ -30,9 +51,8 @@ async def test_create_orders_single_region():
   body = OrderCreate(regions=["TestRegion"], count=5)
 
   with patch(
-    "src.order.service.region_service.get_regions",
-    new_callable=AsyncMock,
-    return_value=[mock_region],
+    "src.order.service.region_service.get_registry",
+    return_value=RegionRegistry.from_regions([mock_region]),
   ):
     orders = await create_orders(body)
 
@@ -66,9 +86,8 @@ async def test_create_orders_multiple_regions():
   body = OrderCreate(regions=["Region1", "Region2"], count=10)
 
   with patch(
-    "src.order.service.region_service.get_regions",
-    new_callable=AsyncMock,
-    return_value=mock_regions,
+    "src.order.service.region_service.get_registry",
+    return_value=RegionRegistry.from_regions(mock_regions),
   ):
     orders = await create_orders(body)
 
@@ -101,9 +120,8 @@ async def test_create_orders_multi_polygon():
   body = OrderCreate(regions=["MultiRegion"], count=8)
 
   with patch(
-    "src.order.service.region_service.get_regions",
-    new_callable=AsyncMock,
-    return_value=[mock_region],
+    "src.order.service.region_service.get_registry",
+    return_value=RegionRegistry.from_regions([mock_region]),
   ):
     orders = await create_orders(body)
 
@@ -127,9 +145,8 @@ async def test_create_orders_invalid_region():
   body = OrderCreate(regions=["InvalidRegion"], count=5)
 
   with patch(
-    "src.order.service.region_service.get_regions",
-    new_callable=AsyncMock,
-    return_value=[mock_region],
+    "src.order.service.region_service.get_registry",
+    return_value=RegionRegistry.from_regions([mock_region]),
   ):
     with pytest.raises(exceptions.BadRequest, match="No valid regions"):
       await create_orders(body)
@@ -146,9 +163,8 @@ async def test_create_orders_empty_regions():
   body = OrderCreate(regions=["AnyRegion"], count=5)
 
   with patch(
-    "src.order.service.region_service.get_regions",
-    new_callable=AsyncMock,
-    return_value=[],
+    "src.order.service.region_service.get_registry",
+    return_value=RegionRegistry.from_regions([]),
   ):
     with pytest.raises(exceptions.BadRequest, match="No valid regions"):
       await create_orders(body)
@@ -171,9 +187,8 @@ async def test_create_orders_mixed_valid_invalid():
   body = OrderCreate(regions=["ValidRegion", "InvalidRegion"], count=5)
 
   with patch(
-    "src.order.service.region_service.get_regions",
-    new_callable=AsyncMock,
-    return_value=[mock_region],
+    "src.order.service.region_service.get_registry",
+    return_value=RegionRegistry.from_regions([mock_region]),
   ):
     orders = await create_orders(body)
 
@@ -196,18 +211,16 @@ async def test_create_orders_count_validation():
 
   body = OrderCreate(regions=["TestRegion"], count=1)
   with patch(
-    "src.order.service.region_service.get_regions",
-    new_callable=AsyncMock,
-    return_value=[mock_region],
+    "src.order.service.region_service.get_registry",
+    return_value=RegionRegistry.from_regions([mock_region]),
   ):
     orders = await create_orders(body)
     assert len(orders) == 1
 
   body = OrderCreate(regions=["TestRegion"], count=100)
   with patch(
-    "src.order.service.region_service.get_regions",
-    new_callable=AsyncMock,
-    return_value=[mock_region],
+    "src.order.service.region_service.get_registry",
+    return_value=RegionRegistry.from_regions([mock_region]),
   ):
     orders = await create_orders(body)
     assert len(orders) == 100
@@ -230,9 +243,8 @@ async def test_create_orders_deterministic_seed():
   body = OrderCreate(regions=["TestRegion"], count=20)
 
   with patch(
-    "src.order.service.region_service.get_regions",
-    new_callable=AsyncMock,
-    return_value=[mock_region],
+    "src.order.service.region_service.get_registry",
+    return_value=RegionRegistry.from_regions([mock_region]),
   ):
     orders = await create_orders(body)
 
@@ -242,226 +254,287 @@ async def test_create_orders_deterministic_seed():
   assert unique_points > 1
 
 
-def test_select_polygon_single_polygon():
+@pytest.mark.asyncio
+async def test_create_orders_triangulation_sampling():
   """
-  Tests polygon selection with a single polygon input.
+  Tests order creation with triangulation sampling.
 
-  Verifies that when given a single polygon, the function returns
-  the same polygon without modification.
+  Verifies that orders drawn from the triangulation of a MultiPolygon
+  region all fall within one of its components.
   """
-  polygon = Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
-  polygons = [polygon]
+  mock_region = Region(
+    name="MultiRegion",
+    type="MultiPolygon",
+    coordinates=[
+      [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+      [[[2, 2], [3, 2], [3, 3], [2, 3], [2, 2]]],
+    ],
+  )
 
-  result = select_polygon(polygons)
+  body = OrderCreate(
+    regions=["MultiRegion"], count=50, sampling="triangulation"
+  )
 
-  assert isinstance(result, Polygon)
-  assert result.equals(polygon)
+  with patch(
+    "src.order.service.region_service.get_registry",
+    return_value=RegionRegistry.from_regions([mock_region]),
+  ):
+    orders = await create_orders(body)
 
+  assert len(orders) == 50
+  assert all(
+    (0 <= o.longitude <= 1 and 0 <= o.latitude <= 1)
+    or (2 <= o.longitude <= 3 and 2 <= o.latitude <= 3)
+    for o in orders
+  )
 
-def test_select_polygon_multiple_overlapping_polygons():
-  """
-  Tests polygon selection with overlapping polygons.
 
-  Verifies that when polygons overlap, they are correctly merged into
-  a single unified polygon via unary_union.
+def test_get_region_geometry_cached_by_names():
   """
-  polygon1 = Polygon([[0, 0], [2, 0], [2, 1], [0, 1], [0, 0]])
-  polygon2 = Polygon([[1, 0], [3, 0], [3, 1], [1, 1], [1, 0]])
-  polygons = [polygon1, polygon2]
+  Tests that region geometries are cached by the set of region names.
 
-  result = select_polygon(polygons)
-  assert isinstance(result, Polygon)
-
-
-def test_select_polygon_multiple_disjoint_polygons():
+  Verifies that the same regions in a different order, or with duplicates,
+  reuse the geometry built by the first call.
   """
-  Tests polygon selection with disjoint polygons forming a MultiPolygon.
+  regions = [
+    Region(
+      name="Region1",
+      type="Polygon",
+      coordinates=[[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+    ),
+    Region(
+      name="Region2",
+      type="Polygon",
+      coordinates=[[[2, 2], [3, 2], [3, 3], [2, 3], [2, 2]]],
+    ),
+  ]
 
-  Verifies that when polygons are disjoint, the function correctly delegates
-  to select_multi_polygon for area-weighted selection.
-  """
-  polygon1 = Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
-  polygon2 = Polygon([[2, 2], [3, 2], [3, 3], [2, 3], [2, 2]])
-  polygons = [polygon1, polygon2]
+  registry = RegionRegistry.from_regions(regions)
 
-  with patch("src.order.service.select_multi_polygon") as mock_select:
-    mock_select.return_value = polygon1
-    result = select_polygon(polygons)
+  first = get_region_geometry(registry, [0, 1])
+  second = get_region_geometry(registry, [1, 0, 1])
 
-  assert mock_select.called
-  assert isinstance(result, Polygon)
+  assert second is first
+  assert len(first.parts) == 2
+  assert len(region_geometries) == 1
 
 
-def test_select_polygon_empty_list():
+@pytest.mark.asyncio
+async def test_create_orders_seed_reproducible():
   """
-  Tests polygon selection with an empty input list.
+  Tests that a seed makes order generation reproducible.
 
-  Verifies edge case handling when no polygons are provided. The function
-  should either return None or raise an appropriate exception.
+  Verifies that two requests with the same seed return identical orders
+  and that a different seed returns different ones.
   """
-  polygons = []
+  mock_region = Region(
+    name="TestRegion",
+    type="Polygon",
+    coordinates=[[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+  )
 
-  try:
-    result = select_polygon(polygons)
-    assert result is not None
-  except Exception:
-    pass
+  with patch(
+    "src.order.service.region_service.get_registry",
+    return_value=RegionRegistry.from_regions([mock_region]),
+  ):
+    first = await create_orders(
+      OrderCreate(regions=["TestRegion"], count=20, seed=1)
+    )
+    second = await create_orders(
+      OrderCreate(regions=["TestRegion"], count=20, seed=1)
+    )
+    other = await create_orders(
+      OrderCreate(regions=["TestRegion"], count=20, seed=2)
+    )
+
+  assert first == second
+  assert first != other
 
 
-def test_select_multi_polygon_equal_areas():
+@pytest.mark.asyncio
+async def test_generate_points_independent_of_workers():
   """
-  Tests weighted selection with polygons of equal area.
+  Tests that parallel generation matches in-process generation.
 
-  Verifies that when polygons have identical areas, selection works
-  correctly with equal weights (50/50 probability).
+  Verifies that the same seed yields identical points whether the chunks
+  are generated in-process or split across worker processes.
   """
-  polygon1 = Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
-  polygon2 = Polygon([[2, 2], [3, 2], [3, 3], [2, 3], [2, 2]])
-  polygons = [polygon1, polygon2]
+  geometry = build_region_geometry(
+    ["Concave"],
+    [Polygon([[0, 0], [5, 0], [5, 2], [2, 2], [2, 5], [0, 5], [0, 0]])],
+  )
 
-  with patch("src.order.service.random.choices", return_value=[polygon1]):
-    result = select_multi_polygon(polygons)
+  try:
+    serial = await generate_points(geometry, 20_000, seed=3, workers=1)
+    parallel = await generate_points(geometry, 20_000, seed=3, workers=3)
+  finally:
+    shutdown_executor()
 
-  assert isinstance(result, Polygon)
-  assert result.equals(polygon1)
+  assert np.array_equal(serial[0], parallel[0])
+  assert np.array_equal(serial[1], parallel[1])
 
 
-def test_select_multi_polygon_different_areas():
+@pytest.mark.asyncio
+async def test_generate_points_sends_geometry_once():
   """
-  Tests weighted selection with polygons of different areas.
+  Tests that the pool reuses geometries it has received.
 
-  Verifies that weight calculation correctly proportions selection probability
-  based on polygon area. Larger polygons should have proportionally higher
-  selection weights.
+  Verifies that the geometry's digest is recorded once sent, that later
+  requests sent with the digest alone yield the same points, and that
+  shutting the pool down forgets it.
   """
-  polygon1 = Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
-  polygon2 = Polygon([[0, 0], [2, 0], [2, 2], [0, 2], [0, 0]])
-  polygons = [polygon1, polygon2]
-
-  areas = [p.area for p in polygons]
-  total_area = sum(areas)
-  weights = [area / total_area for area in areas]
-
-  assert len(weights) == 2
-  assert weights[0] == 1 / 5
-  assert weights[1] == 4 / 5
+  geometry = build_region_geometry(
+    ["Concave"],
+    [Polygon([[0, 0], [5, 0], [5, 2], [2, 2], [2, 5], [0, 5], [0, 0]])],
+  )
 
-  with patch("src.order.service.random.choices", return_value=[polygon2]):
-    result = select_multi_polygon(polygons)
+  try:
+    first = await generate_points(
+      geometry, 20_000, sampling="triangulation", seed=3, workers=3
+    )
+    assert geometry.digest in pool_digests
+    second = await generate_points(
+      geometry, 20_000, sampling="triangulation", seed=3, workers=3
+    )
+  finally:
+    shutdown_executor()
 
-  assert isinstance(result, Polygon)
-  assert result.equals(polygon2)
+  assert not pool_digests
+  assert np.array_equal(first[0], second[0])
+  assert np.array_equal(first[1], second[1])
 
 
-def test_select_multi_polygon_three_polygons():
+@pytest.mark.asyncio
+async def test_stream_orders_matches_create_orders():
   """
-  Tests select_multi_polygon with three polygons of different areas.
+  Tests that streamed orders match the orders of a regular request.
 
-  Verifies that weight calculation works correctly with multiple polygons
-  and that weights sum to 1.0 for valid probability distribution.
+  Verifies that streaming yields several batches and that, for the same
+  seed, their concatenation equals the orders returned by create_orders.
   """
-  polygon1 = Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
-  polygon2 = Polygon([[2, 2], [4, 2], [4, 3], [2, 3], [2, 2]])
-  polygon3 = Polygon([[5, 5], [8, 5], [8, 6], [5, 6], [5, 5]])
-  polygons = [polygon1, polygon2, polygon3]
-
-  areas = [p.area for p in polygons]
-  total_area = sum(areas)
-  weights = [area / total_area for area in areas]
-
-  assert len(weights) == 3
-  assert abs(sum(weights) - 1.0) < 1e-10
+  mock_region = Region(
+    name="TestRegion",
+    type="Polygon",
+    coordinates=[[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+  )
 
-  with patch("src.order.service.random.choices", return_value=[polygon3]):
-    result = select_multi_polygon(polygons)
+  with patch(
+    "src.order.service.region_service.get_registry",
+    return_value=RegionRegistry.from_regions([mock_region]),
+  ):
+    orders = await create_orders(
+      OrderCreate(regions=["TestRegion"], count=10_000, seed=4)
+    )
+    with patch("src.order.service.STREAM_CHUNKS", 1):
+      batches = [
+        batch
+        async for batch in stream_orders(
+          OrderStreamCreate(regions=["TestRegion"], count=10_000, seed=4)
+        )
+      ]
 
-  assert isinstance(result, Polygon)
-  assert result.equals(polygon3)
+  assert len(batches) == 3
+  longitudes = np.concatenate([x for x, _, _ in batches])
+  latitudes = np.concatenate([y for _, y, _ in batches])
+  assert longitudes.tolist() == [o.longitude for o in orders]
+  assert latitudes.tolist() == [o.latitude for o in orders]
 
 
-def test_select_multi_polygon_single_polygon():
+def test_order_stream_create_count_limit():
   """
-  Tests weighted selection with a single polygon.
+  Tests that streamed requests accept counts beyond the JSON limit.
 
-  Verifies that the function handles the edge case of a single polygon
-  correctly, where weight calculation should result in 100% selection.
+  Verifies that OrderStreamCreate accepts counts OrderCreate rejects.
   """
-  polygon = Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
-  polygons = [polygon]
-
-  with patch("src.order.service.random.choices", return_value=[polygon]):
-    result = select_multi_polygon(polygons)
+  body = OrderStreamCreate(regions=["TestRegion"], count=5_000_000)
 
-  assert isinstance(result, Polygon)
-  assert result.equals(polygon)
+  assert body.count == 5_000_000
+  with pytest.raises(ValidationError):
+    OrderCreate(regions=["TestRegion"], count=5_000_000)
 
 
-def test_select_multi_polygon_weights_calculation():
+def test_order_create_finite_weights():
   """
-  Tests that selection weights are correctly calculated based on polygon area.
+  Tests that region weights must be finite.
 
-  Verifies the internal weight calculation logic by mocking random.choices
-  and inspecting the weights passed to it. Ensures weights are proportional
-  to area and sum to 1.0.
+  Verifies that infinite and NaN weights are rejected, since they would
+  turn the region probabilities into NaN.
   """
-  polygon1 = Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
-  polygon2 = Polygon([[0, 0], [3, 0], [3, 3], [0, 3], [0, 0]])
-  polygons = [polygon1, polygon2]
-
-  areas = [p.area for p in polygons]
-  total_area = sum(areas)
-  expected_weights = [area / total_area for area in areas]
-
-  with patch("src.order.service.random.choices") as mock_choices:
-    mock_choices.return_value = [polygon1]
-    select_multi_polygon(polygons)
+  for weight in [float("inf"), float("nan")]:
+    with pytest.raises(ValidationError):
+      OrderCreate(regions=["TestRegion"], weights={"TestRegion": weight})
 
-    assert mock_choices.called
-    call_args = mock_choices.call_args
-    assert call_args.args[0] == polygons
-    actual_weights = call_args.kwargs.get("weights")
 
-    assert actual_weights is not None
-    assert len(actual_weights) == 2
-    assert abs(actual_weights[0] - expected_weights[0]) < 1e-10
-    assert abs(actual_weights[1] - expected_weights[1]) < 1e-10
-    assert abs(sum(actual_weights) - 1.0) < 1e-10
-
-
-def test_select_multi_polygon_very_small_polygon():
+@pytest.mark.asyncio
+async def test_create_orders_region_weights():
   """
-  Tests weighted selection with a very small polygon (edge case).
+  Tests order creation with per-region density weights.
 
-  Verifies that the function correctly handles extreme size differences
-  between polygons, ensuring numerical stability in weight calculations.
+  Verifies that a region with zero weight receives no orders and that
+  weighing every selected region zero is rejected.
   """
+  mock_regions = [
+    Region(
+      name="Region1",
+      type="Polygon",
+      coordinates=[[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+    ),
+    Region(
+      name="Region2",
+      type="Polygon",
+      coordinates=[[[2, 2], [3, 2], [3, 3], [2, 3], [2, 2]]],
+    ),
+  ]
 
-  polygon1 = Polygon([[0, 0], [0.1, 0], [0.1, 0.1], [0, 0.1], [0, 0]])
-  polygon2 = Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
-  polygons = [polygon1, polygon2]
-
-  with patch("src.order.service.random.choices", return_value=[polygon2]):
-    result = select_multi_polygon(polygons)
-
-  assert isinstance(result, Polygon)
-  assert result.equals(polygon2)
+  with patch(
+    "src.order.service.region_service.get_registry",
+    return_value=RegionRegistry.from_regions(mock_regions),
+  ):
+    orders = await create_orders(
+      OrderCreate(
+        regions=["Region1", "Region2"],
+        count=50,
+        weights={"Region1": 0.0},
+      )
+    )
+    with pytest.raises(exceptions.BadRequest, match="weigh zero"):
+      await create_orders(
+        OrderCreate(
+          regions=["Region1", "Region2"],
+          count=50,
+          weights={"Region1": 0.0, "Region2": 0.0},
+        )
+      )
+
+  assert all(2 <= o.longitude <= 3 for o in orders)
 
 
-def test_select_polygon_integration_with_multi_polygon():
+@pytest.mark.asyncio
+async def test_create_orders_districts():
   """
-  Tests integration between select_polygon and select_multi_polygon.
+  Tests tagging generated orders with their districts.
 
-  Verifies that select_polygon correctly delegates to select_multi_polygon
-  when the union results in a MultiPolygon, ensuring proper function composition.
+  Verifies that every order drawn within a region is tagged with it.
   """
-  polygon1 = Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
-  polygon2 = Polygon([[2, 2], [3, 2], [3, 3], [2, 3], [2, 2]])
-  polygons = [polygon1, polygon2]
+  mock_regions = [
+    Region(
+      name="Region1",
+      type="Polygon",
+      coordinates=[[[0, 0], [0.1, 0], [0.1, 0.1], [0, 0.1], [0, 0]]],
+    ),
+    Region(
+      name="Region2",
+      type="Polygon",
+      coordinates=[[[0.2, 0], [0.3, 0], [0.3, 0.1], [0.2, 0.1], [0.2, 0]]],
+    ),
+  ]
+
+  body = OrderCreate(regions=["Region2"], count=50, districts=True)
 
-  with patch("src.order.service.select_multi_polygon") as mock_select:
-    mock_select.return_value = polygon1
-    result = select_polygon(polygons)
+  with patch(
+    "src.order.service.region_service.get_registry",
+    return_value=RegionRegistry.from_regions(mock_regions),
+  ):
+    orders = await create_orders(body)
 
-    assert mock_select.called
-    assert len(mock_select.call_args[0][0]) == 2
-    assert isinstance(result, Polygon)
+  assert {order.district for order in orders} == {"Region2"}
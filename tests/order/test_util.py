@@ -1,48 +1,31 @@
-from shapely import MultiPolygon, Point, Polygon
-
-from src.order.util import point_in_polygon, region_polygon
-from src.region.type import Region
-
-
-def test_region_polygon_single():
-  """
-  Tests conversion of a single Polygon region to Shapely Polygon.
-
-  Verifies that a Region object with type "Polygon" is correctly converted
-  to a Shapely Polygon object with valid area.
-  """
-  region = Region(
-    name="Test",
-    type="Polygon",
-    coordinates=[[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
-  )
-
-  result = region_polygon(region)
-
-  assert isinstance(result, Polygon)
-  assert result.area > 0
-
-
-def test_region_polygon_multi():
-  """
-  Tests conversion of a MultiPolygon region to Shapely MultiPolygon.
+import json
 
-  Verifies that a Region object with type "MultiPolygon" is correctly
-  converted to a Shapely MultiPolygon object containing multiple polygons.
-  """
-  region = Region(
-    name="Test",
-    type="MultiPolygon",
-    coordinates=[
-      [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
-      [[[2, 2], [3, 2], [3, 3], [2, 3], [2, 2]]],
-    ],
-  )
-
-  result = region_polygon(region)
+import numpy as np
+import pytest
+import shapely
+from pydantic import ValidationError
+from shapely import MultiPolygon, Point, Polygon
 
-  assert isinstance(result, MultiPolygon)
-  assert len(result.geoms) == 2
+from src.order.util import (
+  AliasTable,
+  BinaryOrderDecoder,
+  GeometryMissing,
+  LRUCache,
+  NdjsonOrderDecoder,
+  build_region_geometry,
+  encode_binary,
+  encode_ndjson,
+  point_in_polygon,
+  points_in_chunks,
+  points_in_polygon,
+  points_in_region_geometry,
+  points_in_triangles,
+  pool_geometries,
+  sample_chunks,
+  spawn_chunks,
+  triangulate_polygon,
+  validate_coordinates,
+)
 
 
 def test_point_in_polygon_single():
@@ -108,3 +91,499 @@ def test_point_in_polygon_complex_shape():
 
   point = Point(x, y)
   assert polygon.contains(point) or polygon.touches(point)
+
+
+def test_points_in_polygon_count_and_containment():
+  """
+  Tests batched generation of random points inside a polygon.
+
+  Verifies that exactly the requested number of points is returned and
+  that every point lies inside the polygon.
+  """
+  polygon = Polygon([[0, 0], [5, 0], [5, 2], [2, 2], [2, 5], [0, 5], [0, 0]])
+
+  longitudes, latitudes = points_in_polygon(polygon, 1_000)
+
+  assert longitudes.shape == latitudes.shape == (1_000,)
+  assert shapely.contains_xy(polygon, longitudes, latitudes).all()
+
+
+def test_points_in_polygon_thin_multi_polygon():
+  """
+  Tests batched generation for a sparse MultiPolygon with low acceptance.
+
+  Verifies that small parts far apart, which reject most bounding box
+  candidates, still yield the requested number of points inside the parts
+  even when the block size is much smaller than the count.
+  """
+  multi = MultiPolygon(
+    [
+      Polygon([[0, 0], [0.1, 0], [0.1, 0.1], [0, 0.1], [0, 0]]),
+      Polygon([[9.9, 9.9], [10, 9.9], [10, 10], [9.9, 10], [9.9, 9.9]]),
+    ]
+  )
+
+  longitudes, latitudes = points_in_polygon(multi, 500, block_size=1_000)
+
+  assert len(longitudes) == 500
+  assert shapely.contains_xy(multi, longitudes, latitudes).all()
+
+
+def test_points_in_polygon_zero_area():
+  """
+  Tests generating points inside a polygon with no area.
+
+  Verifies that a degenerate polygon is rejected rather than sampled
+  forever.
+  """
+  polygon = Polygon([[0, 0], [1, 1], [2, 2], [0, 0]])
+
+  with pytest.raises(ValueError):
+    points_in_polygon(polygon, 10)
+
+
+def test_points_in_polygon_generator():
+  """
+  Tests that points are drawn from the given random generator.
+
+  Verifies that two generators with the same seed produce identical points.
+  """
+  polygon = Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
+
+  first = points_in_polygon(polygon, 50, np.random.default_rng(7))
+  second = points_in_polygon(polygon, 50, np.random.default_rng(7))
+
+  assert np.array_equal(first[0], second[0])
+  assert np.array_equal(first[1], second[1])
+
+
+def test_build_region_geometry_parts_and_areas():
+  """
+  Tests building the sampling geometry for a Polygon and a MultiPolygon.
+
+  Verifies that regions are split into their parts and that every part
+  records its owning region and its area.
+  """
+  polygons = [
+    Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]),
+    MultiPolygon(
+      [
+        Polygon([[2, 2], [5, 2], [5, 3], [2, 3], [2, 2]]),
+        Polygon([[6, 6], [8, 6], [8, 7], [6, 7], [6, 6]]),
+      ]
+    ),
+  ]
+
+  geometry = build_region_geometry(["Small", "Large"], polygons)
+
+  assert geometry.names == ("Small", "Large")
+  assert len(geometry.parts) == 3
+  assert geometry.part_regions.tolist() == [0, 1, 1]
+  assert geometry.part_areas.tolist() == [1.0, 3.0, 2.0]
+
+
+def test_points_in_region_geometry_area_weighted():
+  """
+  Tests that points are spread across parts in proportion to their area.
+
+  Verifies that every point falls inside the union and that the larger
+  part receives roughly three times as many points as the smaller one.
+  """
+  small = Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
+  large = Polygon([[2, 2], [5, 2], [5, 3], [2, 3], [2, 2]])
+  geometry = build_region_geometry(["Small", "Large"], [small, large])
+
+  longitudes, latitudes = points_in_region_geometry(
+    geometry, 4_000, np.random.default_rng(0)
+  )
+
+  union = MultiPolygon([small, large])
+  assert shapely.contains_xy(union, longitudes, latitudes).all()
+  in_large = shapely.contains_xy(large, longitudes, latitudes).mean()
+  assert 0.7 < in_large < 0.8
+
+
+def test_lru_cache_evicts_least_recently_used():
+  """
+  Tests bounded eviction in LRUCache.
+
+  Verifies that reading an entry marks it as recently used and that the
+  least recently used entry is evicted once the cache is full.
+  """
+  cache = LRUCache(2)
+  cache.put("a", 1)
+  cache.put("b", 2)
+  assert cache.get("a") == 1
+
+  cache.put("c", 3)
+
+  assert len(cache) == 2
+  assert cache.get("b") is None
+  assert cache.get("a") == 1
+  assert cache.get("c") == 3
+
+
+def test_triangulate_polygon_with_hole():
+  """
+  Tests triangulation of a polygon with a hole.
+
+  Verifies that the triangles cover exactly the polygon's area, so the
+  hole is left out, and that the returned areas match the triangles.
+  """
+  polygon = Polygon(
+    [[0, 0], [4, 0], [4, 4], [0, 4], [0, 0]],
+    holes=[[[1, 1], [3, 1], [3, 3], [1, 3], [1, 1]]],
+  )
+
+  triangles, areas = triangulate_polygon(polygon)
+
+  assert triangles.shape[1:] == (3, 2)
+  assert np.allclose(areas, shapely.area(shapely.polygons(triangles)))
+  assert abs(areas.sum() - polygon.area) < 1e-9
+
+
+def test_points_in_triangles_concave_multi_polygon():
+  """
+  Tests rejection-free sampling over a concave MultiPolygon.
+
+  Verifies that every generated point lies inside the geometry, including
+  its concave part, without any retries.
+  """
+  multi = MultiPolygon(
+    [
+      Polygon([[0, 0], [5, 0], [5, 2], [2, 2], [2, 5], [0, 5], [0, 0]]),
+      Polygon([[8, 8], [9, 8], [9, 9], [8, 9], [8, 8]]),
+    ]
+  )
+  triangles, areas = triangulate_polygon(multi)
+
+  longitudes, latitudes = points_in_triangles(
+    triangles, AliasTable.build(areas), 2_000, np.random.default_rng(0)
+  )
+
+  assert len(longitudes) == 2_000
+  covered = shapely.intersects_xy(multi, longitudes, latitudes)
+  assert covered.all()
+
+
+def test_points_in_region_geometry_triangulation():
+  """
+  Tests the triangulation sampling mode of points_in_region_geometry.
+
+  Verifies that points land in the region and that the triangulation is
+  computed once and reused by the geometry.
+  """
+  polygon = Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
+  geometry = build_region_geometry(["Square"], [polygon])
+
+  longitudes, latitudes = points_in_region_geometry(
+    geometry, 100, sampling="triangulation"
+  )
+
+  assert shapely.intersects_xy(polygon, longitudes, latitudes).all()
+  assert geometry.triangulations is geometry.triangulations
+
+
+def test_spawn_chunks_sizes():
+  """
+  Tests splitting a count into fixed-size seeded chunks.
+
+  Verifies that chunks hold chunk_size points except for the remainder
+  and that the same seed spawns the same seed sequences.
+  """
+  chunks = spawn_chunks(10, 42, 4)
+
+  assert [size for size, _ in chunks] == [4, 4, 2]
+  assert [seq.entropy for _, seq in chunks] == [42, 42, 42]
+  assert [seq.generate_state(1)[0] for _, seq in spawn_chunks(10, 42, 4)] == [
+    seq.generate_state(1)[0] for _, seq in chunks
+  ]
+
+
+def test_points_in_chunks_independent_of_grouping():
+  """
+  Tests that chunk output does not depend on how chunks are grouped.
+
+  Verifies that generating all chunks at once yields the same points as
+  generating them in two groups and concatenating the results.
+  """
+  geometry = build_region_geometry(
+    ["Square"], [Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])]
+  )
+  chunks = spawn_chunks(100, 7, 16)
+
+  together = points_in_chunks(geometry, chunks)
+  first = points_in_chunks(geometry, chunks[:3])
+  second = points_in_chunks(geometry, chunks[3:])
+
+  assert np.array_equal(together[0], np.concatenate([first[0], second[0]]))
+  assert np.array_equal(together[1], np.concatenate([first[1], second[1]]))
+
+
+def test_sample_chunks_keeps_geometry():
+  """
+  Tests that pool processes keep the geometries they receive.
+
+  Verifies that a digest alone fails until the geometry has been sent
+  once, and that later digest-only calls reuse it.
+  """
+  geometry = build_region_geometry(
+    ["Square"], [Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])]
+  )
+  chunks = spawn_chunks(100, 7, 16)
+  pool_geometries.clear()
+
+  with pytest.raises(GeometryMissing):
+    sample_chunks(geometry.digest, None, chunks)
+
+  sent = sample_chunks(geometry.digest, geometry, chunks)
+  kept = sample_chunks(geometry.digest, None, chunks)
+
+  assert np.array_equal(sent[0], kept[0])
+  assert np.array_equal(sent[1], kept[1])
+  pool_geometries.clear()
+
+
+def test_region_geometry_digest():
+  """
+  Tests that geometries are identified by their names and parts.
+  """
+  square = Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
+  other = Polygon([[0, 0], [2, 0], [2, 2], [0, 2], [0, 0]])
+
+  digest = build_region_geometry(["Square"], [square]).digest
+
+  assert build_region_geometry(["Square"], [square]).digest == digest
+  assert build_region_geometry(["Square"], [other]).digest != digest
+  assert build_region_geometry(["Other"], [square]).digest != digest
+
+
+def test_encode_ndjson():
+  """
+  Tests encoding points as newline-delimited JSON orders.
+
+  Verifies that every point becomes one JSON order per line.
+  """
+  encoded = encode_ndjson(np.array([29.0, 28.5]), np.array([41.0, 40.25]))
+
+  lines = encoded.splitlines()
+  assert encoded.endswith("\n")
+  assert [json.loads(line) for line in lines] == [
+    {"latitude": 41.0, "longitude": 29.0},
+    {"latitude": 40.25, "longitude": 28.5},
+  ]
+
+
+def test_encode_ndjson_districts():
+  """
+  Tests encoding points with their districts.
+
+  Verifies that districts are added to the orders that have one, without
+  escaping non-ASCII names.
+  """
+  encoded = encode_ndjson(
+    np.array([29.0, 28.5]), np.array([41.0, 40.25]), ["Kadıköy", None]
+  )
+
+  assert "Kadıköy" in encoded
+  assert [json.loads(line) for line in encoded.splitlines()] == [
+    {"latitude": 41.0, "longitude": 29.0, "district": "Kadıköy"},
+    {"latitude": 40.25, "longitude": 28.5},
+  ]
+
+
+def test_encode_binary():
+  """
+  Tests encoding points as little-endian float64 pairs.
+
+  Verifies that the buffer holds latitude then longitude for every point.
+  """
+  encoded = encode_binary(np.array([29.0, 28.5]), np.array([41.0, 40.25]))
+
+  assert len(encoded) == 32
+  assert np.frombuffer(encoded, dtype="<f8").tolist() == [
+    41.0,
+    29.0,
+    40.25,
+    28.5,
+  ]
+
+
+@pytest.mark.parametrize(
+  "decoder, encode",
+  [
+    (NdjsonOrderDecoder, lambda *points: encode_ndjson(*points).encode()),
+    (BinaryOrderDecoder, encode_binary),
+  ],
+)
+def test_order_decoder(decoder, encode):
+  """
+  Tests decoding streamed orders.
+
+  Verifies that orders encoded as the API streams them decode to their
+  coordinates whatever the chunks they arrive in, growing the buffers
+  as needed, and that invalid orders are reported at their index in the
+  whole stream.
+  """
+  rng = np.random.default_rng(0)
+  longitudes = rng.uniform(28, 30, 100)
+  latitudes = rng.uniform(40, 42, 100)
+  data = encode(longitudes, latitudes)
+
+  for size in [1, 7, 16, 1_000, len(data)]:
+    orders = decoder("Test", ("orders",), capacity=8)
+    for start in range(0, len(data), size):
+      orders.feed(data[start : start + size])
+    decoded = orders.close()
+
+    np.testing.assert_array_equal(decoded[0], latitudes)
+    np.testing.assert_array_equal(decoded[1], longitudes)
+
+  orders = decoder("Test", ("orders",))
+  orders.feed(encode(longitudes[:3], latitudes[:3]))
+  with pytest.raises(ValidationError) as error:
+    orders.feed(encode(np.array([29.0, 181.0]), np.array([41.0, 41.0])))
+
+  assert [detail["loc"] for detail in error.value.errors()] == [
+    ("orders", 4, "longitude")
+  ]
+
+
+def test_order_decoder_layouts():
+  """
+  Tests decoding streamed orders in other layouts.
+
+  Verifies that NDJSON orders holding districts or lacking a final
+  newline decode, that invalid lines are reported by index and that a
+  binary stream ending within an order is rejected.
+  """
+  orders = NdjsonOrderDecoder("Test", ("orders",))
+  orders.feed(
+    encode_ndjson(np.array([29.0]), np.array([41.0]), ["Şile"]).encode()
+  )
+  orders.feed(b'\r\n{"latitude": 40.5, "longitude": 28}')
+
+  assert [values.tolist() for values in orders.close()] == [
+    [41.0, 40.5],
+    [29.0, 28.0],
+  ]
+
+  orders = NdjsonOrderDecoder("Test", ("orders",))
+  with pytest.raises(ValidationError) as error:
+    orders.feed(b'{"latitude": 41, "longitude": 29}\n{"latitude": 41,\n')
+
+  assert [
+    (detail["loc"], detail["type"]) for detail in error.value.errors()
+  ] == [(("orders", 1), "json_invalid")]
+
+  orders = NdjsonOrderDecoder("Test", ("orders",))
+  with pytest.raises(ValidationError) as error:
+    orders.feed(b'{"latitude": 41, "longitude": 29}\n{"latitude": "x"}\n')
+
+  assert [
+    (detail["loc"], detail["type"]) for detail in error.value.errors()
+  ] == [
+    (("orders", 1, "latitude"), "float_parsing"),
+    (("orders", 1, "longitude"), "missing"),
+  ]
+
+  orders = BinaryOrderDecoder("Test", ("orders",))
+  orders.feed(encode_binary(np.array([29.0]), np.array([41.0]))[:-1])
+  with pytest.raises(ValueError, match="15 bytes left over"):
+    orders.close()
+
+
+def test_alias_table_distribution():
+  """
+  Tests that alias table draws follow the table's weights.
+
+  Verifies that zero-weight outcomes are never drawn and that observed
+  frequencies are close to the normalized weights.
+  """
+  table = AliasTable.build(np.array([1.0, 0.0, 3.0, 6.0]))
+
+  indices = table.sample(100_000, np.random.default_rng(0))
+
+  frequencies = np.bincount(indices, minlength=4) / len(indices)
+  assert frequencies[1] == 0
+  assert np.allclose(frequencies, [0.1, 0.0, 0.3, 0.6], atol=0.01)
+
+
+def test_points_in_region_geometry_weighted_part_table():
+  """
+  Tests per-region density weights when drawing points.
+
+  Verifies that giving the smaller region a tenfold density shifts most
+  points into it, despite its smaller area.
+  """
+  small = Polygon([[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]])
+  large = Polygon([[2, 2], [4, 2], [4, 3], [2, 3], [2, 2]])
+  geometry = build_region_geometry(["Small", "Large"], [small, large])
+
+  part_table = geometry.weighted_part_table(np.array([10.0, 1.0]))
+  longitudes, latitudes = points_in_region_geometry(
+    geometry, 6_000, np.random.default_rng(0), part_table=part_table
+  )
+
+  in_small = shapely.contains_xy(small, longitudes, latitudes).mean()
+  assert 0.8 < in_small < 0.87
+
+
+def test_validate_coordinates():
+  """
+  Tests validating order coordinates in bulk.
+
+  Verifies that valid orders come back as arrays, that invalid
+  coordinates are reported per order index as model validation reports
+  them and that other layouts are left to model validation.
+  """
+  latitudes, longitudes = validate_coordinates(
+    [{"latitude": 41, "longitude": 29.5}, {"latitude": -90, "longitude": 180}],
+    "Test",
+  )
+
+  np.testing.assert_array_equal(latitudes, [41, -90])
+  np.testing.assert_array_equal(longitudes, [29.5, 180])
+  assert latitudes.dtype == np.float64
+
+  with pytest.raises(ValidationError) as error:
+    validate_coordinates(
+      [
+        {"latitude": 41, "longitude": 29},
+        {"latitude": 91, "longitude": -181},
+        {"latitude": -90.5, "longitude": 29},
+      ],
+      "Test",
+      ("orders",),
+    )
+
+  assert [
+    (error["loc"], error["type"], error["msg"])
+    for error in error.value.errors()
+  ] == [
+    (
+      ("orders", 1, "latitude"),
+      "less_than_equal",
+      "Input should be less than or equal to 90",
+    ),
+    (
+      ("orders", 1, "longitude"),
+      "greater_than_equal",
+      "Input should be greater than or equal to -180",
+    ),
+    (
+      ("orders", 2, "latitude"),
+      "greater_than_equal",
+      "Input should be greater than or equal to -90",
+    ),
+  ]
+
+  for orders in [
+    None,
+    [{"latitude": 41}],
+    [{"latitude": 41, "longitude": 29, "district": "Kadıköy"}],
+    [{"latitude": "41", "longitude": 29}],
+    [{"latitude": None, "longitude": 29}],
+    [[41, 29]],
+  ]:
+    assert validate_coordinates(orders, "Test") is None
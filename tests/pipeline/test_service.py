@@ -0,0 +1,163 @@
+from unittest.mock import patch
+
+import pytest
+from sanic import exceptions
+
+from src.basket import service as basket_service
+from src.basket.admission import AdmissionQueue
+from src.basket.service import create_payloads, parse_request
+from src.order.service import create_orders, region_geometries
+from src.pipeline.service import create_pipeline
+from src.pipeline.type import CompactPipeline, PipelineCreate
+from src.region.registry import RegionRegistry
+from src.region.type import Region
+
+REGIONS = [
+  Region(
+    name="TestRegion",
+    type="Polygon",
+    coordinates=[[[0, 0], [0.05, 0], [0.05, 0.05], [0, 0.05], [0, 0]]],
+  ),
+]
+
+
+@pytest.fixture(autouse=True)
+def mock_regions():
+  """
+  Serves a single small region and clears the region geometry cache.
+
+  The region is small enough for the generated orders to share baskets.
+  """
+  region_geometries.clear()
+  with patch(
+    "src.order.service.region_service.get_registry",
+    return_value=RegionRegistry.from_regions(REGIONS),
+  ):
+    yield
+  region_geometries.clear()
+
+
+@pytest.mark.asyncio
+async def test_create_pipeline_matches_round_trip():
+  """
+  Tests the pipeline against the separate order and basket services.
+
+  Verifies that the pipeline returns the orders create_orders generates
+  for the same seed and the baskets create_payloads allocates for them,
+  in the same layout.
+  """
+  body = PipelineCreate(regions=["TestRegion"], count=200, seed=7)
+
+  pipeline = await create_pipeline(body)
+  orders = [order.model_dump() for order in await create_orders(body)]
+  baskets, _ = await create_payloads(*parse_request({"orders": orders}))
+
+  assert pipeline == {"orders": orders, "baskets": baskets}
+
+
+@pytest.mark.asyncio
+async def test_create_pipeline_compact():
+  """
+  Tests the compact pipeline format.
+
+  Verifies that compact baskets refer to orders by index and describe
+  the same baskets as the full format.
+  """
+  body = PipelineCreate(regions=["TestRegion"], count=200, seed=7)
+  compact_body = PipelineCreate(
+    regions=["TestRegion"], count=200, seed=7, format="compact"
+  )
+
+  pipeline = await create_pipeline(body)
+  compact = await create_pipeline(compact_body)
+
+  assert isinstance(compact, CompactPipeline)
+  assert compact.radius == 0.5
+  assert compact.orders == [
+    (order["latitude"], order["longitude"]) for order in pipeline["orders"]
+  ]
+  assert len(compact.baskets) == len(pipeline["baskets"])
+  for compact_basket, basket in zip(compact.baskets, pipeline["baskets"]):
+    assert compact.orders[compact_basket.center] == (
+      basket["latitude"],
+      basket["longitude"],
+    )
+    assert [compact.orders[idx] for idx in compact_basket.orders] == [
+      (order["latitude"], order["longitude"]) for order in basket["orders"]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_create_pipeline_invalid_region():
+  """
+  Tests the pipeline with unknown region names.
+
+  Verifies that the order service's BadRequest is passed through.
+  """
+  body = PipelineCreate(regions=["Unknown"], count=10)
+
+  with pytest.raises(exceptions.BadRequest):
+    await create_pipeline(body)
+
+
+@pytest.mark.asyncio
+async def test_create_pipeline_compact_districts():
+  """
+  Tests district tagging in the compact pipeline format.
+
+  Verifies that districts are listed once per order, and left out of
+  the response unless requested.
+  """
+  body = PipelineCreate(
+    regions=["TestRegion"], count=20, format="compact", districts=True
+  )
+
+  compact = await create_pipeline(body)
+  untagged = await create_pipeline(body.model_copy(update={"districts": False}))
+
+  assert compact.districts == ["TestRegion"] * 20
+  assert "districts" not in untagged.model_dump()
+
+
+@pytest.mark.asyncio
+async def test_create_pipeline_districts():
+  """
+  Tests district tagging in the full pipeline format.
+
+  Verifies that orders and baskets carry their district when requested.
+  """
+  body = PipelineCreate(regions=["TestRegion"], count=20, districts=True)
+
+  pipeline = await create_pipeline(body)
+
+  assert all(order["district"] == "TestRegion" for order in pipeline["orders"])
+  assert all(
+    basket["district"] == "TestRegion"
+    and all(order["district"] == "TestRegion" for order in basket["orders"])
+    for basket in pipeline["baskets"]
+  )
+
+
+@pytest.mark.asyncio
+async def test_create_pipeline_admission():
+  """
+  Tests admitting pipeline allocation.
+
+  Verifies that pipelines are admitted like basket requests and rejected
+  before allocating when the queue is over budget.
+  """
+  body = PipelineCreate(regions=["TestRegion"], count=50, seed=7)
+  queue = AdmissionQueue(capacity=10, budget=0)
+  basket_service.set_admission(queue)
+  try:
+    await create_pipeline(body)
+    assert queue.state().admitted == 1
+
+    queue.running, queue.running_cost = 1, 10
+    with patch.object(basket_service, "allocate") as allocate:
+      with pytest.raises(exceptions.ServiceUnavailable):
+        await create_pipeline(body)
+      allocate.assert_not_called()
+    assert queue.state().rejected == 1
+  finally:
+    basket_service.set_admission(None)
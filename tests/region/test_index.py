@@ -0,0 +1,87 @@
+import numpy as np
+from shapely import MultiPolygon, Polygon
+
+from src.region.index import RegionIndex
+
+
+def make_index(resolution: float = 0.25) -> RegionIndex:
+  """
+  Builds an index over two adjacent squares and a detached island.
+
+  Region "West" covers [0, 2] x [0, 2], region "East" covers [2, 4] x
+  [0, 2] and also owns the island [5, 6] x [5, 6].
+  """
+  west = Polygon([[0, 0], [2, 0], [2, 2], [0, 2], [0, 0]])
+  east = MultiPolygon(
+    [
+      Polygon([[2, 0], [4, 0], [4, 2], [2, 2], [2, 0]]),
+      Polygon([[5, 5], [6, 5], [6, 6], [5, 6], [5, 5]]),
+    ]
+  )
+  return RegionIndex(["West", "East"], [west, east], resolution=resolution)
+
+
+def test_region_index_grid_cells():
+  """
+  Tests rasterization of regions into grid cells.
+
+  Verifies that the grid uses a uint8 dtype for few regions, that interior
+  cells hold their region id + 1 and that cells on borders are marked as
+  boundary cells.
+  """
+  index = make_index()
+
+  assert index.grid.dtype == np.uint8
+  assert index.grid[2, 2] == 1
+  assert index.grid[2, 12] == 2
+  assert index.grid[2, 8] == index.boundary_id
+  assert index.grid[10, 10] == RegionIndex.OUTSIDE
+
+
+def test_region_index_lookup_vectorized():
+  """
+  Tests vectorized lookup of region ids for interior and outside points.
+
+  Verifies that points are mapped to the region containing them and that
+  points outside every region, inside or beyond the grid, get -1.
+  """
+  index = make_index()
+  longitudes = np.array([1.0, 3.0, 5.5, 4.5, -10.0])
+  latitudes = np.array([1.0, 1.0, 5.5, 4.5, 50.0])
+
+  region_ids = index.lookup(longitudes, latitudes)
+
+  assert region_ids.tolist() == [0, 1, 1, -1, -1]
+
+
+def test_region_index_lookup_boundary_cells():
+  """
+  Tests the exact fallback for points in boundary cells.
+
+  Verifies that points close to a shared border are resolved exactly,
+  and that points exactly on the border get the lower region id.
+  """
+  index = make_index(resolution=1.0)
+  longitudes = np.array([1.999, 2.001, 2.0, 6.5])
+  latitudes = np.array([1.0, 1.0, 1.0, 5.5])
+
+  region_ids = index.lookup(longitudes, latitudes)
+
+  assert region_ids.tolist() == [0, 1, 0, -1]
+
+
+def test_region_index_contains():
+  """
+  Tests containment of points in a subset of regions.
+
+  Verifies that only points inside one of the requested regions match.
+  """
+  index = make_index()
+  longitudes = np.array([1.0, 3.0, 5.5])
+  latitudes = np.array([1.0, 1.0, 5.5])
+
+  assert index.contains(longitudes, latitudes, [1]).tolist() == [
+    False,
+    True,
+    True,
+  ]
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+import shapely
+
+from src.region.registry import RegionRegistry
+from src.region.type import Region
+
+
+def make_registry() -> RegionRegistry:
+  """
+  Builds a registry over a unit square and a two-part MultiPolygon.
+  """
+  return RegionRegistry.from_regions(
+    [
+      Region(
+        name="Square",
+        type="Polygon",
+        coordinates=[[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+      ),
+      Region(
+        name="Islands",
+        type="MultiPolygon",
+        coordinates=[
+          [[[2, 2], [3, 2], [3, 3], [2, 3], [2, 2]]],
+          [[[4, 4], [6, 4], [6, 6], [4, 6], [4, 4]]],
+        ],
+      ),
+    ]
+  )
+
+
+def test_region_registry_geometry():
+  """
+  Tests the geometry data held by the registry.
+
+  Verifies that bounds and areas are stored per region id and that the
+  region geometries are prepared.
+  """
+  registry = make_registry()
+
+  assert len(registry) == 2
+  assert registry.names == ("Square", "Islands")
+  np.testing.assert_array_equal(registry.bounds, [[0, 0, 1, 1], [2, 2, 6, 6]])
+  np.testing.assert_array_equal(registry.areas, [1, 5])
+  np.testing.assert_array_equal(registry.centroids, [[0.5, 0.5], [4.5, 4.5]])
+  np.testing.assert_array_equal(registry.vertices, [5, 10])
+  assert registry.projected_areas[1] > 4 * registry.projected_areas[0]
+  assert all(shapely.is_prepared(registry.polygons))
+
+
+def test_region_registry_select():
+  """
+  Tests resolving region names into region ids.
+
+  Verifies that unknown names are ignored and duplicates are dropped
+  while keeping the order of first appearance.
+  """
+  registry = make_registry()
+
+  assert registry.select(["Islands", "Unknown", "Square", "Islands"]) == [
+    1,
+    0,
+  ]
+  assert registry.select(["Unknown"]) == []
+
+
+def test_region_registry_immutable():
+  """
+  Tests that the registry cannot be modified after loading.
+
+  Verifies that its fields, name index and arrays all reject writes.
+  """
+  registry = make_registry()
+
+  with pytest.raises(AttributeError):
+    registry.regions = ()
+  with pytest.raises(TypeError):
+    registry.ids["Other"] = 2
+  with pytest.raises(ValueError):
+    registry.areas[0] = 0
+
+
+def test_region_registry_attach_index():
+  """
+  Tests setting the index from a grid rasterized elsewhere.
+
+  Verifies that the attached index uses the given grid as is and looks
+  up points like an index rasterized by the registry itself.
+  """
+  grid = make_registry().index.grid
+  registry = make_registry()
+
+  index = registry.attach_index(grid)
+
+  assert registry.index is index
+  assert index.grid is grid
+  longitudes = np.array([0.5, 2.5, 5.0, 7.0])
+  latitudes = np.array([0.5, 2.5, 5.0, 7.0])
+  np.testing.assert_array_equal(
+    index.lookup(longitudes, latitudes), [0, 1, 1, -1]
+  )
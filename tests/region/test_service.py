@@ -1,10 +1,34 @@
 import json
 from unittest.mock import mock_open, patch
 
+import numpy as np
 import pytest
 
-from src.region.service import get_regions
-from src.region.type import Region
+from src.region import service
+from src.region.registry import RegionRegistry
+from src.region.service import (
+  LOD_ZOOMS,
+  get_districts,
+  get_regions,
+  get_regions_body,
+  get_summary_body,
+  load_registry,
+)
+from src.region.type import DistrictsLookup, Region
+from src.region.util import zoom_tolerance
+
+
+@pytest.fixture(autouse=True)
+def reset_registry(monkeypatch):
+  """
+  Unloads the region registry for every test.
+
+  Tests read mocked files, so a registry loaded by one test must not be
+  served to another.
+  """
+  monkeypatch.setattr(service, "registry", None)
+  monkeypatch.setattr(service, "regions_bodies", {})
+  monkeypatch.setattr(service, "summary_body", None)
 
 
 @pytest.mark.asyncio
@@ -140,3 +164,158 @@ async def test_region_model_validation():
   assert region.name == "Test"
   assert region.type == "Polygon"
   assert len(region.coordinates) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_regions_reads_file_once():
+  """
+  Tests that regions are read from the registry after loading.
+
+  Verifies that once the registry is loaded, get_regions serves every
+  call without opening the regions file again.
+  """
+  mock_data = {
+    "type": "FeatureCollection",
+    "features": [
+      {
+        "type": "Feature",
+        "properties": {"name": "TestRegion"},
+        "geometry": {
+          "type": "Polygon",
+          "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+        },
+      }
+    ],
+  }
+
+  opener = mock_open(read_data=json.dumps(mock_data))
+  with patch("builtins.open", opener):
+    registry = load_registry()
+    first = await get_regions()
+    second = await get_regions()
+
+  assert opener.call_count == 1
+  assert first == second == list(registry.regions)
+
+
+@pytest.mark.asyncio
+async def test_get_regions_body():
+  """
+  Tests the serialized regions response body.
+
+  Verifies that the body holds the regions get_regions returns and is
+  built once for the loaded registry.
+  """
+  mock_data = {
+    "type": "FeatureCollection",
+    "features": [
+      {
+        "type": "Feature",
+        "properties": {"name": "TestRegion"},
+        "geometry": {
+          "type": "Polygon",
+          "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+        },
+      }
+    ],
+  }
+
+  with patch("builtins.open", mock_open(read_data=json.dumps(mock_data))):
+    body = get_regions_body()
+    regions = await get_regions()
+
+  assert get_regions_body() is body
+  assert json.loads(body.variants["identity"]) == [
+    region.model_dump() for region in regions
+  ]
+
+
+def test_get_regions_body_simplified(monkeypatch):
+  """
+  Tests serving regions at a level of detail.
+
+  Verifies that a tolerance is rounded down to the nearest level, that
+  simplified regions have fewer vertices and that a tolerance below
+  every level serves full resolution.
+  """
+  angles = np.linspace(0, 2 * np.pi, 1_000, endpoint=False)
+  ring = np.column_stack((np.cos(angles), np.sin(angles))) * 0.1
+  region = Region(
+    name="Circle",
+    type="Polygon",
+    coordinates=[[*ring.tolist(), ring[0].tolist()]],
+  )
+  monkeypatch.setattr(
+    service, "registry", RegionRegistry.from_regions([region])
+  )
+
+  coarse = zoom_tolerance(LOD_ZOOMS[0])
+  body = get_regions_body(coarse * 1.5)
+  simplified = json.loads(body.variants["identity"])
+
+  assert get_regions_body(coarse) is body
+  assert get_regions_body(zoom_tolerance(LOD_ZOOMS[-1]) / 2) is (
+    get_regions_body()
+  )
+  assert simplified[0]["name"] == "Circle"
+  assert 4 <= len(simplified[0]["coordinates"][0]) < 100
+
+
+def test_get_summary_body(monkeypatch):
+  """
+  Tests the serialized regions summary.
+
+  Verifies that every region is listed with its statistics and without
+  its coordinates, and that the body is built once.
+  """
+  region = Region(
+    name="Square",
+    type="Polygon",
+    coordinates=[[[0, 0], [0.1, 0], [0.1, 0.1], [0, 0.1], [0, 0]]],
+  )
+  monkeypatch.setattr(
+    service, "registry", RegionRegistry.from_regions([region])
+  )
+
+  body = get_summary_body()
+  summary = json.loads(body.variants["identity"])
+
+  assert get_summary_body() is body
+  assert summary == [
+    {
+      "name": "Square",
+      "type": "Polygon",
+      "area": pytest.approx(123.64, rel=1e-3),
+      "bounds": [0, 0, 0.1, 0.1],
+      "centroid": [pytest.approx(0.05), pytest.approx(0.05)],
+      "vertices": 5,
+    }
+  ]
+
+
+@pytest.mark.asyncio
+async def test_get_districts(monkeypatch):
+  """
+  Tests looking up the districts of points in bulk.
+
+  Verifies that each (latitude, longitude) pair gets the region it falls
+  in, and None outside every region.
+  """
+  regions = [
+    Region(
+      name="West",
+      type="Polygon",
+      coordinates=[[[0, 0], [0.1, 0], [0.1, 0.1], [0, 0.1], [0, 0]]],
+    ),
+    Region(
+      name="East",
+      type="Polygon",
+      coordinates=[[[0.1, 0], [0.2, 0], [0.2, 0.1], [0.1, 0.1], [0.1, 0]]],
+    ),
+  ]
+  monkeypatch.setattr(service, "registry", RegionRegistry.from_regions(regions))
+
+  body = DistrictsLookup(coordinates=[(0.05, 0.15), (0.05, 0.05), (5, 5)])
+  result = await get_districts(body)
+
+  assert result.districts == ["East", "West", None]
@@ -0,0 +1,132 @@
+import json
+
+import pytest
+
+from src.region import service
+from src.region.registry import RegionRegistry
+from src.region.store import compile_store, read_store, source_digest
+
+FEATURES = {
+  "type": "FeatureCollection",
+  "features": [
+    {
+      "type": "Feature",
+      "properties": {"name": "Square"},
+      "geometry": {
+        "type": "Polygon",
+        "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+      },
+    },
+    {
+      "type": "Feature",
+      "properties": {"name": "Islands"},
+      "geometry": {
+        "type": "MultiPolygon",
+        "coordinates": [
+          [
+            [[2, 2], [4, 2], [4, 4], [2, 4], [2, 2]],
+            [[3, 3], [3.5, 3], [3.5, 3.5], [3, 3.5], [3, 3]],
+          ],
+          [[[5, 5], [6, 5], [6, 6], [5, 6], [5, 5]]],
+        ],
+      },
+    },
+  ],
+}
+
+
+@pytest.fixture
+def source(tmp_path):
+  """
+  Writes a GeoJSON source file with a Polygon and a MultiPolygon region.
+
+  The MultiPolygon has a hole, which region geometries ignore but region
+  coordinates keep.
+  """
+  path = tmp_path / "coordinates.json"
+  path.write_text(json.dumps(FEATURES))
+  return str(path)
+
+
+def test_store_round_trip(source, tmp_path):
+  """
+  Tests compiling a source file into a store and reading it back.
+
+  Verifies that the stored registry holds the same regions, geometries,
+  bounds and areas as the registry parsed from GeoJSON.
+  """
+  store = str(tmp_path / "coordinates.bin")
+  compile_store(source, store)
+
+  stored = read_store(store, source_digest(source))
+  parsed = RegionRegistry.load(source)
+
+  assert stored.regions == parsed.regions
+  assert stored.names == parsed.names and stored.types == parsed.types
+  assert "polygons" not in stored.__dict__
+  assert all(
+    a.geom_type == b.geom_type and a.equals_exact(b, 0)
+    for a, b in zip(stored.polygons, parsed.polygons)
+  )
+  assert (stored.bounds == parsed.bounds).all()
+  assert (stored.areas == parsed.areas).all()
+
+
+def test_store_invalid(source, tmp_path):
+  """
+  Tests reading missing, foreign and stale stores.
+
+  Verifies that none of them yields a registry.
+  """
+  store = tmp_path / "coordinates.bin"
+  assert read_store(str(store), source_digest(source)) is None
+
+  store.write_bytes(b"not a store")
+  assert read_store(str(store), source_digest(source)) is None
+
+  compile_store(source, str(store))
+  assert read_store(str(store), "0" * 64) is None
+
+
+def test_store_corrupt(source, tmp_path):
+  """
+  Tests reading truncated and corrupt stores.
+
+  Verifies that they yield no registry, so that the store is compiled
+  again, rather than raising.
+  """
+  store = tmp_path / "coordinates.bin"
+  compile_store(source, str(store))
+  data = store.read_bytes()
+  size = int.from_bytes(data[8:16], "little")
+
+  for corrupt in [
+    data[:-8],
+    data[:20],
+    data[:16] + b"{" * size + data[16 + size :],
+    data[:16] + b'{"version": 2}'.ljust(size) + data[16 + size :],
+  ]:
+    store.write_bytes(corrupt)
+    assert read_store(str(store), source_digest(source)) is None
+
+
+def test_load_registry_rebuilds_stale_store(source, tmp_path, monkeypatch):
+  """
+  Tests that the store is rebuilt when the source file changes.
+
+  Verifies that after the source changes, loading the registry serves
+  the new regions and leaves a store matching the new source.
+  """
+  monkeypatch.setattr(service, "registry", None)
+  store = str(tmp_path / "coordinates.bin")
+  compile_store(source, store)
+
+  features = json.loads(json.dumps(FEATURES))
+  features["features"][0]["properties"]["name"] = "Renamed"
+  with open(source, "w") as file:
+    json.dump(features, file)
+
+  registry = service.load_registry(source, store)
+
+  assert registry.names == ("Renamed", "Islands")
+  assert read_store(store, source_digest(source)).names == registry.names
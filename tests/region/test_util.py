@@ -0,0 +1,101 @@
+import numpy as np
+from shapely import MultiPolygon, Polygon, box
+
+from src.region.type import Region
+from src.region.util import (
+  geometry_region,
+  projected_areas,
+  region_polygon,
+  zoom_tolerance,
+)
+
+
+def test_region_polygon_single():
+  """
+  Tests conversion of a single Polygon region to Shapely Polygon.
+
+  Verifies that a Region object with type "Polygon" is correctly converted
+  to a Shapely Polygon object with valid area.
+  """
+  region = Region(
+    name="Test",
+    type="Polygon",
+    coordinates=[[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+  )
+
+  result = region_polygon(region)
+
+  assert isinstance(result, Polygon)
+  assert result.area > 0
+
+
+def test_region_polygon_multi():
+  """
+  Tests conversion of a MultiPolygon region to Shapely MultiPolygon.
+
+  Verifies that a Region object with type "MultiPolygon" is correctly
+  converted to a Shapely MultiPolygon object containing multiple polygons.
+  """
+  region = Region(
+    name="Test",
+    type="MultiPolygon",
+    coordinates=[
+      [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+      [[[2, 2], [3, 2], [3, 3], [2, 3], [2, 2]]],
+    ],
+  )
+
+  result = region_polygon(region)
+
+  assert isinstance(result, MultiPolygon)
+  assert len(result.geoms) == 2
+
+
+def test_geometry_region_round_trip():
+  """
+  Tests converting geometries back into regions.
+
+  Verifies that Polygon and MultiPolygon regions survive a round trip
+  through region_polygon unchanged.
+  """
+  regions = [
+    Region(
+      name="Square",
+      type="Polygon",
+      coordinates=[[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+    ),
+    Region(
+      name="Islands",
+      type="MultiPolygon",
+      coordinates=[
+        [[[2, 2], [3, 2], [3, 3], [2, 3], [2, 2]]],
+        [[[4, 4], [5, 4], [5, 5], [4, 5], [4, 4]]],
+      ],
+    ),
+  ]
+
+  for region in regions:
+    assert geometry_region(region.name, region_polygon(region)) == region
+
+
+def test_zoom_tolerance():
+  """
+  Tests the pixel size of map zoom levels.
+
+  Verifies that a pixel spans 360 / 256 degrees at zoom 0 and halves with
+  every zoom level.
+  """
+  assert zoom_tolerance(0) == 360 / 256
+  assert zoom_tolerance(10) == zoom_tolerance(9) / 2
+
+
+def test_projected_areas():
+  """
+  Tests measuring geometries in square kilometers.
+
+  Verifies that a 0.1 degree square at the equator covers about 124 km²
+  and that the same square at 60 degrees north covers half of that.
+  """
+  areas = projected_areas([box(0, 0, 0.1, 0.1), box(29, 59.95, 29.1, 60.05)])
+
+  np.testing.assert_allclose(areas, [123.64, 123.64 * 0.5], rtol=1e-3)
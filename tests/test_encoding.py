@@ -0,0 +1,165 @@
+import gzip
+import json
+from types import SimpleNamespace
+
+import pytest
+from sanic import raw
+
+from src import encoding
+from src.encoding import (
+  ResponseCompressor,
+  StaticBody,
+  available_encodings,
+  etag_matches,
+  negotiate_encoding,
+  set_preference,
+)
+
+BODY = json.dumps([{"name": "Region", "value": 1}] * 100).encode()
+
+
+@pytest.mark.parametrize(
+  "header, expected",
+  [
+    (None, "identity"),
+    ("gzip", "gzip"),
+    ("gzip, deflate, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("*", "br"),
+    ("deflate", "identity"),
+    ("gzip;q=0, br;q=0", "identity"),
+    ("identity;q=0, gzip;q=0.1", "gzip"),
+  ],
+)
+def test_negotiate_encoding(header, expected):
+  """
+  Tests picking a content coding from Accept-Encoding.
+
+  Verifies that quality values decide, that ties go to the preferred
+  coding and that identity is the fallback.
+  """
+  assert negotiate_encoding(header, ["br", "gzip", "identity"]) == expected
+
+
+def test_etag_matches():
+  """
+  Tests comparing If-None-Match against an entity tag.
+
+  Verifies that listed, weak and wildcard tags match and others do not.
+  """
+  assert etag_matches('"a", "b"', '"b"')
+  assert etag_matches('W/"b"', '"b"')
+  assert etag_matches("*", '"b"')
+  assert not etag_matches('"a"', '"b"')
+  assert not etag_matches(None, '"b"')
+
+
+def test_static_body_respond():
+  """
+  Tests serving a static body.
+
+  Verifies that the negotiated variant is served with its own entity tag
+  and that sending that tag back yields an empty 304.
+  """
+  body = StaticBody.build(BODY, "application/json")
+
+  response = body.respond(
+    SimpleNamespace(headers={"accept-encoding": "gzip"}), "no-cache"
+  )
+
+  assert response.status == 200
+  assert response.headers["content-encoding"] == "gzip"
+  assert response.headers["etag"] == body.etag("gzip") != body.etag("identity")
+  assert gzip.decompress(response.body) == BODY
+
+  response = body.respond(
+    SimpleNamespace(
+      headers={"accept-encoding": "gzip", "if-none-match": body.etag("gzip")}
+    ),
+    "no-cache",
+  )
+
+  assert response.status == 304
+  assert not response.body
+
+
+def test_static_body_without_brotli(monkeypatch):
+  """
+  Tests building a static body without the optional brotli and zstandard
+  packages.
+
+  Verifies that only the gzip and identity variants are built.
+  """
+  monkeypatch.setattr(encoding, "brotli", None)
+  monkeypatch.setattr(encoding, "zstandard", None)
+
+  body = StaticBody.build(BODY, "application/json")
+
+  assert set(body.variants) == {"gzip", "identity"}
+
+
+def test_available_encodings_preference(monkeypatch):
+  """
+  Tests ordering the offered codings by preference.
+
+  Verifies that codings follow the order they are set in, which decides
+  ties in negotiation, and that codings left out are not offered.
+  """
+  monkeypatch.setattr(encoding, "preference", encoding.preference)
+  monkeypatch.setattr(encoding, "brotli", object())
+  monkeypatch.setattr(encoding, "zstandard", object())
+
+  set_preference({"zstd": 1, "br": 1, "gzip": 6})
+  assert available_encodings() == ["zstd", "br", "gzip", "identity"]
+  assert negotiate_encoding("br, zstd", available_encodings()) == "zstd"
+
+  set_preference(["gzip", "br"])
+  assert available_encodings() == ["gzip", "br", "identity"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("offload_threshold", [1 << 30, 0])
+async def test_response_compressor(offload_threshold):
+  """
+  Tests compressing response bodies.
+
+  Verifies that bodies are compressed in the best accepted coding,
+  whether on the event loop or on a thread, and that small bodies,
+  other media types and responses carrying a coding or an entity tag
+  are left alone.
+  """
+  compressor = ResponseCompressor(
+    {"gzip": 1, "deflate": 1},
+    threshold=100,
+    offload_threshold=offload_threshold,
+  )
+  request = SimpleNamespace(headers={"accept-encoding": "gzip, deflate"})
+
+  response = raw(BODY, content_type="application/json")
+  await compressor(request, response)
+
+  assert response.headers["content-encoding"] == "gzip"
+  assert response.headers["vary"] == "Accept-Encoding"
+  assert gzip.decompress(response.body) == BODY
+
+  small = raw(BODY[:50], content_type="application/json")
+  await compressor(request, small)
+  assert small.body == BODY[:50]
+  assert "content-encoding" not in small.headers
+  assert small.headers["vary"] == "Accept-Encoding"
+
+  for response in (
+    raw(BODY, content_type="application/octet-stream"),
+    raw(BODY, content_type="application/json", headers={"ETag": '"a"'}),
+    raw(
+      BODY,
+      content_type="application/json",
+      headers={"Content-Encoding": "br"},
+    ),
+  ):
+    await compressor(request, response)
+    assert response.body == BODY
+
+  identity = raw(BODY, content_type="application/json")
+  await compressor(SimpleNamespace(headers={}), identity)
+  assert identity.body == BODY
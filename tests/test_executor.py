@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+import pytest
+
+from src import executor
+
+
+@pytest.fixture(autouse=True)
+def reset_processes():
+  """
+  Resets the pool size before and after every test.
+  """
+  executor.set_processes(None)
+  yield
+  executor.set_processes(None)
+
+
+def test_worker_processes():
+  """
+  Tests splitting the CPUs between the pools of Sanic workers.
+
+  Verifies that all workers together get about one process per CPU and
+  that every worker gets at least one.
+  """
+  with patch.object(executor.os, "cpu_count", return_value=8):
+    assert executor.worker_processes(1) == 8
+    assert executor.worker_processes(3) == 2
+    assert executor.worker_processes(16) == 1
+    assert executor.worker_processes(0) == 8
+
+
+def test_pool_size():
+  """
+  Tests sizing the pools created in a process.
+
+  Verifies that pools have one process per CPU by default and the set
+  number of processes otherwise.
+  """
+  with patch.object(executor.os, "cpu_count", return_value=8):
+    assert executor.pool_size() == 8
+
+    executor.set_processes(2)
+    assert executor.pool_size() == 2
+    pool = executor.create_executor()
+    try:
+      assert pool._max_workers == 2
+    finally:
+      pool.shutdown()
@@ -0,0 +1,51 @@
+import contextvars
+import pstats
+from types import SimpleNamespace
+
+from src.profiling import RequestProfiler, profiled
+
+
+def make_request(request_id: str, headers: dict[str, str]) -> SimpleNamespace:
+  """
+  Builds a stand-in for a Sanic request.
+  """
+  return SimpleNamespace(id=request_id, headers=headers, ctx=SimpleNamespace())
+
+
+def test_request_profiler(tmp_path):
+  """
+  Tests profiling requests that ask for it.
+
+  Verifies that a profile of the handler is written in pstats format and
+  named after the request id, that requests not asking for it and
+  requests arriving while the profiler is busy are not profiled, and
+  that profiled work can tell it is profiled until the profile stops.
+  """
+  profiler = RequestProfiler(str(tmp_path / "profiles"))
+  request = make_request("a/../b", {"X-Profile": "1"})
+  busy = make_request("c", {"X-Profile": "1"})
+  plain = make_request("d", {})
+
+  def handle() -> tuple[bool, bool]:
+    profiler.start(request)
+    profiler.start(busy)
+    profiler.start(plain)
+    sorted(range(1_000), key=lambda value: -value)
+    during = profiled.get()
+    profiler.stop(busy)
+    profiler.stop(request)
+    return during, profiled.get()
+
+  assert contextvars.copy_context().run(handle) == (True, False)
+  assert not profiled.get()
+
+  assert request.ctx.profile == str(tmp_path / "profiles" / "a____b.prof")
+  assert [path.name for path in (tmp_path / "profiles").iterdir()] == [
+    "a____b.prof"
+  ]
+  assert not hasattr(busy.ctx, "profile")
+  assert not hasattr(plain.ctx, "profile")
+
+  stats = pstats.Stats(request.ctx.profile)
+  assert any(name == "handle" for _, _, name in stats.stats)
+  assert profiler.profile is None
@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.basket.type import Basket
+from src.order.type import Order
+from src.serialization import dumps, loads, type_adapter, typed_json
+
+
+def test_dumps():
+  """
+  Tests encoding values with the app's JSON encoder.
+
+  Verifies that NumPy arrays and scalars, pydantic models and integer
+  keys are encoded, and that decoding reverses it.
+  """
+  value = {
+    "latitudes": np.array([41.0, 41.5]),
+    "count": np.int64(2),
+    "order": Order(latitude=41.0, longitude=29.0),
+    201: "Created",
+  }
+
+  assert loads(dumps(value)) == {
+    "latitudes": [41.0, 41.5],
+    "count": 2,
+    "order": {"latitude": 41.0, "longitude": 29.0},
+    "201": "Created",
+  }
+
+  with pytest.raises(TypeError):
+    dumps({"value": object()})
+
+
+def test_typed_json():
+  """
+  Tests responding with values serialized from their type.
+
+  Verifies that the body matches serializing model_dump output, districts
+  left out included, and that adapters are built once per type.
+  """
+  orders = [
+    Order(latitude=41.0, longitude=29.0, district="Kadıköy"),
+    Order(latitude=41.1, longitude=29.1),
+  ]
+  basket = Basket(latitude=41.0, longitude=29.0, radius=0.5, orders=orders)
+
+  response = typed_json([basket], list[Basket], status=201)
+
+  assert response.status == 201
+  assert response.content_type == "application/json"
+  assert json.loads(response.body) == [basket.model_dump()]
+  assert "district" not in json.loads(response.body)[0]["orders"][1]
+  assert type_adapter(list[Basket]) is type_adapter(list[Basket])
+  assert json.loads(typed_json(orders[0]).body) == orders[0].model_dump()
@@ -0,0 +1,64 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from src.shared import SharedCache, attach_array, share_array
+
+
+def test_share_array():
+  """
+  Tests sharing an array through a shared memory block.
+
+  Verifies that the attached array matches the original in dtype, shape
+  and values, and that it is read-only.
+  """
+  array = np.arange(12, dtype=np.uint16).reshape(3, 4)
+  memory = share_array(array)
+  try:
+    attached = attach_array(memory)
+
+    assert attached.dtype == np.uint16
+    np.testing.assert_array_equal(attached, array)
+    with pytest.raises(ValueError):
+      attached[0, 0] = 1
+
+    del attached
+  finally:
+    memory.close()
+    memory.unlink()
+
+
+def test_shared_cache():
+  """
+  Tests storing values in a shared cache.
+
+  Verifies that values are found under their key, that values too large
+  for the cache are skipped and that values overwritten once the ring
+  buffer wraps around are evicted.
+  """
+  cache = SharedCache.create(multiprocessing.Lock(), capacity=1_200, slots=8)
+  keys = [bytes([index]) * 16 for index in range(6)]
+  try:
+    cache.put(keys[0], b"a" * 200)
+    cache.put(keys[1], b"b" * 300)
+
+    assert cache.get(keys[0]) == b"a" * 200
+    assert cache.get(keys[1]) == b"b" * 300
+    assert cache.get(keys[2]) is None
+
+    # The last value does not fit after the others and overwrites the
+    # first one.
+    for index in range(2, 6):
+      cache.put(keys[index], bytes([index]) * 200)
+
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[1]) == b"b" * 300
+    assert cache.get(keys[5]) == bytes([5]) * 200
+
+    cache.put(keys[0], b"a" * 301)
+    assert cache.get(keys[0]) is None
+  finally:
+    memory = cache.memory
+    cache.close()
+    memory.unlink()